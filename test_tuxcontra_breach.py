@@ -0,0 +1,174 @@
+"""
+Pruebas de la auditoría de filtraciones de TuxContra (corpus pequeños en disco)
+
+    python -m unittest test_tuxcontra_breach
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import tuxcontra_breach
+from tuxcontra_breach import (BinaryCorpus, TextCorpus, audit, build_index, is_breached,
+                              open_corpus, sha1_digest)
+
+# Contraseñas del corpus y sus veces; las "fuera" no están
+KNOWN = {f"filtrada{i}": 1 + (i * 37) % 5000 for i in range(3000)}
+MISSING = [f"fuera{i}" for i in range(300)]
+
+
+def write_corpus(path, digests, lowercase=False, newline=b"\n", trailing=True,
+                 counts=None):
+    """Escribe un corpus "HASH:veces" ordenado con las opciones de formato dadas"""
+    lines = []
+    for digest in sorted(digests):
+        key = digest.hex() if lowercase else digest.hex().upper()
+        count = (counts or {}).get(digest)
+        lines.append(key.encode("ascii") + (b":%d" % count if count else b""))
+    data = newline.join(lines)
+    if trailing:
+        data += newline
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class BreachTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp(prefix="tuxcontra_test_")
+        self.counts = {sha1_digest(p): n for p, n in KNOWN.items()}
+        self.ordered = sorted(self.counts)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def corpus_path(self, name="corpus.txt", **options):
+        path = os.path.join(self.tmp_dir, name)
+        options.setdefault("counts", self.counts)
+        write_corpus(path, self.ordered, **options)
+        return path
+
+    def check_lookups(self, corpus):
+        # Primera y última línea, y todas las demás
+        self.assertEqual(corpus.lookup(self.ordered[0]), self.counts[self.ordered[0]])
+        self.assertEqual(corpus.lookup(self.ordered[-1]), self.counts[self.ordered[-1]])
+        for digest in self.ordered:
+            self.assertEqual(corpus.lookup(digest), self.counts[digest])
+        for password in MISSING:
+            self.assertEqual(corpus.lookup(sha1_digest(password)), 0)
+        # Antes de la primera y después de la última
+        self.assertEqual(corpus.lookup(bytes(20)), 0)
+        self.assertEqual(corpus.lookup(b"\xff" * 20), 0)
+
+
+class TextCorpusTest(BreachTestCase):
+    """Bisección sobre el texto con las variantes de formato habituales"""
+
+    FORMATS = {
+        "lf": {},
+        "no_trailing_newline": {"trailing": False},
+        "crlf": {"newline": b"\r\n"},
+        "crlf_no_trailing_newline": {"newline": b"\r\n", "trailing": False},
+        "lowercase": {"lowercase": True},
+    }
+
+    def test_formats(self):
+        for name, options in self.FORMATS.items():
+            with self.subTest(format=name):
+                with TextCorpus(self.corpus_path(f"{name}.txt", **options)) as corpus:
+                    self.check_lookups(corpus)
+
+    def test_narrow_bracket(self):
+        # Horquilla estimada de pocas líneas: la bisección empieza en ella
+        with mock.patch.object(tuxcontra_breach, "BRACKET_LINES", 8):
+            for name, options in self.FORMATS.items():
+                with self.subTest(format=name):
+                    with TextCorpus(self.corpus_path(f"{name}.txt", **options)) as corpus:
+                        self.check_lookups(corpus)
+
+    def test_fallback_when_estimate_misses(self):
+        # Mitad de hashes con prefijo 00 y mitad con ff: la proporción sitúa
+        # los ff cerca del final, pero empiezan a la mitad del archivo
+        skewed = sorted(bytes([0x00 if i % 2 else 0xFF]) + d[1:]
+                        for i, d in enumerate(self.ordered))
+        counts = {d: 1 + i for i, d in enumerate(skewed)}
+        path = os.path.join(self.tmp_dir, "skewed.txt")
+        write_corpus(path, skewed, counts=counts)
+        first_ff = next(d for d in skewed if d[0] == 0xFF)
+        with mock.patch.object(tuxcontra_breach, "BRACKET_LINES", 8):
+            with TextCorpus(path) as corpus:
+                self.assertIsNone(corpus._bracket(corpus._key(first_ff)))
+                for digest in skewed:
+                    self.assertEqual(corpus.lookup(digest), counts[digest])
+                self.assertEqual(corpus.lookup(b"\x80" * 20), 0)
+
+    def test_small_file_is_scanned(self):
+        # Menos de SCAN_WINDOW bytes: solo la búsqueda con find
+        few = self.ordered[:20]
+        path = os.path.join(self.tmp_dir, "small.txt")
+        write_corpus(path, few, counts=self.counts, trailing=False)
+        self.assertLess(os.path.getsize(path), tuxcontra_breach.SCAN_WINDOW)
+        with TextCorpus(path) as corpus:
+            for digest in few:
+                self.assertEqual(corpus.lookup(digest), self.counts[digest])
+            self.assertEqual(corpus.lookup(self.ordered[20]), 0)
+
+    def test_lines_without_count(self):
+        path = os.path.join(self.tmp_dir, "nocount.txt")
+        write_corpus(path, self.ordered[:100], counts={})
+        with TextCorpus(path) as corpus:
+            self.assertEqual(corpus.lookup(self.ordered[0]), 1)
+            self.assertEqual(corpus.lookup(self.ordered[99]), 1)
+
+    def test_empty_file(self):
+        path = os.path.join(self.tmp_dir, "empty.txt")
+        open(path, "wb").close()
+        with TextCorpus(path) as corpus:
+            self.assertEqual(corpus.lookup(self.ordered[0]), 0)
+
+
+class BinaryCorpusTest(BreachTestCase):
+    """El índice binario responde lo mismo que el texto"""
+
+    def test_index_matches_text(self):
+        for name, options in TextCorpusTest.FORMATS.items():
+            with self.subTest(format=name):
+                index_path = os.path.join(self.tmp_dir, f"{name}.idx")
+                total = build_index(self.corpus_path(f"{name}.txt", **options), index_path)
+                self.assertEqual(total, len(self.ordered))
+                with open_corpus(index_path) as corpus:
+                    self.assertIsInstance(corpus, BinaryCorpus)
+                    self.check_lookups(corpus)
+
+    def test_unsorted_text_is_rejected(self):
+        path = os.path.join(self.tmp_dir, "unsorted.txt")
+        with open(path, "wb") as f:
+            for digest in reversed(self.ordered[:10]):
+                f.write(digest.hex().upper().encode("ascii") + b":1\n")
+        with self.assertRaises(ValueError):
+            build_index(path, os.path.join(self.tmp_dir, "unsorted.idx"))
+
+
+class AuditTest(BreachTestCase):
+    """audit() responde en el orden de entrada, también entre lotes"""
+
+    def test_order_and_counts(self):
+        candidates = []
+        for i, password in enumerate(list(KNOWN)[:500]):
+            candidates.append(password)
+            candidates.append(MISSING[i % len(MISSING)])
+        candidates += candidates[:50]  # repetidas
+        expected = [(p, KNOWN.get(p, 0)) for p in candidates]
+        text_path = self.corpus_path()
+        index_path = os.path.join(self.tmp_dir, "corpus.idx")
+        build_index(text_path, index_path)
+        for path in (text_path, index_path):
+            with self.subTest(corpus=os.path.basename(path)), open_corpus(path) as corpus:
+                self.assertEqual(list(audit(corpus, candidates, chunk=64)), expected)
+                self.assertEqual(is_breached(corpus, candidates[0]), KNOWN[candidates[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
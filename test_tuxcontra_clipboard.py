@@ -0,0 +1,215 @@
+"""
+Pruebas del portapapeles de TuxContra con backends falsos (sin pantalla)
+
+    python -m unittest test_tuxcontra_clipboard
+"""
+
+import queue
+import time
+import unittest
+
+from tuxcontra_clipboard import Clipboard, _digest
+from tuxcontra_jobs import Job
+
+
+class FakeTimers:
+    """root.after / root.after_cancel con un reloj manual"""
+
+    def __init__(self):
+        self.now = 0
+        self.pending = {}
+        self._next_id = 0
+
+    def schedule(self, ms, func):
+        self._next_id += 1
+        self.pending[self._next_id] = (self.now + ms, func)
+        return self._next_id
+
+    def cancel(self, timer_id):
+        self.pending.pop(timer_id, None)
+
+    def advance(self, ms):
+        """Avanza el reloj ms milisegundos ejecutando lo que venza"""
+        target = self.now + ms
+        while True:
+            due = [(when, timer_id) for timer_id, (when, _) in self.pending.items()
+                   if when <= target]
+            if not due:
+                break
+            when, timer_id = min(due)
+            self.now = when
+            _, func = self.pending.pop(timer_id)
+            func()
+        self.now = target
+
+
+class StubTkBackend:
+    """Backend como el de Tk: se usa desde el hilo de la interfaz"""
+
+    threaded = False
+
+    def __init__(self):
+        self.content = ""
+        # Todo lo que vería otra aplicación que pegara en cada momento
+        self.seen = []
+
+    def clear(self):
+        self.content = ""
+        self.seen.append(self.content)
+
+    def set(self, text):
+        self.content = text
+        self.seen.append(self.content)
+
+    def paste(self):
+        return self.content
+
+
+class StubThreadedBackend:
+    """Backend como pyperclip: se usa desde el hilo propio del portapapeles"""
+
+    threaded = True
+
+    def __init__(self, fail_clear=False):
+        self.content = ""
+        self.fail_clear = fail_clear
+
+    def copy(self, text):
+        self.content = text
+
+    def clear(self):
+        if self.fail_clear:
+            raise RuntimeError("sin acceso al portapapeles")
+        self.content = ""
+
+    def paste(self):
+        return self.content
+
+
+class TkClipboardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.timers = FakeTimers()
+        self.backend = StubTkBackend()
+        self.results = []
+        self.clipboard = Clipboard(self.backend, self.timers.schedule, self.timers.cancel,
+                                   post=lambda func, *args: func(*args), clear_after=30)
+
+    def copy(self, text):
+        self.clipboard.copy(text, lambda ok, error: self.results.append(ok))
+        self.timers.advance(0)
+
+    def test_copy_is_never_partial(self):
+        text = "0123456789" * 100_000
+        self.clipboard.copy(text, lambda ok, error: self.results.append(ok))
+        # Sin vueltas del bucle entre medias: el contenido ya es el completo
+        self.assertEqual(self.backend.seen, [text])
+        self.assertEqual(self.results, [True])
+
+    def test_newer_copy_replaces_previous(self):
+        self.copy("aaaaaaaaaaaa")
+        self.copy("bb")
+        self.assertEqual(self.backend.content, "bb")
+        self.assertEqual(self.backend.seen, ["aaaaaaaaaaaa", "bb"])
+
+    def test_timed_clear(self):
+        self.copy("secreto")
+        self.assertTrue(self.clipboard.pending_clear)
+        self.timers.advance(29_999)
+        self.assertEqual(self.backend.content, "secreto")
+        self.timers.advance(1)
+        self.assertEqual(self.backend.content, "")
+        self.assertFalse(self.clipboard.pending_clear)
+
+    def test_clear_only_if_unchanged(self):
+        self.copy("secreto")
+        # Otra aplicación copia algo después
+        self.backend.content = "de otra aplicación"
+        self.timers.advance(30_000)
+        self.assertEqual(self.backend.content, "de otra aplicación")
+
+    def test_new_copy_restarts_timer(self):
+        self.copy("uno")
+        self.timers.advance(20_000)
+        self.copy("dos")
+        self.timers.advance(20_000)
+        self.assertEqual(self.backend.content, "dos")
+        self.timers.advance(10_000)
+        self.assertEqual(self.backend.content, "")
+
+    def test_close_clears_pending(self):
+        self.copy("secreto")
+        self.clipboard.close()
+        self.assertEqual(self.backend.content, "")
+        self.assertFalse(self.clipboard.pending_clear)
+
+
+class ThreadedClipboardTest(unittest.TestCase):
+
+    def make(self, backend):
+        self.timers = FakeTimers()
+        self.posted = queue.Queue()
+        clipboard = Clipboard(backend, self.timers.schedule, self.timers.cancel,
+                              post=lambda func, *args: self.posted.put((func, args)),
+                              clear_after=30)
+        self.addCleanup(clipboard.close)
+        return clipboard
+
+    def deliver(self):
+        """Ejecuta lo que el hilo del backend entregó a la interfaz"""
+        func, args = self.posted.get(timeout=2)
+        func(*args)
+
+    def wait_idle(self, clipboard):
+        deadline = time.monotonic() + 2
+        while clipboard._worker.busy and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def test_copy_and_timed_clear(self):
+        backend = StubThreadedBackend()
+        clipboard = self.make(backend)
+        results = []
+        clipboard.copy("secreto", lambda ok, error: results.append(ok))
+        self.deliver()
+        self.assertEqual(results, [True])
+        self.assertEqual(backend.content, "secreto")
+        self.timers.advance(30_000)
+        self.wait_idle(clipboard)
+        self.assertEqual(backend.content, "")
+
+    def test_clear_only_if_unchanged(self):
+        backend = StubThreadedBackend()
+        clipboard = self.make(backend)
+        clipboard.copy("secreto")
+        self.deliver()
+        backend.content = "de otra aplicación"
+        self.timers.advance(30_000)
+        self.wait_idle(clipboard)
+        self.assertEqual(backend.content, "de otra aplicación")
+
+    def test_failed_clear_is_ignored(self):
+        backend = StubThreadedBackend(fail_clear=True)
+        backend.content = "secreto"
+        clipboard = self.make(backend)
+        # Un borrado no lleva id ni on_done: no debe intentar avisar a nadie
+        clipboard._run(Job(1, {"op": "clear", "digest": _digest("secreto")}))
+        self.assertTrue(self.posted.empty())
+
+    def test_failed_clear_keeps_worker_alive(self):
+        backend = StubThreadedBackend(fail_clear=True)
+        clipboard = self.make(backend)
+        clipboard.copy("uno")
+        self.deliver()
+        self.timers.advance(30_000)
+        self.wait_idle(clipboard)
+        # El hilo sigue atendiendo copias después del fallo
+        results = []
+        clipboard.copy("dos", lambda ok, error: results.append(ok))
+        self.deliver()
+        self.assertEqual(results, [True])
+        self.assertEqual(backend.content, "dos")
+        self.assertTrue(self.posted.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
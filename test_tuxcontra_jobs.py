@@ -0,0 +1,84 @@
+"""
+Pruebas del planificador de generación de TuxContra (sin pantalla)
+
+    python -m unittest test_tuxcontra_jobs
+"""
+
+import threading
+import unittest
+
+from tuxcontra_jobs import GenerationScheduler, UIChannel
+
+
+class SchedulerErrorTests(unittest.TestCase):
+    """Un trabajo que lanza una excepción se notifica a la interfaz"""
+
+    def setUp(self):
+        self.channel = UIChannel()
+        self.failed = []
+        self.done = threading.Event()
+
+        def run(job):
+            if job.request == "falla":
+                raise OSError("disco lleno")
+            self.channel.post_call(self.finished.append, job)
+            self.done.set()
+
+        def on_error(job, error):
+            self.channel.post_call(self.failed.append, (job, error))
+            self.done.set()
+
+        self.finished = []
+        self.scheduler = GenerationScheduler(run, debounce=0.0, on_error=on_error)
+
+    def tearDown(self):
+        self.assertTrue(self.scheduler.close(timeout=2.0))
+
+    def deliver(self):
+        """Espera al trabajo y ejecuta lo publicado, como el bucle de la interfaz"""
+        self.assertTrue(self.done.wait(2.0))
+        self.done.clear()
+        _, calls = self.channel.drain()
+        for func, args in calls:
+            func(*args)
+
+    def test_error_reaches_the_ui_channel(self):
+        job = self.scheduler.submit("falla")
+        self.deliver()
+        self.assertEqual(len(self.failed), 1)
+        failed_job, error = self.failed[0]
+        self.assertIs(failed_job, job)
+        self.assertIsInstance(error, OSError)
+        self.assertTrue(self.scheduler.is_current(failed_job))
+
+    def test_worker_keeps_running_after_an_error(self):
+        self.scheduler.submit("falla")
+        self.deliver()
+        job = self.scheduler.submit("bien")
+        self.deliver()
+        self.assertEqual(self.finished, [job])
+
+    def test_error_of_a_replaced_job_is_stale(self):
+        job = self.scheduler.submit("falla")
+        self.deliver()
+        self.scheduler.submit("bien")
+        self.deliver()
+        failed_job, _ = self.failed[0]
+        self.assertIs(failed_job, job)
+        self.assertFalse(self.scheduler.is_current(failed_job))
+
+    def test_without_on_error_the_exception_is_only_logged(self):
+        ran = threading.Event()
+
+        def run(job):
+            ran.set()
+            raise ValueError("plantilla no válida")
+
+        scheduler = GenerationScheduler(run, debounce=0.0)
+        scheduler.submit("x")
+        self.assertTrue(ran.wait(2.0))
+        self.assertTrue(scheduler.close(timeout=2.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
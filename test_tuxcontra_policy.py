@@ -0,0 +1,141 @@
+"""
+Pruebas de las políticas de TuxContra (conteo exacto y los tres caminos de lotes)
+
+    python -m unittest test_tuxcontra_policy
+"""
+
+import unittest
+from itertools import product
+from unittest import mock
+
+from tuxcontra_engine import build_charset
+from tuxcontra_entropy import randbytes
+from tuxcontra_policy import _Plan, compile_policy, parse_policy, violations
+
+FULL = build_charset()
+
+# Alfabetos diminutos: se pueden enumerar todas las contraseñas
+TINY = [
+    ("ab1!", "min-digits=1,min-symbols=1", 4),
+    ("ab1!", "max-repeat=1,start=letter", 4),
+    ("ab1!", "min-lower=2,max-repeat=2,exclude=b", 5),
+    ("ab1!", "min-digits=1,min-symbols=1,max-repeat=1,start=letter", 5),
+    # Fuera de latin-1: sin tablas de bloques
+    ("αβ1!", "min-digits=1,max-repeat=1", 4),
+    ("αβ1!", "min-digits=2", 4),
+]
+
+# Sorteos por camino; con menos de 120 válidas salen todas casi seguro
+DRAWS = 3000
+
+
+def brute_force(charset, policy, length):
+    """Todas las contraseñas del alfabeto que cumplen la política"""
+    return {"".join(chars) for chars in product(charset, repeat=length)
+            if not violations("".join(chars), policy, charset)}
+
+
+class CountTest(unittest.TestCase):
+    """El conteo por programación dinámica coincide con la enumeración"""
+
+    def test_total_matches_brute_force(self):
+        for charset, rules, length in TINY:
+            with self.subTest(charset=charset, rules=rules):
+                policy = parse_policy(rules)
+                plan = compile_policy(policy, charset, length)
+                self.assertEqual(plan.total, len(brute_force(charset, policy, length)))
+
+    def test_unrank_is_a_bijection(self):
+        for charset, rules, length in TINY:
+            with self.subTest(charset=charset, rules=rules):
+                policy = parse_policy(rules)
+                plan = compile_policy(policy, charset, length)
+                ranked = [plan.unrank(rank) for rank in range(plan.total)]
+                self.assertEqual(len(set(ranked)), plan.total)
+                self.assertEqual(set(ranked), brute_force(charset, policy, length))
+
+    def test_entropy_is_log2_of_total(self):
+        plan = compile_policy(parse_policy("min-digits=1,min-symbols=1"), "ab1!", 4)
+        self.assertAlmostEqual(2 ** plan.entropy(), plan.total)
+
+
+class PathsTest(unittest.TestCase):
+    """Cada camino de generate_many da solo contraseñas válidas, y todas"""
+
+    def check(self, plan, passwords, policy, charset, valid=None):
+        self.assertEqual(len(passwords), DRAWS)
+        for password in passwords:
+            self.assertEqual(len(password), plan.length)
+            self.assertEqual(violations(password, policy, charset), [], password)
+        if valid is not None:
+            self.assertEqual(set(passwords), valid)
+
+    def test_tiny_alphabets_on_every_path(self):
+        layouts_used = 0
+        for charset, rules, length in TINY:
+            policy = parse_policy(rules)
+            valid = brute_force(charset, policy, length)
+            plan = _Plan(policy, charset, length)
+            with self.subTest(charset=charset, rules=rules, path="filter"):
+                self.check(plan, plan._filter_many(DRAWS, randbytes),
+                           policy, charset, valid)
+            with self.subTest(charset=charset, rules=rules, path="unrank"):
+                self.check(plan, plan._unrank_many(DRAWS, randbytes),
+                           policy, charset, valid)
+            plan._layouts = plan._compile_layouts()
+            if plan._layouts:
+                layouts_used += 1
+                with self.subTest(charset=charset, rules=rules, path="layout"):
+                    self.check(plan, plan._layout_many(DRAWS, randbytes),
+                               policy, charset, valid)
+        self.assertGreater(layouts_used, 0)
+
+    def test_generate_many_picks_each_path(self):
+        cases = [
+            # Casi todas cumplen: descarte
+            (FULL, "min-digits=1", 16, "_filter_many"),
+            # Estricta: bloques de tipos
+            (FULL, "min-lower=3,min-upper=3,min-digits=3,min-symbols=3,max-repeat=1",
+             16, "_layout_many"),
+            # Estricta y fuera de latin-1: desenrollar
+            ("αβγδεζηθ0123456789!", "min-digits=3,min-symbols=3,max-repeat=1",
+             16, "_unrank_many"),
+        ]
+        for charset, rules, length, path in cases:
+            with self.subTest(rules=rules, path=path):
+                policy = parse_policy(rules)
+                plan = _Plan(policy, charset, length)
+                with mock.patch.object(plan, path, wraps=getattr(plan, path)) as spy:
+                    passwords = plan.generate_many(DRAWS)
+                spy.assert_called()
+                self.check(plan, passwords, policy, charset)
+
+    def test_single_generate_is_valid(self):
+        policy = parse_policy("min-digits=2,min-symbols=1,no-ambiguous,max-repeat=2,"
+                              "start=letter")
+        plan = compile_policy(policy, FULL, 12)
+        for _ in range(200):
+            self.assertEqual(violations(plan.generate(), policy, FULL), [])
+
+
+class ImpossibleTest(unittest.TestCase):
+    """Las políticas que ninguna contraseña cumple se rechazan al compilar"""
+
+    def test_impossible_policies(self):
+        cases = [
+            ("ab1!", "min-digits=5", 4),
+            # Los dos dígitos tendrían que ir seguidos
+            ("a1", "min-digits=2,max-repeat=1", 2),
+            ("ab1!", "min-upper=1", 4),
+            ("ab1!", "exclude=ab1!", 4),
+            ("ab1!", "start=upper", 4),
+            (FULL, "min-digits=1", 300),
+        ]
+        for charset, rules, length in cases:
+            with self.subTest(rules=rules, length=length):
+                with self.assertRaises(ValueError):
+                    compile_policy(parse_policy(rules), charset, length)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Pruebas del modo reproducible de TuxContra (valores conocidos y acceso directo)
+
+    python -m unittest test_tuxcontra_seeded
+"""
+
+import unittest
+
+from tuxcontra_policy import parse_policy
+from tuxcontra_seeded import (KNOWN_ANSWERS, STREAM_ANSWERS, TEMPLATE_ANSWERS, _ALL,
+                              CounterStream, batch_context, derive_key, iter_passwords,
+                              line_block, password_at, self_test)
+
+
+class KnownAnswersTest(unittest.TestCase):
+
+    def test_stream_answers(self):
+        for seed, context, index, expected in STREAM_ANSWERS:
+            with self.subTest(context=context, index=index):
+                stream = CounterStream(derive_key(seed, context), index)
+                self.assertEqual(stream(len(expected) // 2).hex(), expected)
+
+    def test_stream_continues_between_calls(self):
+        seed, context, index, expected = STREAM_ANSWERS[0]
+        stream = CounterStream(derive_key(seed, context), index)
+        # Trozos que no coinciden con los bloques de 64 bytes
+        got = b"".join(stream(n) for n in (1, 63, 2, 14))
+        self.assertEqual(got.hex(), expected)
+
+    def test_known_answers(self):
+        for seed, length, charset, rules, index, expected in KNOWN_ANSWERS:
+            with self.subTest(length=length, rules=rules, index=index):
+                policy = parse_policy(rules) if rules else None
+                key = derive_key(seed, batch_context(length, charset, policy))
+                self.assertEqual(password_at(key, index, length, charset, policy), expected)
+
+    def test_template_answers(self):
+        for seed, template, index, expected in TEMPLATE_ANSWERS:
+            with self.subTest(template=template, index=index):
+                key = derive_key(seed, batch_context(0, "", template=template))
+                self.assertEqual(password_at(key, index, 0, "", template=template), expected)
+
+    def test_self_test_passes(self):
+        self.assertEqual(self_test(), [])
+
+
+class RandomAccessTest(unittest.TestCase):
+    """password_at(i) da lo mismo que la posición i de un lote secuencial"""
+
+    START = 1000
+    COUNT = 200
+
+    def check(self, length, charset, policy=None, template=None):
+        key = derive_key("tuxcontra-test", batch_context(length, charset, policy, template))
+        batch = list(iter_passwords(key, self.START, self.COUNT, length, charset, policy,
+                                    template=template))
+        self.assertEqual(len(batch), self.COUNT)
+        for offset in (0, 1, 57, self.COUNT - 1):
+            index = self.START + offset
+            self.assertEqual(password_at(key, index, length, charset, policy, template),
+                             batch[offset])
+        # Un bloque que empieza a mitad del lote coincide con su tramo
+        block = line_block(key, self.START + 50, 20, length, charset, policy, template)
+        self.assertEqual(block.decode("utf-8").split("\n")[:-1], batch[50:70])
+
+    def test_plain(self):
+        self.check(16, _ALL)
+
+    def test_wide_alphabet(self):
+        self.check(8, "αβγδεζηθ")
+
+    def test_policy(self):
+        self.check(20, _ALL, parse_policy("min-digits=2,min-symbols=2,max-repeat=2"))
+
+    def test_template(self):
+        self.check(0, "", template="Cvcc-dddd-ssss")
+
+    def test_keys_depend_on_context(self):
+        key = derive_key("tuxcontra-test", batch_context(16, _ALL))
+        self.assertNotEqual(key, derive_key("tuxcontra-test", batch_context(17, _ALL)))
+        self.assertNotEqual(key, derive_key("tuxcontra-otra", batch_context(16, _ALL)))
+
+
+if __name__ == "__main__":
+    unittest.main()
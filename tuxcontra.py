@@ -1,29 +1,49 @@
+import sys
+import time
+
+# Instante de arranque (para --startup-profile)
+_INICIO = time.perf_counter()
+# Con --startup-profile también se detalla la búsqueda del icono
+STARTUP_PROFILE = "--startup-profile" in sys.argv[1:]
+
+# ============================================================================
+# MODO CONSOLA (se despacha antes de importar tkinter y pyperclip)
+# ============================================================================
+
+if __name__ == "__main__":
+    from tuxcontra_cli import wants_cli, main as cli_main
+    if wants_cli(sys.argv[1:]):
+        sys.exit(cli_main(sys.argv[1:]))
+
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, filedialog
-import random
-import string
-import pyperclip
-import hashlib
-import json
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import os
-import sys
-import math
 from datetime import datetime
 import threading
-import time
+
+from tuxcontra_clipboard import Clipboard, PyperclipClipboard, TkClipboard
+from tuxcontra_dedup import DigestIndex, password_digest
+from tuxcontra_diceware import load_wordlist, passphrase, passphrase_entropy
+from tuxcontra_engine import build_charset, generate
+from tuxcontra_history import HistoryEntry, HistoryJournal, HistoryStore, visible_window
+from tuxcontra_metrics import metrics
+from tuxcontra_strength import analyze, strength_label, theoretical_entropy
+from tuxcontra_jobs import CancelToken, GenerationScheduler, UIChannel
 
 # ============================================================================
 # CONFIGURACIÓN DE RUTAS PARA EL ICONO
 # ============================================================================
 
-def encontrar_icono():
+def encontrar_icono(verbose=STARTUP_PROFILE):
     """
     Busca el icono en todas las ubicaciones posibles
     Retorna la ruta del icono encontrado o None si no se encuentra
+    verbose detalla la búsqueda (con --startup-profile)
     """
-    print("\n" + "="*60)
-    print("BUSCANDO ICONO PARA TUXCONTRA")
-    print("="*60)
+    if verbose:
+        print("\n" + "="*60)
+        print("BUSCANDO ICONO PARA TUXCONTRA")
+        print("="*60)
     
     # Lista completa de posibles ubicaciones (en orden de prioridad)
     posibles_rutas = []
@@ -91,31 +111,27 @@ def encontrar_icono():
     # Combinar todas las rutas
     todas_rutas = rutas_especificas + posibles_rutas
     
-    print(f"Verificando {len(todas_rutas)} ubicaciones posibles...\n")
+    if verbose:
+        print(f"Verificando {len(todas_rutas)} ubicaciones posibles...\n")
     
-    # Verificar cada ruta
-    encontrados = []
+    # Verificar cada ruta (se usa la primera que exista)
     for i, ruta in enumerate(todas_rutas, 1):
         if os.path.exists(ruta):
-            tamano = os.path.getsize(ruta)
-            print(f"✅ [{i}] ENCONTRADO: {ruta}")
-            print(f"   Tamaño: {tamano:,} bytes")
-            encontrados.append(ruta)
-        else:
-            print(f"   [{i}] No existe: {ruta}")
-    
-    if encontrados:
-        print(f"\n✨ Se encontraron {len(encontrados)} iconos válidos.")
-        print(f"📌 Usando el primero: {encontrados[0]}")
-        return encontrados[0]
-    else:
-        print("\n❌ No se encontró ningún icono.")
-        print("💡 Sugerencias:")
-        print("   1. Asegúrate de que el archivo .ico existe")
-        print("   2. Verifica que el nombre sea correcto")
-        print("   3. Colócalo en la misma carpeta que este script")
-        print("   4. O en una carpeta llamada 'Icons' dentro de esa carpeta")
+            if verbose:
+                tamano = os.path.getsize(ruta)
+                print(f"✅ [{i}] ENCONTRADO: {ruta}")
+                print(f"   Tamaño: {tamano:,} bytes")
+            return ruta
+    
+    print("\n❌ No se encontró ningún icono.")
+    if not verbose:
         return None
+    print("💡 Sugerencias:")
+    print("   1. Asegúrate de que el archivo .ico existe")
+    print("   2. Verifica que el nombre sea correcto")
+    print("   3. Colócalo en la misma carpeta que este script")
+    print("   4. O en una carpeta llamada 'Icons' dentro de esa carpeta")
+    return None
 
 def crear_icono_simple():
     """
@@ -172,10 +188,45 @@ def crear_icono_simple():
         print(f"⚠ Error creando icono: {e}")
         return None
 
-def establecer_icono_ventana(root):
+# Marca de la caché cuando no hay icono (seguida de la clave de validez)
+SIN_ICONO = "#sin-icono"
+
+def clave_sin_icono():
     """
-    Establece el icono de la ventana principal
+    Clave que invalida la marca "sin icono": cambia al actualizar el script
+    o al añadir archivos a su carpeta, a la actual o a sus carpetas Icons
     """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    current_dir = os.getcwd()
+    rutas = [os.path.abspath(__file__), script_dir, os.path.join(script_dir, "Icons"),
+             current_dir, os.path.join(current_dir, "Icons")]
+    partes = []
+    for ruta in rutas:
+        try:
+            partes.append(str(os.stat(ruta).st_mtime_ns))
+        except OSError:
+            partes.append("0")
+    return "-".join(partes)
+
+def resolver_icono(data_dir):
+    """
+    Retorna la ruta del icono usando la caché del directorio de datos
+    Solo se vuelve a buscar si el archivo guardado ya no existe o, si la
+    última búsqueda no encontró nada, cuando cambia clave_sin_icono()
+    """
+    cache_path = os.path.join(data_dir, "tuxcontra_icon.txt")
+    
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            icono_path = f.read().strip()
+        if icono_path.startswith(SIN_ICONO):
+            if icono_path[len(SIN_ICONO):].strip() == clave_sin_icono():
+                return None
+        elif icono_path and os.path.exists(icono_path):
+            return icono_path
+    except OSError:
+        pass
+    
     # Primero buscar icono existente
     icono_path = encontrar_icono()
     
@@ -183,10 +234,25 @@ def establecer_icono_ventana(root):
         # Si no se encuentra, crear uno simple
         icono_path = crear_icono_simple()
     
+    try:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            # Sin icono también se guarda, para no repetir la búsqueda
+            f.write(icono_path or f"{SIN_ICONO} {clave_sin_icono()}")
+    except OSError as e:
+        print(f"⚠ No se pudo guardar la caché del icono: {e}")
+    
+    return icono_path
+
+def establecer_icono_ventana(root, data_dir):
+    """
+    Establece el icono de la ventana principal
+    """
+    icono_path = resolver_icono(data_dir)
+    
     if icono_path:
         try:
             root.iconbitmap(icono_path)
-            print(f"\n🎯 Icono establecido exitosamente: {icono_path}")
+            print(f"🎯 Icono establecido: {icono_path}")
             return True
         except Exception as e:
             print(f"\n⚠ Error al establecer icono: {e}")
@@ -239,6 +305,254 @@ def instalar_dependencias():
                 return False
     return True
 
+_pyperclip = None
+
+def cargar_pyperclip():
+    """
+    Importa pyperclip la primera vez que se necesita
+    Retorna el módulo o None si no está disponible
+    """
+    global _pyperclip
+    if _pyperclip is None:
+        try:
+            import pyperclip
+        except ImportError:
+            if not instalar_dependencias():
+                return None
+            try:
+                import pyperclip
+            except ImportError:
+                return None
+        _pyperclip = pyperclip
+    return _pyperclip
+
+def crear_backend_portapapeles(root):
+    """
+    Portapapeles de Tk (sin procesos externos); TUXCONTRA_CLIPBOARD=pyperclip
+    fuerza pyperclip, que mantiene el contenido después de cerrar la aplicación
+    """
+    if os.environ.get("TUXCONTRA_CLIPBOARD") == "pyperclip":
+        return PyperclipClipboard(cargar_pyperclip)
+    return TkClipboard(root)
+
+# ============================================================================
+# LISTA VIRTUAL DEL HISTORIAL
+# ============================================================================
+
+class VirtualHistoryList:
+    """
+    Lista del historial sobre un Canvas que solo crea las filas visibles
+    
+    Las filas se crean una vez (tantas como caben en pantalla) y al
+    desplazarse se reutilizan con los datos de otras entradas, así que el
+    coste de redibujar no depende del tamaño del historial.
+    """
+    
+    ROW_HEIGHT = 58
+    
+    def __init__(self, canvas, scrollbar, get_entries, on_copy, colors):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.get_entries = get_entries
+        self.on_copy = on_copy
+        self.bg, self.fg, self.accent, self.button = colors
+        self.rows = []
+        self.top = 0
+        self.width = 1
+        
+        scrollbar.config(command=self.on_scrollbar)
+        canvas.bind("<Configure>", self.on_resize)
+        self.bind_wheel(canvas)
+        
+        # Mensaje para el historial vacío
+        self.empty_label = tk.Label(canvas,
+                                    text="No hay historial aún.\nGenera algunas contraseñas primero.",
+                                    font=('Arial', 12), bg=self.bg, fg='#95a5a6', pady=20)
+        self.empty_window = canvas.create_window(0, 0, window=self.empty_label,
+                                                 anchor=tk.NW, state='hidden')
+    
+    def bind_wheel(self, widget):
+        """Conecta la rueda del ratón (Windows/macOS y Linux)"""
+        widget.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self.scroll(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll(1))
+    
+    def visible_count(self):
+        """Filas necesarias para cubrir la altura actual"""
+        return max(1, self.canvas.winfo_height() // self.ROW_HEIGHT + 1)
+    
+    def create_row(self, slot):
+        """Crea una fila del conjunto reutilizable"""
+        frame = tk.Frame(self.canvas, bg=self.bg)
+        
+        time_frame = tk.Frame(frame, bg=self.bg)
+        time_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5)
+        date_label = tk.Label(time_frame, font=('Arial', 8), bg=self.bg, fg='#95a5a6')
+        date_label.pack()
+        time_label = tk.Label(time_frame, font=('Arial', 10, 'bold'), bg=self.bg, fg=self.fg)
+        time_label.pack()
+        
+        info_frame = tk.Frame(frame, bg=self.bg)
+        info_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5)
+        info_label = tk.Label(info_frame, font=('Arial', 9), bg=self.bg,
+                              fg=self.accent, justify=tk.RIGHT)
+        info_label.pack(pady=2)
+        copy_btn = tk.Button(info_frame, text="📋 Copiar", font=('Arial', 8),
+                             bg=self.button, fg=self.fg, relief=tk.RAISED,
+                             bd=1, padx=5, pady=1)
+        copy_btn.pack()
+        
+        pwd_label = tk.Label(frame, font=('Courier New', 9), bg=self.bg, fg=self.fg,
+                             anchor=tk.W, justify=tk.LEFT)
+        pwd_label.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10)
+        
+        row = {
+            "frame": frame, "date": date_label, "time": time_label,
+            "info": info_label, "password": pwd_label, "button": copy_btn,
+            "entry": None,
+        }
+        copy_btn.config(command=lambda: self.on_copy(row["entry"].password,
+                                                     row["entry"].entropy)
+                        if row["entry"] else None)
+        for widget in (frame, time_frame, date_label, time_label, info_frame,
+                       info_label, pwd_label):
+            self.bind_wheel(widget)
+        
+        row["window"] = self.canvas.create_window(0, slot * self.ROW_HEIGHT, window=frame,
+                                                  anchor=tk.NW, width=self.width,
+                                                  height=self.ROW_HEIGHT)
+        return row
+    
+    def fill_row(self, row, entry):
+        """Muestra una entrada en una fila (solo si ha cambiado)"""
+        if entry is None:
+            if row["entry"] is not None:
+                self.canvas.itemconfigure(row["window"], state='hidden')
+                row["entry"] = None
+            return
+        if entry.same(row["entry"]):
+            return
+        if row["entry"] is None:
+            self.canvas.itemconfigure(row["window"], state='normal')
+        row["entry"] = entry
+        row["date"].config(text=entry.date)
+        row["time"].config(text=entry.timestamp)
+        row["password"].config(text=entry.display)
+        row["info"].config(text=entry.info)
+    
+    def refresh(self):
+        """Vuelve a asociar las filas visibles con las entradas"""
+        entries = self.get_entries()
+        total = len(entries)
+        visible = self.visible_count()
+        
+        while len(self.rows) < visible:
+            self.rows.append(self.create_row(len(self.rows)))
+        
+        self.top, shown = visible_window(entries, self.top, visible, len(self.rows))
+        for row, entry in zip(self.rows, shown):
+            self.fill_row(row, entry)
+        
+        self.canvas.itemconfigure(self.empty_window, state='hidden' if total else 'normal')
+        
+        if total:
+            first = self.top / total
+            last = min(1.0, (self.top + visible - 1) / total)
+            self.scrollbar.set(first, last)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def on_insert(self):
+        """Se añadió una entrada al principio de la lista"""
+        # Si el usuario está desplazado, la vista se mantiene en las mismas filas
+        if self.top > 0:
+            self.top += 1
+        self.refresh()
+    
+    def scroll(self, rows):
+        """Desplaza la vista un número de filas"""
+        self.top += rows
+        self.refresh()
+    
+    def on_scrollbar(self, action, *args):
+        """Comando de la barra de desplazamiento"""
+        total = len(self.get_entries())
+        if action == 'moveto':
+            self.top = int(float(args[0]) * total)
+        elif action == 'scroll':
+            step = int(args[0])
+            if args[1] == 'pages':
+                step *= max(1, self.visible_count() - 1)
+            self.top += step
+        self.refresh()
+    
+    def on_resize(self, event):
+        """Ajusta el ancho de las filas y crea las que falten"""
+        self.width = event.width
+        for row in self.rows:
+            self.canvas.itemconfigure(row["window"], width=event.width)
+            row["password"].config(wraplength=max(100, event.width - 220))
+        self.canvas.itemconfigure(self.empty_window, width=event.width)
+        self.refresh()
+
+# ============================================================================
+# VISTA POR VENTANAS DE LA CONTRASEÑA
+# ============================================================================
+
+class PasswordView:
+    """
+    Muestra la contraseña en un tk.Text sin guardarla en el widget
+    
+    La contraseña vive en self.password; en el widget solo se insertan
+    líneas de ancho fijo por lotes, y el siguiente lote se añade cuando el
+    usuario se acerca al final. Copiar y guardar leen self.password.
+    """
+    
+    LINE_WIDTH = 64
+    BATCH_LINES = 200
+    
+    def __init__(self, text_widget, yscroll_set):
+        self.text = text_widget
+        self.password = ""
+        self.rendered = 0
+        self.pending = False
+        self.yscroll_set = yscroll_set
+        text_widget.config(yscrollcommand=self.on_yscroll)
+    
+    def set_password(self, password):
+        """Sustituye la contraseña mostrada"""
+        self.password = password
+        self.rendered = 0
+        self.text.config(state='normal')
+        self.text.delete(1.0, tk.END)
+        self.text.config(state='disabled')
+        self.render_more()
+    
+    def render_more(self):
+        """Inserta el siguiente lote de líneas"""
+        self.pending = False
+        total = len(self.password)
+        if self.rendered >= total:
+            return
+        width = self.LINE_WIDTH
+        end = min(total, self.rendered + width * self.BATCH_LINES)
+        chunk = self.password[self.rendered:end]
+        text = "\n".join(chunk[i:i + width] for i in range(0, len(chunk), width))
+        if self.rendered:
+            text = "\n" + text
+        self.text.config(state='normal')
+        self.text.insert(tk.END + "-1c", text)
+        self.text.config(state='disabled')
+        self.rendered = end
+    
+    def on_yscroll(self, first, last):
+        """Sincroniza la barra y carga más líneas cerca del final"""
+        self.yscroll_set(first, last)
+        if (float(last) > 0.9 and self.rendered < len(self.password)
+                and not self.pending):
+            self.pending = True
+            self.text.after_idle(self.render_more)
+
 # ============================================================================
 # CLASE PRINCIPAL TUXCONTRA
 # ============================================================================
@@ -257,8 +571,11 @@ class TuxContra:
         # Crear interfaz
         self.create_widgets()
         
-        # Generar primera contraseña
-        self.generate_password()
+        # Vaciar el canal de los hilos de generación a ritmo fijo
+        self.root.after(self.FRAME_MS, self.poll_ui_channel)
+        
+        # Generar primera contraseña (vista previa, no va al historial)
+        self.generate_password(commit=False)
     
     def setup_window(self):
         """Configura la ventana principal"""
@@ -267,15 +584,15 @@ class TuxContra:
         self.root.configure(bg='#2c3e50')
         self.root.resizable(True, True)
         
-        # Establecer icono
-        establecer_icono_ventana(self.root)
-        
-        # Centrar ventana
-        self.center_window()
-        
         # Directorio de datos
         self.data_dir = get_app_data_dir()
         print(f"📁 Directorio de datos: {self.data_dir}")
+        
+        # Establecer icono (ruta en caché en el directorio de datos)
+        establecer_icono_ventana(self.root, self.data_dir)
+        
+        # Centrar ventana
+        self.center_window()
     
     def center_window(self):
         """Centra la ventana en la pantalla"""
@@ -299,14 +616,51 @@ class TuxContra:
         
         # Control de generación
         self.generating = False
-        self.stop_generation = False
         
-        # Conjunto de contraseñas generadas
-        self.generated_passwords = set()
-        
-        # Historial
-        self.password_history = []
-        self.history_file = os.path.join(self.data_dir, "tuxcontra_history.json")
+        # Archivo de clave en curso (hilo y token de cancelación)
+        self.keyfile_worker = None
+        self.keyfile_token = CancelToken()
+        
+        # Canal hilo -> interfaz (progreso fusionado y resultados)
+        self.ui_channel = UIChannel()
+        self.FRAME_MS = 16
+        self.GENERATION_BLOCK = 65536
+        
+        # Un solo hilo de generación; los cambios de controles se agrupan
+        self.scheduler = GenerationScheduler(
+            self.generate_password_thread, debounce=0.15,
+            on_error=lambda job, error: self.ui_channel.post_call(
+                self.fail_password_generation, job, error))
+        
+        # Portapapeles sin bloqueos; se borra solo a los CLIPBOARD_CLEAR_S segundos
+        self.CLIPBOARD_CLEAR_S = 30
+        self.clipboard = Clipboard(crear_backend_portapapeles(self.root),
+                                   schedule=self.root.after, cancel=self.root.after_cancel,
+                                   post=self.ui_channel.post_call,
+                                   clear_after=self.CLIPBOARD_CLEAR_S)
+        
+        # La contraseña mostrada ya está en el historial
+        self.current_committed = False
+        self.current_entropy = 0.0
+        
+        # Panel de diagnóstico (Ctrl+Shift+D), abierto bajo demanda
+        self.diagnostics_window = None
+        
+        # Índice persistente de contraseñas generadas (todas las sesiones)
+        self.MAX_DUPLICATE_RETRIES = 3
+        self.generated_passwords = self.open_digest_index()
+        
+        # Corpus local de filtraciones (TUXCONTRA_BREACH_CORPUS, opcional)
+        self.breach_corpus = self.open_breach_corpus()
+        
+        # Historial (diario JSON Lines; el límite de 20 se aplica al leer y
+        # al compactar; TUXCONTRA_HISTORY_LIMIT lo cambia)
+        self.HISTORY_LIMIT = self.read_history_limit()
+        self.history_store = HistoryStore()
+        self.history_file = os.path.join(self.data_dir, "tuxcontra_history.jsonl")
+        self.history_journal = HistoryJournal(
+            self.history_file, limit=self.HISTORY_LIMIT,
+            legacy_path=os.path.join(self.data_dir, "tuxcontra_history.json"))
         self.load_history()
         
         # Fuentes
@@ -319,6 +673,7 @@ class TuxContra:
         # Variables de control tkinter
         self.password_var = tk.StringVar()
         self.length_var = tk.IntVar(value=16)
+        self.slider_var = tk.IntVar(value=16)
         self.entropy_var = tk.StringVar(value="Bits: --")
         self.status_var = tk.StringVar(value="Listo para generar contraseñas")
         self.progress_var = tk.IntVar(value=0)
@@ -330,9 +685,70 @@ class TuxContra:
         self.digits_var = tk.BooleanVar(value=True)
         self.symbols_var = tk.BooleanVar(value=True)
         
-        # Límites
+        # Modo frase de palabras (diceware); la lista se abre al usarla
+        self.passphrase_var = tk.BooleanVar(value=False)
+        self.words_var = tk.IntVar(value=6)
+        self.wordlist = None
+        # Listas sustituidas que se cierran cuando ningún trabajo las usa
+        self.retired_wordlists = []
+        self.wordlist_source_file = os.path.join(self.data_dir, "tuxcontra_wordlist.txt")
+        self.wordlist_var = tk.StringVar(value=self.describe_saved_wordlist())
+        
+        # Reglas de la política (vacío = sin reglas)
+        self.policy_var = tk.StringVar(value="")
+        # Plantilla de formato fijo (vacío = sin plantilla; tiene prioridad)
+        self.template_var = tk.StringVar(value="")
+        
+        # Límites (el slider llega a SLIDER_MAX; la entrada numérica, a MAX_LENGTH)
         self.MIN_LENGTH = 1
-        self.MAX_LENGTH = 1000
+        self.SLIDER_MAX = 1000
+        self.MAX_LENGTH = 10_000_000
+    
+    def open_digest_index(self):
+        """Abre el índice de duplicados, recreándolo si está dañado"""
+        index_path = os.path.join(self.data_dir, "tuxcontra_seen.bloom")
+        try:
+            return DigestIndex(index_path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Índice de duplicados no válido, se recrea: {e}")
+            try:
+                os.remove(index_path)
+            except OSError:
+                pass
+            return DigestIndex(index_path)
+    
+    def read_history_limit(self, default=20):
+        """
+        Entradas que se conservan en el historial (TUXCONTRA_HISTORY_LIMIT);
+        cada una es una contraseña en claro en el diario, así que por
+        defecto son pocas
+        """
+        value = os.environ.get("TUXCONTRA_HISTORY_LIMIT")
+        if not value:
+            return default
+        try:
+            limit = int(value)
+            if limit < 1:
+                raise ValueError(value)
+        except ValueError:
+            print(f"⚠ TUXCONTRA_HISTORY_LIMIT no válido ({value}); se usan {default}")
+            return default
+        return limit
+    
+    def open_breach_corpus(self):
+        """
+        Abre el corpus de filtraciones de TUXCONTRA_BREACH_CORPUS (texto
+        HASH:veces ordenado o índice binario); None si no hay
+        """
+        path = os.environ.get("TUXCONTRA_BREACH_CORPUS")
+        if not path:
+            return None
+        from tuxcontra_breach import open_corpus
+        try:
+            return open_corpus(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ No se pudo abrir el corpus de filtraciones: {e}")
+            return None
     
     def create_widgets(self):
         """Crea todos los widgets de la interfaz"""
@@ -379,7 +795,7 @@ class TuxContra:
         entropy_label.pack(side=tk.RIGHT, padx=10)
         
         # Subtítulo
-        subtitle_label = tk.Label(parent, text="Generador de Contraseñas de Hasta 1000 Caracteres",
+        subtitle_label = tk.Label(parent, text=f"Generador de Contraseñas de Hasta {self.MAX_LENGTH:,} Caracteres",
                                  font=self.font_subtitle, bg=self.bg_color, fg=self.fg_color)
         subtitle_label.pack(pady=(0, 20))
     
@@ -407,8 +823,8 @@ class TuxContra:
                 bg=self.bg_color, fg=self.fg_color).pack(side=tk.LEFT, padx=(0, 10))
         
         # Slider
-        self.length_slider = tk.Scale(frame, from_=self.MIN_LENGTH, to=self.MAX_LENGTH, 
-                                     orient=tk.HORIZONTAL, variable=self.length_var,
+        self.length_slider = tk.Scale(frame, from_=self.MIN_LENGTH, to=self.SLIDER_MAX, 
+                                     orient=tk.HORIZONTAL, variable=self.slider_var,
                                      length=350, bg=self.secondary_color, fg=self.fg_color,
                                      highlightbackground=self.bg_color,
                                      troughcolor=self.accent_color,
@@ -424,15 +840,16 @@ class TuxContra:
                 bg=self.bg_color, fg=self.fg_color).pack(side=tk.LEFT, padx=(0, 5))
         
         length_entry = tk.Entry(value_frame, textvariable=self.length_var,
-                               width=5, font=self.font_medium, justify=tk.CENTER,
+                               width=9, font=self.font_medium, justify=tk.CENTER,
                                bg=self.secondary_color, fg=self.fg_color,
                                relief=tk.SUNKEN, bd=2)
         length_entry.pack(side=tk.LEFT, padx=(0, 5))
+        length_entry.bind('<Return>', lambda e: self.generate_password())
         
-        # Botón MAX
+        # Botón MAX (máximo del slider; longitudes mayores se escriben a mano)
         tk.Button(value_frame, text="MAX", font=('Arial', 9, 'bold'),
                  bg=self.accent_color, fg=self.fg_color,
-                 command=lambda: self.length_var.set(self.MAX_LENGTH),
+                 command=lambda: self.set_length(self.SLIDER_MAX),
                  padx=5, pady=1).pack(side=tk.LEFT)
     
     def create_chars_control(self, parent):
@@ -447,12 +864,12 @@ class TuxContra:
         tk.Checkbutton(frame1, text="Minúsculas (a-z)", variable=self.lower_var,
                       font=self.font_medium, bg=self.bg_color, fg=self.fg_color,
                       selectcolor=self.secondary_color,
-                      command=self.generate_password).pack(side=tk.LEFT, padx=(0, 20))
+                      command=self.on_charset_change).pack(side=tk.LEFT, padx=(0, 20))
         
         tk.Checkbutton(frame1, text="Mayúsculas (A-Z)", variable=self.upper_var,
                       font=self.font_medium, bg=self.bg_color, fg=self.fg_color,
                       selectcolor=self.secondary_color,
-                      command=self.generate_password).pack(side=tk.LEFT, padx=(0, 20))
+                      command=self.on_charset_change).pack(side=tk.LEFT, padx=(0, 20))
         
         # Segunda fila de checkboxes
         frame2 = tk.Frame(frame, bg=self.bg_color)
@@ -461,18 +878,76 @@ class TuxContra:
         tk.Checkbutton(frame2, text="Números (0-9)", variable=self.digits_var,
                       font=self.font_medium, bg=self.bg_color, fg=self.fg_color,
                       selectcolor=self.secondary_color,
-                      command=self.generate_password).pack(side=tk.LEFT, padx=(0, 20))
+                      command=self.on_charset_change).pack(side=tk.LEFT, padx=(0, 20))
         
         tk.Checkbutton(frame2, text="Símbolos (!@#$%...)", variable=self.symbols_var,
                       font=self.font_medium, bg=self.bg_color, fg=self.fg_color,
                       selectcolor=self.secondary_color,
-                      command=self.generate_password).pack(side=tk.LEFT)
+                      command=self.on_charset_change).pack(side=tk.LEFT)
         
         # Botón seleccionar todo
         tk.Button(frame, text="✓ Seleccionar Todo", font=('Arial', 10),
                  bg=self.secondary_color, fg=self.fg_color,
                  command=self.select_all_chars,
                  padx=10, pady=2).pack(side=tk.RIGHT, pady=(5, 0))
+        
+        # Tercera fila: frase de palabras
+        frame3 = tk.Frame(parent, bg=self.bg_color)
+        frame3.pack(fill=tk.X, pady=(10, 0))
+        
+        tk.Checkbutton(frame3, text="Frase de palabras (diceware)", variable=self.passphrase_var,
+                      font=self.font_medium, bg=self.bg_color, fg=self.fg_color,
+                      selectcolor=self.secondary_color,
+                      command=self.on_charset_change).pack(side=tk.LEFT, padx=(0, 20))
+        
+        tk.Label(frame3, text="Palabras:", font=self.font_medium,
+                bg=self.bg_color, fg=self.fg_color).pack(side=tk.LEFT, padx=(0, 5))
+        
+        tk.Spinbox(frame3, from_=1, to=64, textvariable=self.words_var, width=4,
+                  font=self.font_medium, bg=self.secondary_color, fg=self.fg_color,
+                  command=self.on_charset_change).pack(side=tk.LEFT, padx=(0, 10))
+        
+        tk.Button(frame3, text="📂 Lista...", font=('Arial', 10),
+                 bg=self.secondary_color, fg=self.fg_color,
+                 command=self.choose_wordlist,
+                 padx=10, pady=2).pack(side=tk.LEFT, padx=(0, 10))
+        
+        tk.Label(frame3, textvariable=self.wordlist_var, font=self.font_small,
+                bg=self.bg_color, fg='#95a5a6').pack(side=tk.LEFT)
+        
+        # Cuarta fila: reglas de la política
+        frame4 = tk.Frame(parent, bg=self.bg_color)
+        frame4.pack(fill=tk.X, pady=(10, 0))
+        
+        tk.Label(frame4, text="Reglas:", font=self.font_medium,
+                bg=self.bg_color, fg=self.fg_color).pack(side=tk.LEFT, padx=(0, 5))
+        
+        policy_entry = tk.Entry(frame4, textvariable=self.policy_var, width=45,
+                                font=self.font_small, bg=self.secondary_color,
+                                fg=self.fg_color, insertbackground=self.fg_color)
+        policy_entry.pack(side=tk.LEFT, padx=(0, 10))
+        policy_entry.bind('<Return>', lambda e: self.on_charset_change())
+        policy_entry.bind('<FocusOut>', lambda e: self.on_charset_change())
+        
+        tk.Label(frame4, text="ej. min-digits=2,min-symbols=1,no-ambiguous,max-repeat=2,start=letter",
+                font=self.font_small, bg=self.bg_color, fg='#95a5a6').pack(side=tk.LEFT)
+        
+        # Quinta fila: plantilla de formato fijo
+        frame5 = tk.Frame(parent, bg=self.bg_color)
+        frame5.pack(fill=tk.X, pady=(10, 0))
+        
+        tk.Label(frame5, text="Plantilla:", font=self.font_medium,
+                bg=self.bg_color, fg=self.fg_color).pack(side=tk.LEFT, padx=(0, 5))
+        
+        template_entry = tk.Entry(frame5, textvariable=self.template_var, width=30,
+                                  font=self.font_small, bg=self.secondary_color,
+                                  fg=self.fg_color, insertbackground=self.fg_color)
+        template_entry.pack(side=tk.LEFT, padx=(0, 10))
+        template_entry.bind('<Return>', lambda e: self.on_charset_change())
+        template_entry.bind('<FocusOut>', lambda e: self.on_charset_change())
+        
+        tk.Label(frame5, text="ej. Cvcc-dddd-ssss, La{15}  (l u L d s a x v c h, [abc], {n}, \\X)",
+                font=self.font_small, bg=self.bg_color, fg='#95a5a6').pack(side=tk.LEFT)
     
     def create_password_section(self, parent):
         """Crea la sección para mostrar la contraseña"""
@@ -497,7 +972,6 @@ class TuxContra:
         self.password_text = tk.Text(text_frame, wrap=tk.NONE,
                                     font=self.font_mono, bg=self.secondary_color,
                                     fg='#e74c3c', height=6,
-                                    yscrollcommand=scrollbar_y.set,
                                     xscrollcommand=scrollbar_x.set,
                                     padx=10, pady=10,
                                     insertbackground=self.fg_color,
@@ -508,6 +982,9 @@ class TuxContra:
         scrollbar_y.config(command=self.password_text.yview)
         scrollbar_x.config(command=self.password_text.xview)
         
+        # La contraseña se guarda fuera del widget y se muestra por lotes
+        self.password_view = PasswordView(self.password_text, scrollbar_y.set)
+        
         # Barra de progreso (oculta inicialmente)
         self.progress_bar = ttk.Progressbar(password_frame, variable=self.progress_var,
                                            maximum=100, length=100, mode='determinate')
@@ -549,6 +1026,20 @@ class TuxContra:
                  command=self.save_to_file,
                  padx=20, pady=10, relief=tk.RAISED, bd=3).pack(side=tk.LEFT, padx=(0, 10))
         
+        # Botón Archivo de clave
+        tk.Button(frame, text="🔑 Archivo de clave", 
+                 font=self.font_medium, bg=self.secondary_color,
+                 fg=self.fg_color, activebackground=self.accent_color,
+                 command=self.generate_keyfile,
+                 padx=20, pady=10, relief=tk.RAISED, bd=3).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Botón Exportar Historial
+        tk.Button(frame, text="📤 Exportar", 
+                 font=self.font_medium, bg=self.secondary_color,
+                 fg=self.fg_color, activebackground=self.accent_color,
+                 command=self.export_history,
+                 padx=20, pady=10, relief=tk.RAISED, bd=3).pack(side=tk.LEFT, padx=(0, 10))
+        
         # Botón Limpiar Historial
         tk.Button(frame, text="🗑️ Limpiar", 
                  font=self.font_medium, bg=self.warning_color,
@@ -567,7 +1058,7 @@ class TuxContra:
     
     def create_history_section(self, parent):
         """Crea la sección de historial"""
-        history_frame = tk.LabelFrame(parent, text=" Historial (Últimas 5) ",
+        history_frame = tk.LabelFrame(parent, text=" Historial ",
                                      font=self.font_medium, bg=self.bg_color,
                                      fg=self.fg_color, padx=15, pady=15,
                                      relief=tk.GROOVE, bd=2)
@@ -576,20 +1067,18 @@ class TuxContra:
         # Canvas y scrollbar
         history_canvas = tk.Canvas(history_frame, bg=self.secondary_color,
                                   highlightthickness=0)
-        scrollbar = tk.Scrollbar(history_frame, orient=tk.VERTICAL, 
-                                command=history_canvas.yview)
-        self.history_inner_frame = tk.Frame(history_canvas, bg=self.secondary_color)
-        
-        history_canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar = tk.Scrollbar(history_frame, orient=tk.VERTICAL)
         
         # Empaquetar
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         history_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        history_canvas.create_window((0, 0), window=self.history_inner_frame, anchor=tk.NW)
         
-        # Configurar scroll
-        self.history_inner_frame.bind("<Configure>", 
-            lambda e: history_canvas.configure(scrollregion=history_canvas.bbox("all")))
+        # Lista virtual: solo se crean las filas visibles
+        self.history_list = VirtualHistoryList(
+            history_canvas, scrollbar,
+            get_entries=lambda: self.history_store.newest_first(self.HISTORY_LIMIT),
+            on_copy=self.copy_from_history,
+            colors=(self.secondary_color, self.fg_color, self.accent_color, self.button_color))
         
         # Actualizar historial
         self.update_history_display()
@@ -614,12 +1103,31 @@ class TuxContra:
         self.upper_var.set(True)
         self.digits_var.set(True)
         self.symbols_var.set(True)
-        self.generate_password()
+        self.on_charset_change()
+    
+    def on_charset_change(self):
+        """Cuando cambian los tipos de caracteres (vista previa con antirrebote)"""
+        self.generate_password(commit=False, debounce=True)
     
     def on_length_change(self, value):
-        """Cuando cambia la longitud"""
-        if not self.generating:
-            self.generate_password()
+        """Cuando cambia la longitud (vista previa con antirrebote)"""
+        self.length_var.set(int(float(value)))
+        self.generate_password(commit=False, debounce=True)
+    
+    def set_length(self, length):
+        """Fija la longitud y sincroniza el slider"""
+        self.length_var.set(length)
+        self.slider_var.set(min(length, self.SLIDER_MAX))
+    
+    def get_length(self):
+        """Lee la longitud de la entrada, limitada a [MIN_LENGTH, MAX_LENGTH]"""
+        try:
+            length = int(self.length_var.get())
+        except (tk.TclError, ValueError):
+            length = self.slider_var.get()
+        length = max(self.MIN_LENGTH, min(self.MAX_LENGTH, length))
+        self.set_length(length)
+        return length
     
     def update_stats(self, password):
         """Actualiza las estadísticas"""
@@ -629,106 +1137,224 @@ class TuxContra:
         
         self.stats_var.set(f"Caracteres: {length:,} | Palabras: {words:,} | Líneas: {lines}")
     
-    def calculate_entropy(self):
-        """Calcula la entropía en bits"""
-        charset_size = 0
-        if self.lower_var.get():
-            charset_size += 26
-        if self.upper_var.get():
-            charset_size += 26
-        if self.digits_var.get():
-            charset_size += 10
-        if self.symbols_var.get():
-            charset_size += 32
-        
-        if charset_size == 0:
-            return 0
-        
-        length = self.length_var.get()
-        entropy = math.log2(charset_size ** length)
-        return entropy
+    def current_charset(self):
+        """Alfabeto según los tipos de caracteres marcados"""
+        return build_charset(self.lower_var.get(), self.upper_var.get(),
+                             self.digits_var.get(), self.symbols_var.get())
+    
+    # ========================================================================
+    # FRASES DE PALABRAS
+    # ========================================================================
+    
+    def saved_wordlist_path(self):
+        """Ruta de la última lista de palabras elegida (o None)"""
+        try:
+            with open(self.wordlist_source_file, 'r', encoding='utf-8') as f:
+                path = f.read().strip()
+            return path if path and os.path.exists(path) else None
+        except OSError:
+            return None
+    
+    def describe_saved_wordlist(self):
+        """Texto para la etiqueta de la lista de palabras"""
+        path = self.saved_wordlist_path()
+        return os.path.basename(path) if path else "(sin lista)"
+    
+    def get_wordlist(self):
+        """Abre la lista de palabras la primera vez que se necesita"""
+        if self.wordlist is None:
+            path = self.saved_wordlist_path()
+            if path:
+                self.open_wordlist(path)
+        return self.wordlist
+    
+    def open_wordlist(self, path):
+        """Abre (compilando si hace falta) una lista de palabras"""
+        self.status_var.set("⏳ Preparando lista de palabras...")
+        self.root.update_idletasks()
+        try:
+            wordlist = load_wordlist(path, os.path.join(self.data_dir, "wordlists"))
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            self.status_var.set("✗ Error al abrir la lista de palabras")
+            messagebox.showerror("Error", f"No se pudo abrir la lista:\n{e}")
+            return None
+        if self.wordlist is not None:
+            # La frase en curso podría estar leyendo la lista anterior (su
+            # petición la referencia): se cancela y se cierra al terminar
+            self.scheduler.cancel()
+            self.retired_wordlists.append(self.wordlist)
+            self.close_retired_wordlists()
+        self.wordlist = wordlist
+        self.wordlist_var.set(f"{os.path.basename(path)} ({len(wordlist):,} palabras, "
+                              f"{wordlist.bits_per_word():.1f} bits/palabra)")
+        self.status_var.set("✓ Lista de palabras lista")
+        return wordlist
+    
+    def close_retired_wordlists(self):
+        """Cierra las listas sustituidas cuando el hilo de generación está libre"""
+        if not self.retired_wordlists:
+            return
+        if self.scheduler.busy:
+            self.root.after(self.FRAME_MS, self.close_retired_wordlists)
+            return
+        for wordlist in self.retired_wordlists:
+            wordlist.close()
+        self.retired_wordlists.clear()
+    
+    def choose_wordlist(self):
+        """Elige una lista de palabras (EFF u otra, una por línea)"""
+        path = filedialog.askopenfilename(
+            filetypes=[("Listas de palabras", "*.txt *.idx"), ("Todos los archivos", "*.*")],
+            initialdir=self.data_dir
+        )
+        if not path or not self.open_wordlist(path):
+            return
+        try:
+            with open(self.wordlist_source_file, 'w', encoding='utf-8') as f:
+                f.write(path)
+        except OSError as e:
+            print(f"⚠ No se pudo recordar la lista de palabras: {e}")
+        self.passphrase_var.set(True)
+        self.generate_password(commit=False)
     
     # ========================================================================
     # GENERACIÓN DE CONTRASEÑAS
     # ========================================================================
     
-    def generate_password_thread(self):
-        """Hilo para generar contraseñas largas"""
-        length = self.length_var.get()
-        
-        # Caracteres disponibles
-        chars = ""
-        if self.lower_var.get():
-            chars += string.ascii_lowercase
-        if self.upper_var.get():
-            chars += string.ascii_uppercase
-        if self.digits_var.get():
-            chars += string.digits
-        if self.symbols_var.get():
-            chars += "!@#$%^&*()_+-=[]{}|;:,.<>?/~`"
-        
-        if not chars:
-            self.root.after(0, lambda: self.status_var.set("⚠ Selecciona al menos un tipo de carácter"))
+    def generate_password_thread(self, job):
+        """Genera una contraseña en el hilo del planificador"""
+        started = time.perf_counter()
+        password = self.build_password(job)
+        if password is None:
             return
+        password_hash = password_digest(password)
+        
+        # Rechazar contraseñas ya generadas en cualquier sesión y, con
+        # corpus, las que aparecen en filtraciones (también la última)
+        if self.breach_corpus is not None:
+            from tuxcontra_breach import is_breached
+        retries = duplicates = breached = 0
+        while True:
+            if password_hash in self.generated_passwords:
+                rejected = "duplicate"
+                duplicates += 1
+            elif (self.breach_corpus is not None and
+                    is_breached(self.breach_corpus, password)):
+                rejected = "breached"
+                breached += 1
+            else:
+                rejected = None
+                break
+            if retries >= self.MAX_DUPLICATE_RETRIES or job.token.cancelled:
+                break
+            password = self.build_password(job)
+            if password is None:
+                return
+            password_hash = password_digest(password)
+            retries += 1
         
-        # Generar en bloques
+        if job.token.cancelled:
+            return
+        metrics.inc("duplicate_retries", duplicates)
+        metrics.inc("breach_rejections", breached)
+        if rejected is not None:
+            # No se muestra como nueva una contraseña que no pasó las comprobaciones
+            metrics.inc("generation_rejected")
+            self.ui_channel.post_call(self.reject_password_generation, job, rejected,
+                                      retries + 1)
+            return
+        # Análisis de fortaleza aquí y no en la interfaz (con 10M caracteres
+        # tarda casi un segundo); las frases usan la entropía de la petición
+        report = None
+        if job.request["mode"] != "passphrase":
+            report = analyze(password, len(job.request["chars"]) or None)
+        
+        if not job.token.cancelled:
+            posted = time.perf_counter()
+            metrics.observe("generation", posted - started)
+            self.ui_channel.post_call(self.finish_password_generation, job, password, report,
+                                      posted)
+    
+    def build_password(self, job):
+        """Construye una contraseña según la petición; None si se cancela"""
+        request = job.request
+        if request["mode"] == "passphrase":
+            return passphrase(request["wordlist"], request["words"], request["separator"])
+        if request["mode"] in ("policy", "template"):
+            return request["plan"].generate()
+        
+        length = request["length"]
+        chars = request["chars"]
+        token = job.token
+        
+        # Generar en bloques (permite cancelar y mostrar progreso)
         password_parts = []
-        chunk_size = min(100, length)
-        num_chunks = max(1, length // chunk_size)
-        
-        for chunk in range(num_chunks):
-            if self.stop_generation:
-                break
-            
-            current_chunk_size = chunk_size if chunk < num_chunks - 1 else length % chunk_size
-            if current_chunk_size == 0:
-                current_chunk_size = chunk_size
+        remaining = length
+        while remaining > 0:
+            if token.cancelled:
+                # Cancelada o sustituida por una petición más nueva
+                return
             
-            chunk_password = ''.join(random.choice(chars) for _ in range(current_chunk_size))
-            password_parts.append(chunk_password)
+            chunk_size = min(self.GENERATION_BLOCK, remaining)
+            password_parts.append(generate(chunk_size, chars))
+            remaining -= chunk_size
             
-            # Actualizar progreso
-            progress = ((chunk + 1) / num_chunks) * 100
-            self.root.after(0, lambda p=progress: self.progress_var.set(p))
-            
-            time.sleep(0.01)
-        
-        password = ''.join(password_parts)[:length]
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+            # Actualizar progreso (se fusiona en una actualización por frame)
+            if length > self.GENERATION_BLOCK:
+                self.ui_channel.post_progress((length - remaining) / length * 100)
         
-        self.root.after(0, self.finish_password_generation, password, password_hash)
+        return ''.join(password_parts)
+    
+    def poll_ui_channel(self):
+        """Aplica en la interfaz lo publicado por los hilos de generación"""
+        progress, calls = self.ui_channel.drain()
+        if progress is not None:
+            self.progress_var.set(progress)
+        for func, args in calls:
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error aplicando resultado: {e}")
+        self.root.after(self.FRAME_MS, self.poll_ui_channel)
     
-    def finish_password_generation(self, password, password_hash):
-        """Finaliza la generación"""
-        if password_hash not in self.generated_passwords:
-            self.generated_passwords.add(password_hash)
+    def finish_password_generation(self, job, password, report, posted):
+        """
+        Finaliza la generación (descarta resultados de trabajos antiguos);
+        report es el análisis de fortaleza hecho en el hilo de generación
+        """
+        started = time.perf_counter()
+        metrics.observe("delivery", started - posted)
+        if not self.scheduler.is_current(job):
+            metrics.inc("discarded_results")
+            return
+        metrics.inc("passwords_shown")
         
         # Mostrar contraseña
-        self.password_text.config(state='normal')
-        self.password_text.delete(1.0, tk.END)
-        self.password_text.insert(1.0, password)
-        self.password_text.config(state='disabled')
+        self.password_view.set_password(password)
         
         # Actualizar estadísticas
         self.update_stats(password)
         
-        # Calcular entropía
-        entropy = self.calculate_entropy()
-        if entropy >= 256:
-            color, strength = "#27ae60", "Extremadamente Fuerte"
-        elif entropy >= 128:
-            color, strength = "#27ae60", "Muy Fuerte"
-        elif entropy >= 64:
-            color, strength = "#f39c12", "Fuerte"
-        elif entropy >= 32:
-            color, strength = "#e67e22", "Moderada"
+        # Calcular entropía (teórica y estimada según los patrones encontrados)
+        request = job.request
+        if request["mode"] == "passphrase":
+            self.current_entropy = request["entropy"]
+            _, label = strength_label(self.current_entropy)
+            self.entropy_var.set(f"Bits: {self.current_entropy:.0f} ({label}) · "
+                                 f"{request['words']} palabras")
         else:
-            color, strength = "#e74c3c", "Débil"
-        
-        self.entropy_var.set(f"Bits: {entropy:.0f} ({strength})")
+            # Con política o plantilla, la teórica es la exacta del plan
+            self.current_entropy = request["entropy"]
+            estimated = min(report.estimated_bits, self.current_entropy)
+            _, label = strength_label(estimated)
+            if estimated < self.current_entropy - 1:
+                self.entropy_var.set(f"Bits: {estimated:.0f}/"
+                                     f"{self.current_entropy:.0f} ({label})")
+            else:
+                self.entropy_var.set(f"Bits: {self.current_entropy:.0f} ({label})")
         
         # Actualizar estado
-        length = self.length_var.get()
+        length = len(password)
         if length > 500:
             self.status_var.set(f"✓ Contraseña MONSTRUOSA ({length:,} chars)")
         elif length > 100:
@@ -736,26 +1362,88 @@ class TuxContra:
         else:
             self.status_var.set(f"✓ Contraseña generada ({length} chars)")
         
-        # Agregar al historial
-        self.add_to_history(password)
+        # Agregar al historial solo si se pidió explícitamente
+        self.current_committed = False
+        if job.request["commit"]:
+            self.commit_current_password()
         
-        # Restaurar controles
+        self.restore_generation_controls()
+        metrics.observe("render", time.perf_counter() - started)
+    
+    def reject_password_generation(self, job, reason, attempts):
+        """
+        Fin de una generación en la que ningún intento pasó las comprobaciones
+        (reason: "duplicate" o "breached"); se mantiene la contraseña anterior
+        """
+        if not self.scheduler.is_current(job):
+            metrics.inc("discarded_results")
+            return
+        if reason == "breached":
+            problem = "aparecen en filtraciones conocidas"
+        else:
+            problem = "ya se habían generado"
+        self.status_var.set(f"❌ Las {attempts} contraseñas probadas {problem}: "
+                            f"aumenta la longitud o el alfabeto")
+        
+        self.restore_generation_controls()
+    
+    def fail_password_generation(self, job, error):
+        """Fin de una generación que lanzó una excepción en el hilo de trabajo"""
+        if not self.scheduler.is_current(job):
+            metrics.inc("discarded_results")
+            return
+        metrics.inc("generation_errors")
+        self.status_var.set(f"✗ Error al generar: {error}")
+        self.restore_generation_controls()
+    
+    def restore_generation_controls(self):
+        """Vuelve a habilitar los controles al terminar una generación"""
         self.generating = False
-        self.stop_generation = False
         self.progress_bar.pack_forget()
         self.generate_btn.config(state='normal', text="🔄 Generar Nueva")
         if self.cancel_btn.winfo_ismapped():
             self.cancel_btn.pack_forget()
         self.progress_var.set(0)
     
-    def generate_password(self):
-        """Inicia la generación"""
-        if not (self.lower_var.get() or self.upper_var.get() or 
-                self.digits_var.get() or self.symbols_var.get()):
-            self.status_var.set("⚠ Selecciona al menos un tipo de carácter")
+    def commit_current_password(self):
+        """Guarda la contraseña mostrada en el historial y en el índice de duplicados"""
+        password = self.password_view.password
+        if not password or self.current_committed:
             return
-        
-        length = self.length_var.get()
+        self.current_committed = True
+        self.generated_passwords.add(password_digest(password))
+        self.add_to_history(password, self.current_entropy)
+    
+    def generate_password(self, commit=True, debounce=False):
+        """
+        Pide una contraseña al hilo de generación
+        commit: añadirla al historial al terminar (botón Generar, Ctrl+G)
+        debounce: esperar a que los controles dejen de cambiar (slider, casillas)
+        """
+        if self.passphrase_var.get():
+            request = self.passphrase_request()
+            if request is None:
+                return
+            length = 0
+        elif self.template_var.get().strip():
+            request = self.template_request()
+            if request is None:
+                return
+            length = request["length"]
+        else:
+            chars = self.current_charset()
+            if not chars:
+                self.status_var.set("⚠ Selecciona al menos un tipo de carácter")
+                return
+            
+            length = self.get_length()
+            request = {"mode": "chars", "length": length, "chars": chars,
+                       "entropy": theoretical_entropy(length, len(chars))}
+            if self.policy_var.get().strip():
+                request = self.policy_request(request)
+                if request is None:
+                    return
+        request["commit"] = commit
         
         if length > 500:
             self.status_var.set("⏳ Generando contraseña MONSTRUOSA...")
@@ -771,15 +1459,55 @@ class TuxContra:
         # Deshabilitar controles
         self.generating = True
         self.generate_btn.config(state='disabled', text="⏳ Generando...")
-        self.cancel_btn.pack(side=tk.LEFT, padx=(0, 10))
+        if not self.cancel_btn.winfo_ismapped():
+            self.cancel_btn.pack(side=tk.LEFT, padx=(0, 10))
         
-        # Iniciar hilo
-        thread = threading.Thread(target=self.generate_password_thread, daemon=True)
-        thread.start()
+        # Enviar al hilo de generación (sustituye a la petición pendiente)
+        self.scheduler.submit(request, debounce=debounce)
+    
+    def policy_request(self, request):
+        """Añade la política compilada a la petición (None si no es válida)"""
+        from tuxcontra_policy import compile_policy, parse_policy
+        try:
+            policy = parse_policy(self.policy_var.get())
+            plan = compile_policy(policy, request["chars"], request["length"])
+        except ValueError as e:
+            self.status_var.set(f"⚠ {e}")
+            return None
+        request.update(mode="policy", plan=plan, entropy=plan.entropy())
+        return request
+    
+    def template_request(self):
+        """Petición para el modo plantilla (None si no es válida)"""
+        from tuxcontra_template import compile_template
+        try:
+            plan = compile_template(self.template_var.get().strip())
+        except ValueError as e:
+            self.status_var.set(f"⚠ {e}")
+            return None
+        return {"mode": "template", "plan": plan, "entropy": plan.entropy(),
+                "length": plan.length, "chars": plan.charset}
+    
+    def passphrase_request(self):
+        """Petición para el modo frase de palabras (None si falta la lista)"""
+        wordlist = self.get_wordlist()
+        if wordlist is None or len(wordlist) == 0:
+            self.status_var.set("⚠ Elige una lista de palabras (📂 Lista...)")
+            return None
+        try:
+            words = max(1, min(64, int(self.words_var.get())))
+        except (tk.TclError, ValueError):
+            words = 6
+        self.words_var.set(words)
+        return {"mode": "passphrase", "wordlist": wordlist, "words": words,
+                "separator": "-", "entropy": passphrase_entropy(wordlist, words)}
     
     def cancel_generation(self):
-        """Cancela la generación"""
-        self.stop_generation = True
+        """Cancela la generación (sus resultados se descartarán)"""
+        self.scheduler.cancel()
+        self.keyfile_token.cancel()
+        self.generating = False
+        self.progress_var.set(0)
         self.status_var.set("⏹️ Generación cancelada")
         self.generate_btn.config(state='normal', text="🔄 Generar Nueva")
         self.cancel_btn.pack_forget()
@@ -791,31 +1519,37 @@ class TuxContra:
     
     def copy_to_clipboard(self):
         """Copia la contraseña al portapapeles"""
-        password = self.password_text.get(1.0, tk.END).strip()
+        password = self.password_view.password
         if password:
-            try:
-                pyperclip.copy(password)
-                self.status_var.set("✓ Contraseña copiada")
-                
-                length = len(password)
-                if length > 1000:
-                    msg = f"¡Contraseña MONSTRUOSA copiada!\n\n{length:,} caracteres"
-                elif length > 100:
-                    msg = f"¡Contraseña EXTRA LARGA copiada!\n\n{length:,} caracteres"
-                else:
-                    msg = "Contraseña copiada al portapapeles"
-                
-                messagebox.showinfo("Copiado", f"{msg}\n\nPuedes pegarla con Ctrl+V")
-                
-            except Exception as e:
-                self.status_var.set("✗ Error al copiar")
-                messagebox.showerror("Error", f"No se pudo copiar:\n{e}")
+            self.status_var.set("⏳ Copiando...")
+            self.clipboard.copy(password, lambda ok, error: self.finish_copy(password, ok, error))
         else:
             messagebox.showwarning("Advertencia", "No hay contraseña para copiar.")
     
+    def finish_copy(self, password, ok, error):
+        """Fin de la copia de la contraseña principal"""
+        if not ok:
+            self.status_var.set("✗ Error al copiar")
+            messagebox.showerror("Error", f"No se pudo copiar:\n{error}")
+            return
+        metrics.inc("copies")
+        self.commit_current_password()
+        self.status_var.set(f"✓ Contraseña copiada (se borrará en {self.CLIPBOARD_CLEAR_S} s)")
+        
+        length = len(password)
+        if length > 1000:
+            msg = f"¡Contraseña MONSTRUOSA copiada!\n\n{length:,} caracteres"
+        elif length > 100:
+            msg = f"¡Contraseña EXTRA LARGA copiada!\n\n{length:,} caracteres"
+        else:
+            msg = "Contraseña copiada al portapapeles"
+        
+        messagebox.showinfo("Copiado", f"{msg}\n\nPuedes pegarla con Ctrl+V\n"
+                            f"El portapapeles se borrará en {self.CLIPBOARD_CLEAR_S} segundos")
+    
     def save_to_file(self):
         """Guarda la contraseña en un archivo"""
-        password = self.password_text.get(1.0, tk.END).strip()
+        password = self.password_view.password
         if not password:
             messagebox.showwarning("Advertencia", "No hay contraseña para guardar.")
             return
@@ -830,15 +1564,19 @@ class TuxContra:
         
         if file_path:
             try:
+                header = (
+                    "Contraseña generada por TuxContra\n"
+                    f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                    f"Longitud: {len(password):,} caracteres\n"
+                    f"Entropía: {self.current_entropy:.0f} bits\n"
+                    + "=" * 50 + "\n\n"
+                )
                 with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(f"Contraseña generada por TuxContra\n")
-                    f.write(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"Longitud: {len(password):,} caracteres\n")
-                    f.write(f"Entropía: {self.calculate_entropy():.0f} bits\n")
-                    f.write("=" * 50 + "\n\n")
+                    f.write(header)
                     f.write(password)
                     f.write("\n\n" + "=" * 50 + "\n")
                 
+                self.commit_current_password()
                 self.status_var.set(f"✓ Guardado: {os.path.basename(file_path)}")
                 messagebox.showinfo("Guardado", f"Contraseña guardada en:\n{file_path}")
                 
@@ -846,149 +1584,267 @@ class TuxContra:
                 self.status_var.set("✗ Error al guardar")
                 messagebox.showerror("Error", f"No se pudo guardar:\n{e}")
     
+    def export_history(self):
+        """Exporta el historial a JSON Lines o CSV (opcionalmente comprimido)"""
+        if not len(self.history_store):
+            messagebox.showwarning("Advertencia", "El historial está vacío.")
+            return
+        
+        default_name = f"tuxcontra_historial_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"),
+                       ("Comprimido (gzip)", "*.gz"), ("Comprimido (xz)", "*.xz"),
+                       ("Todos los archivos", "*.*")],
+            initialfile=default_name,
+            initialdir=self.data_dir
+        )
+        if not file_path:
+            return
+        
+        from tuxcontra_export import export_entries
+        try:
+            # Se recorre el diario entrada a entrada, de la más antigua a la más nueva
+            with metrics.time("history_io"):
+                count = export_entries(self.history_journal.iter_entries(), file_path)
+            self.status_var.set(f"✓ Historial exportado: {count} entradas en "
+                                f"{os.path.basename(file_path)}")
+        except Exception as e:
+            self.status_var.set("✗ Error al exportar")
+            messagebox.showerror("Error", f"No se pudo exportar el historial:\n{e}")
+    
+    def generate_keyfile(self):
+        """Genera un archivo de clave aleatorio directamente en disco"""
+        if self.generating:
+            return
+        size_text = simpledialog.askstring(
+            "Archivo de clave", "Tamaño (ej. 4096, 64K, 10M, 2G):",
+            initialvalue="4K", parent=self.root)
+        if not size_text:
+            return
+        from tuxcontra_keyfile import parse_size
+        try:
+            size = parse_size(size_text)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        default_name = f"tuxcontra_{datetime.now().strftime('%Y%m%d_%H%M%S')}.key"
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".key",
+            filetypes=[("Archivos de clave", "*.key"), ("Todos los archivos", "*.*")],
+            initialfile=default_name,
+            initialdir=self.data_dir
+        )
+        if not file_path:
+            return
+        
+        self.generating = True
+        self.generate_btn.config(state='disabled', text="⏳ Generando...")
+        self.cancel_btn.pack(side=tk.LEFT, padx=(0, 10))
+        self.progress_bar.pack(fill=tk.X, pady=(10, 0))
+        self.status_var.set(f"⏳ Escribiendo archivo de clave ({size:,} bytes)...")
+        
+        self.keyfile_token = CancelToken()
+        self.keyfile_worker = threading.Thread(target=self.keyfile_thread,
+                                               args=(file_path, size, self.keyfile_token),
+                                               daemon=True)
+        self.keyfile_worker.start()
+    
+    def keyfile_thread(self, file_path, size, token):
+        """Hilo que escribe el archivo de clave por bloques"""
+        from tuxcontra_keyfile import write_checksum, write_keyfile
+        try:
+            written, hexdigest, elapsed = write_keyfile(
+                file_path, size,
+                progress=lambda done: self.ui_channel.post_progress(done * 100 / max(1, size)),
+                cancel=lambda: token.cancelled)
+            write_checksum(file_path, hexdigest)
+            rate = written / elapsed / 2**20 if elapsed else 0
+            message = (f"✓ Archivo de clave: {os.path.basename(file_path)} "
+                       f"({written:,} bytes, {rate:,.0f} MB/s) SHA-256 {hexdigest[:16]}…")
+        except InterruptedError:
+            message = "⏹️ Archivo de clave cancelado"
+        except Exception as e:
+            message = f"✗ Error al escribir el archivo de clave: {e}"
+        self.ui_channel.post_call(self.finish_keyfile, message)
+    
+    def finish_keyfile(self, message):
+        """Restaura los controles tras escribir un archivo de clave"""
+        self.status_var.set(message)
+        self.keyfile_worker = None
+        self.generating = False
+        self.progress_bar.pack_forget()
+        self.generate_btn.config(state='normal', text="🔄 Generar Nueva")
+        if self.cancel_btn.winfo_ismapped():
+            self.cancel_btn.pack_forget()
+        self.progress_var.set(0)
+    
+    # ========================================================================
+    # DIAGNÓSTICO (Ctrl+Shift+D)
+    # ========================================================================
+    
+    def show_diagnostics(self):
+        """Panel oculto con las métricas de las etapas principales"""
+        if self.diagnostics_window is not None:
+            self.diagnostics_window.lift()
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("TuxContra - Diagnóstico")
+        window.configure(bg=self.bg_color)
+        self.diagnostics_window = window
+        
+        text = tk.Text(window, width=72, height=18, font=self.font_mono,
+                       bg=self.secondary_color, fg=self.fg_color, relief=tk.FLAT)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        buttons = tk.Frame(window, bg=self.bg_color)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        enabled_var = tk.BooleanVar(value=metrics.enabled)
+        
+        def toggle():
+            metrics.enabled = enabled_var.get()
+        
+        tk.Checkbutton(buttons, text="Medir", variable=enabled_var, command=toggle,
+                      font=self.font_small, bg=self.bg_color, fg=self.fg_color,
+                      selectcolor=self.secondary_color).pack(side=tk.LEFT, padx=(0, 10))
+        for label, command in (("📤 Exportar...", self.export_metrics),
+                               ("↺ Reiniciar", metrics.reset)):
+            tk.Button(buttons, text=label, font=('Arial', 10),
+                     bg=self.secondary_color, fg=self.fg_color,
+                     command=command, padx=10, pady=2).pack(side=tk.LEFT, padx=(0, 10))
+        
+        def refresh():
+            if self.diagnostics_window is not window:
+                return
+            text.config(state='normal')
+            text.delete('1.0', tk.END)
+            if not metrics.enabled:
+                text.insert(tk.END, "Métricas desactivadas (marca 'Medir' o arranca con --metrics)\n\n")
+            text.insert(tk.END, metrics.report())
+            text.config(state='disabled')
+            window.after(1000, refresh)
+        
+        def close():
+            self.diagnostics_window = None
+            window.destroy()
+        
+        window.protocol("WM_DELETE_WINDOW", close)
+        refresh()
+    
+    def export_metrics(self):
+        """Exporta las métricas (Prometheus .prom o JSON Lines .jsonl)"""
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".prom",
+            filetypes=[("Prometheus", "*.prom"), ("JSON Lines", "*.jsonl")],
+            initialfile="tuxcontra_metrics.prom"
+        )
+        if not file_path:
+            return
+        try:
+            metrics.export(file_path)
+            self.status_var.set(f"✓ Métricas exportadas: {os.path.basename(file_path)}")
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudieron exportar las métricas:\n{e}")
+    
+    def shutdown(self, deadline=2.0):
+        """
+        Cancela los trabajos y espera a los hilos como mucho `deadline` segundos
+        Retorna True si todos terminaron a tiempo
+        """
+        end = time.monotonic() + deadline
+        self.scheduler.cancel()
+        self.keyfile_token.cancel()
+        finished = self.scheduler.close(timeout=max(0.0, end - time.monotonic()))
+        if self.keyfile_worker is not None:
+            self.keyfile_worker.join(max(0.0, end - time.monotonic()))
+            finished = finished and not self.keyfile_worker.is_alive()
+        return finished
+    
     # ========================================================================
     # HISTORIAL
     # ========================================================================
     
-    def add_to_history(self, password):
+    def add_to_history(self, password, entropy):
         """Agrega al historial"""
-        display_password = password
-        if len(password) > 100:
-            display_password = f"{password[:50]}...{password[-50:]}"
-        
-        entry = {
-            "password": password,
-            "display": display_password,
-            "length": len(password),
-            "timestamp": datetime.now().strftime("%H:%M:%S"),
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "entropy": self.calculate_entropy()
-        }
+        entry = HistoryEntry(password, entropy)
         
-        self.password_history.insert(0, entry)
+        # La lista muestra las HISTORY_LIMIT más recientes; las más antiguas
+        # se descartan de memoria de vez en cuando (y del diario al compactar)
+        self.history_store.add(entry)
+        if len(self.history_store) >= 2 * self.HISTORY_LIMIT:
+            self.history_store = self.history_store.last(self.HISTORY_LIMIT)
         
-        # Limitar a 20 entradas
-        if len(self.password_history) > 20:
-            self.password_history = self.password_history[:20]
+        self.history_list.on_insert()
         
-        self.update_history_display()
-        self.save_history()
+        # Solo se anexa la nueva entrada al diario
+        try:
+            with metrics.time("history_io"):
+                self.history_journal.append(entry)
+        except Exception as e:
+            print(f"Error guardando historial: {e}")
     
     def update_history_display(self):
         """Actualiza el historial en pantalla"""
-        # Limpiar
-        for widget in self.history_inner_frame.winfo_children():
-            widget.destroy()
-        
-        if not self.password_history:
-            tk.Label(self.history_inner_frame, 
-                    text="No hay historial aún.\nGenera algunas contraseñas primero.",
-                    font=self.font_medium, bg=self.secondary_color,
-                    fg='#95a5a6', pady=20).pack()
-            return
-        
-        # Mostrar últimas 5
-        for i, entry in enumerate(self.password_history[:5]):
-            frame = tk.Frame(self.history_inner_frame, bg=self.secondary_color)
-            frame.pack(fill=tk.X, pady=3, padx=5)
-            
-            # Fecha/hora
-            time_frame = tk.Frame(frame, bg=self.secondary_color)
-            time_frame.pack(side=tk.LEFT, fill=tk.Y)
-            
-            tk.Label(time_frame, text=f"{entry['date']}",
-                    font=('Arial', 8), bg=self.secondary_color,
-                    fg='#95a5a6').pack()
-            
-            tk.Label(time_frame, text=f"{entry['timestamp']}",
-                    font=('Arial', 10, 'bold'), bg=self.secondary_color,
-                    fg=self.fg_color).pack()
-            
-            # Contraseña
-            pwd_frame = tk.Frame(frame, bg=self.secondary_color)
-            pwd_frame.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
-            
-            pwd_text = tk.Text(pwd_frame, height=2, wrap=tk.WORD,
-                              font=('Courier New', 9), bg=self.secondary_color,
-                              fg=self.fg_color, relief=tk.FLAT, bd=0)
-            pwd_text.insert(1.0, entry['display'])
-            pwd_text.config(state='disabled')
-            pwd_text.pack(fill=tk.X)
-            
-            # Información y botón
-            info_frame = tk.Frame(frame, bg=self.secondary_color)
-            info_frame.pack(side=tk.RIGHT, fill=tk.Y)
-            
-            tk.Label(info_frame, text=f"{entry['length']:,} chars\n{entry['entropy']:.0f} bits",
-                    font=('Arial', 9), bg=self.secondary_color,
-                    fg=self.accent_color, justify=tk.RIGHT).pack(pady=2)
-            
-            tk.Button(info_frame, text="📋 Copiar", font=('Arial', 8),
-                     bg=self.button_color, fg=self.fg_color,
-                     command=lambda p=entry['password']: self.copy_from_history(p),
-                     relief=tk.RAISED, bd=1, padx=5, pady=1).pack()
+        self.history_list.refresh()
     
-    def copy_from_history(self, password):
+    def copy_from_history(self, password, entropy):
         """Copia una contraseña del historial"""
-        try:
-            pyperclip.copy(password)
-            self.status_var.set(f"✓ Copiada del historial ({len(password):,} chars)")
-            
-            # Mostrar en área principal
-            self.password_text.config(state='normal')
-            self.password_text.delete(1.0, tk.END)
-            self.password_text.insert(1.0, password)
-            self.password_text.config(state='disabled')
-            self.update_stats(password)
-            
-        except Exception as e:
-            self.status_var.set("✗ Error al copiar del historial")
+        # Mostrar en área principal (ya está en el historial)
+        self.password_view.set_password(password)
+        self.current_committed = True
+        self.current_entropy = entropy
+        self.update_stats(password)
+        
+        def done(ok, error):
+            if ok:
+                metrics.inc("copies")
+                self.status_var.set(f"✓ Copiada del historial ({len(password):,} chars)")
+            else:
+                self.status_var.set("✗ Error al copiar del historial")
+        
+        self.status_var.set("⏳ Copiando...")
+        self.clipboard.copy(password, done)
     
     def save_history(self):
-        """Guarda el historial en archivo"""
+        """Compacta el diario del historial (las entradas ya están guardadas)"""
         try:
-            filtered_history = []
-            for entry in self.password_history:
-                filtered_entry = entry.copy()
-                if len(entry['password']) > 500:
-                    filtered_entry['password'] = "[CONTRASEÑA DEMASIADO LARGA]"
-                filtered_history.append(filtered_entry)
-            
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(filtered_history, f, indent=2, ensure_ascii=False)
-            
+            with metrics.time("history_io"):
+                self.history_journal.compact()
         except Exception as e:
             print(f"Error guardando historial: {e}")
     
     def load_history(self):
         """Carga el historial desde archivo"""
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    self.password_history = json.load(f)
-                
-                for entry in self.password_history:
-                    if 'entropy' not in entry:
-                        entry['entropy'] = 0
-                
-                print(f"✓ Historial cargado: {len(self.password_history)} entradas")
+            with metrics.time("history_io"):
+                self.history_store = HistoryStore.from_journal(self.history_journal,
+                                                               self.HISTORY_LIMIT)
+            if len(self.history_store):
+                print(f"✓ Historial cargado: {len(self.history_store):,} entradas")
         except Exception as e:
             print(f"Error cargando historial: {e}")
-            self.password_history = []
+            self.history_store = HistoryStore()
     
     def clear_history(self):
         """Limpia el historial"""
-        if not self.password_history:
+        if not len(self.history_store):
             messagebox.showinfo("Historial", "El historial ya está vacío.")
             return
         
         if messagebox.askyesno("Confirmar", 
-            f"¿Eliminar {len(self.password_history)} contraseñas del historial?"):
+            f"¿Eliminar {len(self.history_store.newest_first(self.HISTORY_LIMIT)):,} "
+            f"contraseñas del historial?"):
             
-            self.password_history = []
+            self.history_store = HistoryStore()
             self.generated_passwords.clear()
             self.update_history_display()
-            self.save_history()
+            try:
+                self.history_journal.clear()
+            except Exception as e:
+                print(f"Error guardando historial: {e}")
             self.status_var.set("✓ Historial limpiado")
             
             messagebox.showinfo("Historial", "Historial limpiado correctamente.")
@@ -1002,25 +1858,59 @@ def main():
     print("INICIANDO TUXCONTRA")
     print("="*60)
     
-    # Instalar dependencias
-    if not instalar_dependencias():
-        print("⚠ Algunas dependencias no se pudieron instalar")
-        print("⚠ Algunas funciones pueden no estar disponibles")
+    # Las dependencias (pyperclip) y los módulos de exportación, archivos de
+    # clave, filtraciones, políticas y plantillas se cargan al usarlos
+    if "--metrics" in sys.argv[1:]:
+        metrics.enabled = True
+    t_imports = time.perf_counter()
     
     # Crear ventana
     root = tk.Tk()
     
     # Configurar aplicación
     app = TuxContra(root)
+    t_app = time.perf_counter()
+    
+    if STARTUP_PROFILE:
+        def report_first_frame():
+            t_frame = time.perf_counter()
+            print("\n⏱️ Perfil de arranque")
+            print(f"   Importaciones:      {(t_imports - _INICIO) * 1000:8.1f} ms")
+            print(f"   Ventana e interfaz: {(t_app - t_imports) * 1000:8.1f} ms")
+            print(f"   Primer frame:       {(t_frame - _INICIO) * 1000:8.1f} ms")
+        # after_idle dentro de after(0): se ejecuta tras el primer dibujado
+        root.after(0, lambda: root.after_idle(report_first_frame))
     
     # Configurar cierre
     def on_closing():
         if app.generating:
-            if messagebox.askyesno("Generación en curso", 
-                                  "Hay una generación en curso. ¿Cancelar y salir?"):
-                app.stop_generation = True
-                time.sleep(0.5)
+            if not messagebox.askyesno("Generación en curso", 
+                                      "Hay una generación en curso. ¿Cancelar y salir?"):
+                return
+        finished = app.shutdown(deadline=2.0)
+        app.clipboard.close()
         app.save_history()
+        if finished:
+            app.generated_passwords.close()
+            if app.breach_corpus is not None:
+                app.breach_corpus.close()
+            if app.wordlist is not None:
+                app.wordlist.close()
+            for wordlist in app.retired_wordlists:
+                wordlist.close()
+        else:
+            # Un hilo que sigue vivo podría leer los mmap del índice, el
+            # corpus o la lista de palabras: los libera la salida del proceso
+            # (el índice se vuelca a disco, que no invalida el mapeo)
+            app.generated_passwords.flush()
+            print("⚠ Algún hilo no terminó a tiempo; se cierra sin liberar los índices")
+        # TUXCONTRA_METRICS_FILE: exportar al salir (.prom o .jsonl)
+        metrics_file = os.environ.get("TUXCONTRA_METRICS_FILE")
+        if metrics.enabled and metrics_file:
+            try:
+                metrics.export(metrics_file)
+            except OSError as e:
+                print(f"⚠ No se pudieron exportar las métricas: {e}")
         root.destroy()
     
     root.protocol("WM_DELETE_WINDOW", on_closing)
@@ -1030,6 +1920,7 @@ def main():
     root.bind('<Control-c>', lambda e: app.copy_to_clipboard())
     root.bind('<Control-s>', lambda e: app.save_to_file())
     root.bind('<Escape>', lambda e: app.cancel_generation() if app.generating else None)
+    root.bind('<Control-D>', lambda e: app.show_diagnostics())
     
     # Iniciar
     print("\n✅ Aplicación lista")
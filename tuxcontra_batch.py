@@ -0,0 +1,153 @@
+"""
+Generación masiva de TuxContra repartida entre procesos
+
+Divide una petición de N contraseñas en fragmentos ("shards") y los genera
+en todos los núcleos. Los resultados vuelven por una cola acotada de
+trabajos pendientes, así que el proceso principal nunca guarda el lote
+completo.
+
+Cada proceso obtiene sus bytes de su propia reserva de entropía
+(tuxcontra_entropy), que se vacía en el hijo tras el fork: los procesos
+hijos no comparten ni heredan bytes del padre y sus secuencias son
+independientes.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from tuxcontra_engine import compile_charset
+from tuxcontra_entropy import randbytes as pool_randbytes
+
+# Caracteres por fragmento (equilibrio entre coste de envío y reparto)
+SHARD_CHARS = 1 << 20
+
+
+def line_block(count, length, charset, randbytes=pool_randbytes):
+    """Genera count contraseñas como bytes UTF-8, una por línea"""
+    if count <= 0:
+        return b""
+    if length == 0:
+        return b"\n" * count
+    chars = compile_charset(charset).draw(count * length, randbytes)
+    lines = [chars[i:i + length] for i in range(0, count * length, length)]
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+def _generate_shard(count, length, charset):
+    """Trabajo de cada proceso hijo"""
+    return line_block(count, length, charset)
+
+
+def _shard_sizes(count, shard_size):
+    """Reparte count en fragmentos de como mucho shard_size"""
+    while count > 0:
+        size = min(shard_size, count)
+        yield size
+        count -= size
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+def iter_line_blocks(count, length, charset, workers=None, ordered=True,
+                     shard_size=None, max_pending=None):
+    """
+    Genera la salida en bloques de bytes (una contraseña por línea)
+
+    workers: número de procesos (None = todos los núcleos, 1 = sin procesos)
+    ordered: entrega los fragmentos en el orden en que se pidieron; si es
+             False se entregan según terminan
+    max_pending: fragmentos en vuelo como máximo (acota la memoria)
+    """
+    if "\n" in charset:
+        raise ValueError("El alfabeto no puede contener saltos de línea")
+    compile_charset(charset)  # valida el alfabeto antes de lanzar procesos
+
+    workers = workers or os.cpu_count() or 1
+    shard_size = shard_size or max(1, SHARD_CHARS // max(1, length))
+    sizes = _shard_sizes(count, shard_size)
+
+    if workers == 1:
+        for size in sizes:
+            yield line_block(size, length, charset)
+        return
+
+    yield from run_shards(_generate_shard, ((size, length, charset) for size in sizes),
+                          workers, ordered, max_pending)
+
+
+def run_shards(func, shards, workers, ordered=True, max_pending=None):
+    """
+    Ejecuta func(*args) en procesos para cada args de shards y entrega los
+    resultados (en orden o según terminan)
+
+    func debe ser una función de módulo (se envía a los procesos hijos).
+    max_pending: fragmentos en vuelo como máximo (acota la memoria)
+    """
+    max_pending = max_pending or workers * 2
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = deque() if ordered else set()
+        for args in shards:
+            future = pool.submit(func, *args)
+            if ordered:
+                pending.append(future)
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            else:
+                pending.add(future)
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        if ordered:
+            while pending:
+                yield pending.popleft().result()
+        else:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+    finally:
+        # Si el consumidor deja de leer, no se siguen generando fragmentos
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def iter_passwords(count, length, charset, workers=None, ordered=True):
+    """Genera count contraseñas una a una, repartidas entre procesos"""
+    for block in iter_line_blocks(count, length, charset, workers, ordered):
+        lines = block.decode("utf-8").split("\n")
+        lines.pop()
+        yield from lines
+
+
+# ============================================================================
+# COMPARATIVA DE ESCALADO
+# ============================================================================
+
+def benchmark_scaling(count, length, charset, max_workers=None, out=None):
+    """
+    Mide contraseñas por segundo con 1, 2, ... max_workers procesos
+    Retorna una lista de diccionarios con los resultados
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results = []
+    base_rate = None
+    for workers in range(1, max_workers + 1):
+        start = time.perf_counter()
+        total = 0
+        for block in iter_line_blocks(count, length, charset, workers=workers, ordered=False):
+            total += len(block)
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed else float("inf")
+        base_rate = base_rate or rate
+        results.append({"workers": workers, "seconds": elapsed,
+                        "passwords_per_sec": rate, "speedup": rate / base_rate})
+        if out is not None:
+            print(f"  {workers:>3} procesos: {rate:>14,.0f} contraseñas/s  "
+                  f"x{rate / base_rate:.2f}", file=out)
+    return results
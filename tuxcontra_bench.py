@@ -0,0 +1,576 @@
+"""
+Banco de pruebas de rendimiento de TuxContra
+
+Mide sin interfaz gráfica los caminos que usa la aplicación: generación
+(caracteres y contraseñas por segundo según longitud y alfabeto, también
+en modo reproducible y con plantillas), SHA-256
+e índice de duplicados, diario del historial, el canal entre hilos y la
+interfaz, la lista del historial y la vista de la contraseña (sin sus
+widgets), el análisis de fortaleza, la auditoría de filtraciones y el
+arranque. Los resultados se
+guardan en JSON y se comparan con una referencia guardada: cualquier
+métrica que empeore más del umbral se marca como regresión (en los
+tiempos de menos de 10 µs, muy ruidosos, el umbral es del 50 %).
+
+Uso:
+    python tuxcontra_bench.py --json resultados.json
+    python tuxcontra_bench.py --quick --baseline referencia.json
+    python tuxcontra_bench.py --baseline referencia.json --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from tuxcontra_breach import audit, build_index, open_corpus, sha1_digest
+from tuxcontra_dedup import DigestIndex, password_digest
+from tuxcontra_engine import DIGITS, build_charset, generate, generate_many
+from tuxcontra_history import HistoryEntry, HistoryJournal, HistoryStore, visible_window
+from tuxcontra_jobs import UIChannel
+from tuxcontra_policy import compile_policy, parse_policy
+from tuxcontra_seeded import derive_key, password_at
+from tuxcontra_seeded import line_block as seeded_block
+from tuxcontra_strength import analyze
+from tuxcontra_template import compile_template
+
+FORMAT_VERSION = 1
+
+# Umbral de regresión por defecto (15 % peor que la referencia)
+THRESHOLD = 0.15
+# Las medidas de menos de SMALL_SECONDS varían mucho entre ejecuciones
+# idénticas: se les aplica como mínimo SMALL_THRESHOLD
+SMALL_SECONDS = 10e-6
+SMALL_THRESHOLD = 0.5
+# Segundos por unidad de las métricas de tiempo
+TIME_UNITS = {"s": 1.0, "ms": 1e-3, "µs": 1e-6}
+
+LENGTHS = (16, 1024, 65536, 1_000_000, 10_000_000)
+QUICK_LENGTHS = (16, 1024, 65536, 1_000_000)
+CHARSETS = {
+    "digits": DIGITS,
+    "alnum": build_charset(symbols=False),
+    "full": build_charset(),
+}
+HISTORY_SIZES = (20, 1000, 100_000)
+# Filas visibles de la lista del historial (unos 700 px de alto)
+PANEL_ROWS = 12
+# Entradas del modelo con índices (--quick, normal)
+STORE_SIZES = (100_000, 1_000_000)
+# Líneas del corpus de filtraciones sintético (--quick, normal)
+BREACH_LINES = (1_000_000, 4_000_000)
+# Políticas medidas: la habitual de sitios web y una muy estricta
+POLICIES = {
+    "web": "min-digits=2,min-symbols=1,no-ambiguous,max-repeat=2,start=letter",
+    "strict": "min-lower=3,min-upper=3,min-digits=3,min-symbols=3,max-repeat=1",
+}
+TEMPLATES = {
+    "license": "Cvcc-dddd-ssss",
+    "letter_alnum": "La{15}",
+    "any16": "x{16}",
+}
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def measure(func, min_time=0.2, repeats=3):
+    """
+    Segundos por llamada de func: se repite hasta durar min_time y se
+    queda el mejor de `repeats` intentos (el menos afectado por ruido)
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time or calls == 0:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed / calls)
+    return best
+
+
+def metric(value, unit, higher_is_better):
+    """Entrada de resultado con su unidad y sentido"""
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+# ============================================================================
+# GRUPOS DE MEDIDAS
+# ============================================================================
+
+def bench_generation(quick, tmp_dir):
+    """Caracteres y contraseñas por segundo según longitud y alfabeto"""
+    results = {}
+    min_time = 0.05 if quick else 0.2
+    for name, charset in CHARSETS.items():
+        for length in QUICK_LENGTHS if quick else LENGTHS:
+            per_call = measure(lambda: generate(length, charset), min_time)
+            key = f"generate.{name}.{length}"
+            results[f"{key}.chars_per_s"] = metric(length / per_call, "chars/s", True)
+            results[f"{key}.passwords_per_s"] = metric(1 / per_call, "contraseñas/s", True)
+        # Contraseña corta pidiendo los bytes al sistema sin la reserva
+        per_call = measure(lambda: generate(16, charset, os.urandom), min_time)
+        results[f"generate.{name}.16.urandom.passwords_per_s"] = metric(
+            1 / per_call, "contraseñas/s", True)
+        # Lote de contraseñas cortas (modo consola)
+        n = 10_000 if quick else 100_000
+        per_call = measure(lambda: generate_many(n, 16, charset), min_time)
+        results[f"generate_many.{name}.16.passwords_per_s"] = metric(
+            n / per_call, "contraseñas/s", True)
+        # Mismo lote en modo reproducible (flujo por contador)
+        seed_key = derive_key(b"tuxcontra-bench", name)
+        per_call = measure(lambda: seeded_block(seed_key, 0, n, 16, charset), min_time)
+        results[f"seeded.{name}.16.passwords_per_s"] = metric(
+            n / per_call, "contraseñas/s", True)
+    # Plantillas (lote de códigos con tramos fijos)
+    n = 100_000 if quick else 1_000_000
+    for name, template in TEMPLATES.items():
+        plan = compile_template(template)
+        per_call = measure(lambda: plan.generate_many(n), min_time)
+        results[f"template.{name}.passwords_per_s"] = metric(n / per_call, "contraseñas/s", True)
+    # Lotes con política (por descarte y desenrollando)
+    n = 10_000 if quick else 100_000
+    for name, rules in POLICIES.items():
+        plan = compile_policy(parse_policy(rules), CHARSETS["full"], 16)
+        per_call = measure(lambda: plan.generate_many(n), min_time)
+        results[f"policy.{name}.16.passwords_per_s"] = metric(n / per_call, "contraseñas/s", True)
+    # Acceso directo a una contraseña lejana del lote
+    per_call = measure(lambda: password_at(seed_key, 734_221, 16, charset), min_time)
+    results["seeded.password_at.per_s"] = metric(1 / per_call, "contraseñas/s", True)
+    return results
+
+
+def bench_hashing(quick, tmp_dir):
+    """SHA-256 de contraseñas y coste del índice de duplicados"""
+    results = {}
+    min_time = 0.05 if quick else 0.2
+    for length in (16, 1_000_000):
+        password = generate(length, CHARSETS["full"])
+        per_call = measure(lambda: password_digest(password), min_time)
+        results[f"digest.{length}.us"] = metric(per_call * 1e6, "µs", False)
+
+    entries = 10_000 if quick else 100_000
+    path = os.path.join(tmp_dir, "bench.bloom")
+    digests = [password_digest(str(i)) for i in range(entries)]
+    with DigestIndex(path, capacity=entries) as index:
+        start = time.perf_counter()
+        for d in digests:
+            index.add(d)
+        results["dedup.add.us"] = metric(
+            (time.perf_counter() - start) / entries * 1e6, "µs", False)
+        start = time.perf_counter()
+        for d in digests:
+            d in index
+        results["dedup.lookup.us"] = metric(
+            (time.perf_counter() - start) / entries * 1e6, "µs", False)
+    per_call = measure(lambda: DigestIndex(path).close(), min_time)
+    results["dedup.open.ms"] = metric(per_call * 1000, "ms", False)
+    return results
+
+
+def bench_history(quick, tmp_dir):
+    """
+    Añadir y cargar el historial con diarios de distinto tamaño, y memoria
+    y consultas del modelo con índices
+    """
+    results = {}
+    min_time = 0.05 if quick else 0.2
+    for size in HISTORY_SIZES[:-1] if quick else HISTORY_SIZES:
+        path = os.path.join(tmp_dir, f"history_{size}.jsonl")
+        journal = HistoryJournal(path, limit=20, compact_every=10 ** 9)
+        journal._rewrite({
+            "password": generate(16, CHARSETS["full"]), "timestamp": "12:00:00",
+            "date": "01/01/2025", "length": 16, "entropy": 104.9,
+        } for _ in range(size))
+        journal.load()
+
+        entry = {"password": generate(16, CHARSETS["full"]), "timestamp": "12:00:00",
+                 "date": "01/01/2025", "length": 16, "entropy": 104.9}
+        appends = 200
+        start = time.perf_counter()
+        for _ in range(appends):
+            journal.append(entry)
+        results[f"history.{size}.append.us"] = metric(
+            (time.perf_counter() - start) / appends * 1e6, "µs", False)
+
+        per_call = measure(journal.load, min_time)
+        results[f"history.{size}.load.ms"] = metric(per_call * 1000, "ms", False)
+
+    # Modelo compacto con índices: memoria por entrada y consultas
+    size = STORE_SIZES[0] if quick else STORE_SIZES[1]
+    now = time.time() - size
+    lengths = (8, 12, 16, 20, 24, 32, 64)
+    passwords = generate_many(size, 16, CHARSETS["full"])
+    key = f"history.store.{size}"
+    start = time.perf_counter()
+    store = HistoryStore(HistoryEntry(p * (lengths[i % 7] // 16 + 1) if lengths[i % 7] > 16
+                                      else p[:lengths[i % 7]], 30 + (i * 7919) % 170, now + i)
+                         for i, p in enumerate(passwords))
+    results[f"{key}.load.ms"] = metric((time.perf_counter() - start) * 1000, "ms", False)
+    start = time.perf_counter()
+    for name in HistoryStore.INDEXES:
+        store.index(name)
+    results[f"{key}.index_build.ms"] = metric((time.perf_counter() - start) * 1000, "ms", False)
+    columns, indexes = store.nbytes()
+    results[f"{key}.bytes_per_entry"] = metric(columns / size, "B", False)
+    results[f"{key}.index_bytes_per_entry"] = metric(indexes / size, "B", False)
+
+    middle = now + size / 2
+    digest = password_digest(passwords[size // 3]).hex()[:6]
+    queries = {
+        "date_range": dict(since=middle, until=middle + 100),
+        "length": dict(min_length=64, limit=20),
+        "entropy_band": dict(min_entropy=100, max_entropy=100.5),
+        "digest_prefix": dict(digest_prefix=digest),
+        "recent_contains": dict(since=now + size - 1000, contains="a"),
+        "recent": dict(limit=20),
+    }
+    for name, criteria in queries.items():
+        per_call = measure(lambda: store.query(**criteria), min_time)
+        results[f"{key}.query.{name}.us"] = metric(per_call * 1e6, "µs", False)
+    adds = 50
+    start = time.perf_counter()
+    for _ in range(adds):
+        store.add(HistoryEntry(passwords[0], 104.9))
+    results[f"{key}.add_indexed.us"] = metric(
+        (time.perf_counter() - start) / adds * 1e6, "µs", False)
+    # Las claves fuera de orden se mezclan en la primera consulta
+    start = time.perf_counter()
+    store.query(min_length=64, limit=20)
+    results[f"{key}.query_after_adds.ms"] = metric(
+        (time.perf_counter() - start) * 1000, "ms", False)
+    return results
+
+
+class _TextSink:
+    """Sustituto de tk.Text para PasswordView: solo cuenta lo insertado"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def config(self, **options):
+        pass
+
+    def delete(self, first, last):
+        self.chars = 0
+
+    def insert(self, index, text):
+        self.chars += len(text)
+
+    def after_idle(self, func):
+        func()
+
+
+def _panel_texts(entries):
+    """Textos que la lista del historial pone en cada fila"""
+    for entry in entries:
+        if entry is not None:
+            entry.date, entry.timestamp, entry.display, entry.info
+
+
+def bench_ui(quick, tmp_dir):
+    """Caminos de actualización de la interfaz que no necesitan pantalla"""
+    results = {}
+    min_time = 0.05 if quick else 0.2
+
+    # Lista del historial: desplazarse a cualquier punto y añadir una entrada
+    # (ventana de filas visibles y sus textos, sin los widgets); el coste no
+    # debe depender del tamaño del historial
+    for size in (1000, HISTORY_SIZES[-1]):
+        now = time.time() - size
+        store = HistoryStore(HistoryEntry(p, 104.9, now + i) for i, p in
+                             enumerate(generate_many(size, 16, CHARSETS["full"])))
+        tops = [(i * 7919) % size for i in range(256)]
+
+        def scroll():
+            view = store.newest_first()
+            for top in tops:
+                _panel_texts(visible_window(view, top, PANEL_ROWS)[1])
+
+        per_call = measure(scroll, min_time, 5)
+        results[f"ui.history_panel.{size}.scroll.us"] = metric(
+            per_call / len(tops) * 1e6, "µs", False)
+
+        entry = HistoryEntry(generate(16, CHARSETS["full"]), 104.9)
+
+        def insert():
+            store.add(entry)
+            _panel_texts(visible_window(store.newest_first(), 0, PANEL_ROWS)[1])
+
+        per_call = measure(insert, min_time, 5)
+        results[f"ui.history_panel.{size}.insert.us"] = metric(per_call * 1e6, "µs", False)
+    channel = UIChannel()
+
+    def cycle():
+        for i in range(100):
+            channel.post_progress(i)
+        channel.post_call(len, "")
+        channel.drain()
+
+    # Unos pocos µs: el mínimo de más repeticiones es bastante más estable
+    results["ui.channel_frame.us"] = metric(measure(cycle, min_time, 9) * 1e6, "µs", False)
+
+    # Vista de la contraseña: primer lote de líneas y el resto hasta el final
+    # (PasswordView real sobre un widget que solo cuenta lo insertado)
+    try:
+        from tuxcontra import PasswordView
+    except ImportError:
+        PasswordView = None
+    for length in (() if PasswordView is None else
+                   QUICK_LENGTHS[-1:] if quick else LENGTHS[-2:]):
+        password = generate(length, CHARSETS["full"])
+        view = PasswordView(_TextSink(), lambda first, last: None)
+        per_call = measure(lambda: view.set_password(password), min_time)
+        results[f"ui.password_view.{length}.first_batch.us"] = metric(
+            per_call * 1e6, "µs", False)
+
+        def render_all():
+            view.set_password(password)
+            while view.rendered < len(password):
+                view.render_more()
+
+        per_call = measure(render_all, min_time, 1)
+        results[f"ui.password_view.{length}.render_all.ms"] = metric(
+            per_call * 1000, "ms", False)
+
+    # Análisis de fortaleza: una vez por contraseña nueva, en el hilo de
+    # generación y sin caché (la interfaz recibe el resultado ya hecho)
+    for length in (16, 1_000_000):
+        password = generate(length, CHARSETS["full"])
+        per_call = measure(lambda: analyze(password, 94), min_time)
+        results[f"ui.analyze.{length}.ms"] = metric(per_call * 1000, "ms", False)
+    return results
+
+
+def bench_startup(quick, tmp_dir):
+    """Arranque en un proceso nuevo: importar la aplicación y el modo consola"""
+    results = {}
+    commands = {
+        "startup.import_gui.ms": [sys.executable, "-c", "import tuxcontra"],
+        "startup.cli.ms": [sys.executable, os.path.join(HERE, "tuxcontra.py"),
+                           "--count", "1", "--out", os.devnull],
+    }
+    runs = 3 if quick else 5
+    for key, command in commands.items():
+        best = float("inf")
+        for _ in range(runs):
+            start = time.perf_counter()
+            completed = subprocess.run(command, cwd=HERE, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL)
+            elapsed = time.perf_counter() - start
+            if completed.returncode != 0:
+                break
+            best = min(best, elapsed)
+        if best != float("inf"):
+            results[key] = metric(best * 1000, "ms", False)
+    return results
+
+
+def bench_breach(quick, tmp_dir):
+    """
+    Búsquedas y auditoría por lotes en un corpus de filtraciones sintético
+    (texto HASH:veces ordenado y su índice binario)
+    """
+    results = {}
+    min_time = 0.05 if quick else 0.2
+    lines = BREACH_LINES[0] if quick else BREACH_LINES[1]
+    # Una décima parte son contraseñas conocidas, para poder medir aciertos
+    known = [f"bench{i}" for i in range(lines // 10)]
+    digests = [sha1_digest(p) for p in known]
+    digests.extend(os.urandom(20) for _ in range(lines - len(known)))
+    digests.sort()
+    text_path = os.path.join(tmp_dir, "breach.txt")
+    with open(text_path, "wb") as f:
+        for i in range(0, lines, 65536):
+            f.write(b"".join(b"%s:%d\r\n" % (d.hex().upper().encode(), 1 + n % 9973)
+                             for n, d in enumerate(digests[i:i + 65536], i)))
+    del digests
+    index_path = os.path.join(tmp_dir, "breach.idx")
+    start = time.perf_counter()
+    build_index(text_path, index_path)
+    results[f"breach.{lines}.index_build.s"] = metric(time.perf_counter() - start, "s", False)
+
+    hits = [sha1_digest(p) for p in known[::max(1, len(known) // 1000)]]
+    misses = [os.urandom(20) for _ in range(1000)]
+    candidates = [p if i % 2 else generate(16, CHARSETS["full"])
+                  for i, p in enumerate(known[:100_000 if quick else 200_000])]
+    for kind, path in (("text", text_path), ("index", index_path)):
+        with open_corpus(path) as corpus:
+            for name, probe in (("hit", hits), ("miss", misses)):
+                per_call = measure(lambda: [corpus.lookup(d) for d in probe], min_time)
+                results[f"breach.{lines}.{kind}.lookup_{name}.us"] = metric(
+                    per_call / len(probe) * 1e6, "µs", False)
+            per_call = measure(lambda: sum(1 for _ in audit(corpus, candidates)), min_time, 1)
+            results[f"breach.{lines}.{kind}.audit.passwords_per_s"] = metric(
+                len(candidates) / per_call, "contraseñas/s", True)
+    return results
+
+
+GROUPS = {
+    "generation": bench_generation,
+    "hashing": bench_hashing,
+    "history": bench_history,
+    "ui": bench_ui,
+    "breach": bench_breach,
+    "startup": bench_startup,
+}
+
+
+def run(groups=None, quick=False, out=None):
+    """Ejecuta los grupos indicados y retorna el documento de resultados"""
+    results = {}
+    tmp_dir = tempfile.mkdtemp(prefix="tuxcontra_bench_")
+    try:
+        for name in groups or GROUPS:
+            if out is not None:
+                print(f"⏳ {name}...", file=out, flush=True)
+            results.update(GROUPS[name](quick, tmp_dir))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return {
+        "version": FORMAT_VERSION,
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+# ============================================================================
+# COMPARACIÓN CON LA REFERENCIA
+# ============================================================================
+
+def metric_threshold(result, old, threshold=THRESHOLD):
+    """Umbral de una métrica: más amplio si es un tiempo de pocos µs"""
+    scale = TIME_UNITS.get(result["unit"])
+    if scale is not None and old * scale < SMALL_SECONDS:
+        return max(threshold, SMALL_THRESHOLD)
+    return threshold
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """
+    Compara dos documentos de resultados
+    Retorna una lista de (métrica, referencia, actual, cambio, es_regresión)
+    donde cambio > 0 siempre significa "mejor"
+    """
+    rows = []
+    base = baseline.get("results", {})
+    for key, result in current["results"].items():
+        if key not in base or not base[key]["value"]:
+            continue
+        old, new = base[key]["value"], result["value"]
+        if result["higher_is_better"]:
+            change = new / old - 1
+        else:
+            change = old / new - 1 if new else float("inf")
+        rows.append((key, old, new, change,
+                     change < -metric_threshold(result, old, threshold)))
+    return rows
+
+
+def print_results(document, out=sys.stdout):
+    """Tabla legible de los resultados"""
+    for key, result in document["results"].items():
+        print(f"  {key:<44} {result['value']:>16,.2f} {result['unit']}", file=out)
+
+
+def print_comparison(rows, threshold, out=sys.stdout):
+    """Tabla de la comparación con la referencia"""
+    print(f"\nComparación con la referencia (umbral {threshold:.0%}; "
+          f"{max(threshold, SMALL_THRESHOLD):.0%} en tiempos de menos de "
+          f"{SMALL_SECONDS * 1e6:.0f} µs):", file=out)
+    for key, old, new, change, regressed in rows:
+        mark = "❌" if regressed else ("✓" if change >= 0 else " ")
+        print(f"  {mark} {key:<44} {old:>14,.2f} → {new:>14,.2f}  {change:+7.1%}", file=out)
+
+
+def load_document(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_document(document, path):
+    """Guarda los resultados de forma atómica"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="tuxcontra_bench.py",
+        description="TuxContra - banco de pruebas de rendimiento (sin interfaz)",
+    )
+    parser.add_argument("--only", default=None,
+                        help="grupos separados por comas: " + ", ".join(GROUPS))
+    parser.add_argument("--quick", action="store_true",
+                        help="medidas más cortas y sin los casos más grandes")
+    parser.add_argument("--json", default=None, metavar="RUTA",
+                        help="guarda los resultados en JSON ('-' para stdout)")
+    parser.add_argument("--baseline", default=None, metavar="RUTA",
+                        help="referencia con la que comparar")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="guarda los resultados como nueva referencia")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"empeoramiento tolerado (por defecto {THRESHOLD})")
+    args = parser.parse_args(argv)
+
+    groups = None
+    if args.only:
+        groups = [g.strip() for g in args.only.split(",") if g.strip()]
+        unknown = [g for g in groups if g not in GROUPS]
+        if unknown:
+            parser.error(f"Grupo desconocido: {', '.join(unknown)}")
+    if args.update_baseline and not args.baseline:
+        parser.error("--update-baseline necesita --baseline")
+
+    log = sys.stderr if args.json == "-" else sys.stdout
+    document = run(groups, args.quick, out=log)
+    print_results(document, out=log)
+
+    if args.json == "-":
+        json.dump(document, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.json:
+        save_document(document, args.json)
+
+    status = 0
+    if args.baseline and os.path.exists(args.baseline) and not args.update_baseline:
+        rows = compare(document, load_document(args.baseline), args.threshold)
+        print_comparison(rows, args.threshold, out=log)
+        regressions = [row for row in rows if row[4]]
+        if regressions:
+            print(f"\n❌ {len(regressions)} regresiones", file=log)
+            status = 1
+        else:
+            print("\n✓ Sin regresiones", file=log)
+    elif args.baseline:
+        save_document(document, args.baseline)
+        print(f"\n✓ Referencia guardada en {args.baseline}", file=log)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
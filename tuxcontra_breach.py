@@ -0,0 +1,304 @@
+"""
+Auditoría de contraseñas filtradas sin conexión
+
+Comprueba contraseñas contra una copia local de un corpus de filtraciones
+en el formato de texto "HASH:veces" ordenado por SHA-1 (una línea por
+hash, como las descargas de Pwned Passwords). El archivo, de decenas de
+GB, se abre con mmap y se busca por bisección sobre desplazamientos de
+bytes: nunca se carga en memoria y solo se tocan las páginas que visita
+la búsqueda.
+
+Como los SHA-1 están repartidos de forma uniforme, la primera horquilla
+se estima por proporción (el hash 40% de grande está cerca del 40% del
+archivo) y se comprueba antes de usarla; en el caso normal la bisección
+empieza con una ventana de unos pocos KB en lugar de todo el archivo.
+
+Opcionalmente se construye un índice binario de registros fijos
+(SHA-1 de 20 bytes + veces) con una tabla por prefijo de 16 bits, que
+ocupa menos de la mitad que el texto y se busca sin analizar líneas.
+
+Las listas se auditan por lotes: se calculan los hashes del lote, se
+buscan en orden (accesos hacia delante en el archivo) y los resultados se
+entregan en el orden de entrada según se obtienen.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+
+MAGIC = b"TUXBRCH1"
+# magic, bits del prefijo de la tabla, registros
+HEADER = struct.Struct("<8sIQ")
+PREFIX_BITS = 16
+# SHA-1 y veces (se satura en 2**32 - 1)
+RECORD = struct.Struct(">20sI")
+
+HASH_HEX = 40
+# Por debajo de esta ventana (bytes) se busca con mmap.find
+SCAN_WINDOW = 4096
+# Margen de la horquilla estimada, en líneas
+BRACKET_LINES = 4096
+# Candidatas por lote de auditoría
+AUDIT_CHUNK = 4096
+
+
+def sha1_digest(password):
+    """
+    SHA-1 binario de una contraseña (UTF-8; surrogateescape recupera los
+    bytes originales de una línea leída que no era UTF-8)
+    """
+    return hashlib.sha1(password.encode("utf-8", "surrogateescape")).digest()
+
+
+# ============================================================================
+# CORPUS DE TEXTO
+# ============================================================================
+
+class TextCorpus:
+    """Archivo "HASH:veces" ordenado, buscado por bisección sobre mmap"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm = None
+        if self.size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mm, "madvise"):
+                self._mm.madvise(mmap.MADV_RANDOM)
+        first = self._mm[:HASH_HEX] if self._mm is not None else b""
+        # Los hashes pueden venir en minúsculas (se compara en el mismo caso)
+        self.lowercase = first != first.upper()
+        end = self._mm.find(b"\n") if self._mm is not None else -1
+        # Longitud típica de línea para estimar la horquilla
+        self.line_bytes = end + 1 if end > 0 else HASH_HEX + 8
+
+    def _key(self, digest):
+        key = digest.hex()
+        return (key if self.lowercase else key.upper()).encode("ascii")
+
+    def _line_start(self, lo, pos):
+        """Inicio de la línea que contiene pos (lo es inicio de línea)"""
+        return self._mm.rfind(b"\n", lo, pos) + 1 or lo
+
+    def _bracket(self, key):
+        """Horquilla (lo, hi) estimada por proporción, o None si no encierra key"""
+        mm = self._mm
+        fraction = int(key[:15], 16) / 16 ** 15
+        slack = BRACKET_LINES * self.line_bytes
+        guess = int(fraction * self.size)
+        lo = max(0, guess - slack)
+        hi = min(self.size, guess + slack)
+        if lo > 0:
+            lo = self._line_start(0, lo)
+            if mm[lo:lo + HASH_HEX] > key:
+                return None
+        if hi < self.size:
+            hi = self._line_start(lo, hi)
+            if mm[hi:hi + HASH_HEX] <= key:
+                return None
+        return lo, hi
+
+    def lookup_key(self, key):
+        """Veces que aparece el hash (texto hexadecimal en bytes); 0 si no está"""
+        mm = self._mm
+        if mm is None:
+            return 0
+        lo, hi = self._bracket(key) or (0, self.size)
+        # lo siempre es inicio de línea; hi, inicio de línea o el final
+        while hi - lo > SCAN_WINDOW:
+            start = self._line_start(lo, (lo + hi) // 2)
+            line_key = mm[start:start + HASH_HEX]
+            if line_key < key:
+                lo = mm.find(b"\n", start, hi) + 1 or hi
+            elif line_key > key:
+                hi = start
+            else:
+                lo = start
+                break
+        pos = mm.find(key, lo, hi)
+        while pos != -1 and pos != lo and mm[pos - 1] != 0x0A:
+            pos = mm.find(key, pos + 1, hi)
+        if pos == -1:
+            return 0
+        end = mm.find(b"\n", pos)
+        line = mm[pos + HASH_HEX:end if end != -1 else self.size]
+        try:
+            return int(line.strip().lstrip(b":") or 1)
+        except ValueError:
+            return 1
+
+    def lookup(self, digest):
+        """Veces que aparece un SHA-1 binario; 0 si no está"""
+        return self.lookup_key(self._key(digest))
+
+    def __iter__(self):
+        """(SHA-1 binario, veces) de cada línea, en orden"""
+        with open(self.path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                head, _, count = line.partition(b":")
+                yield bytes.fromhex(head.decode("ascii")), int(count or 1)
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# ============================================================================
+# ÍNDICE BINARIO
+# ============================================================================
+
+class BinaryCorpus:
+    """Índice de registros fijos con tabla por prefijo, buscado sobre mmap"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(self._mm, "madvise"):
+            self._mm.madvise(mmap.MADV_RANDOM)
+        magic, self.prefix_bits, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Índice de filtraciones no válido: {path}")
+        buckets = 1 << self.prefix_bits
+        table_end = HEADER.size + 8 * (buckets + 1)
+        # La tabla (512 KB con 16 bits) se copia a un array: se consulta siempre
+        self._table = array("Q")
+        self._table.frombytes(self._mm[HEADER.size:table_end])
+        if struct.pack("=H", 1) != struct.pack("<H", 1):
+            self._table.byteswap()
+        self._records = table_end
+        if len(self._mm) < table_end + self.count * RECORD.size:
+            self.close()
+            raise ValueError(f"Índice de filtraciones truncado: {path}")
+
+    def lookup(self, digest):
+        """Veces que aparece un SHA-1 binario; 0 si no está"""
+        bucket = int.from_bytes(digest[:4], "big") >> (32 - self.prefix_bits)
+        lo, hi = self._table[bucket], self._table[bucket + 1]
+        mm, base, size = self._mm, self._records, RECORD.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = base + mid * size
+            key = mm[offset:offset + 20]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return RECORD.unpack_from(mm, offset)[1]
+        return 0
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def build_index(text_path, index_path, prefix_bits=PREFIX_BITS):
+    """
+    Convierte un corpus de texto ordenado en un índice binario
+    Retorna el número de registros; falla si el texto no está ordenado
+    """
+    buckets = 1 << prefix_bits
+    counts = array("Q", bytes(8 * buckets))
+    shift = 32 - prefix_bits
+    tmp_path = index_path + ".tmp"
+    total = 0
+    previous = b""
+    with TextCorpus(text_path) as corpus, open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, prefix_bits, 0))
+        out.write(bytes(8 * (buckets + 1)))
+        pack = RECORD.pack
+        batch = []
+        for digest, count in corpus:
+            if digest <= previous:
+                raise ValueError(f"El corpus no está ordenado o tiene repetidos "
+                                 f"(línea {total + 1})")
+            previous = digest
+            counts[int.from_bytes(digest[:4], "big") >> shift] += 1
+            batch.append(pack(digest, min(count, 0xFFFFFFFF)))
+            total += 1
+            if len(batch) >= 65536:
+                out.write(b"".join(batch))
+                batch.clear()
+        out.write(b"".join(batch))
+        # Tabla de inicios: registro donde empieza cada prefijo
+        table = array("Q", [0])
+        running = 0
+        for n in counts:
+            running += n
+            table.append(running)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, prefix_bits, total))
+        out.write(struct.pack(f"<{buckets + 1}Q", *table))
+    os.replace(tmp_path, index_path)
+    return total
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+def open_corpus(path):
+    """Abre un corpus de texto o un índice binario (según su cabecera)"""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        return BinaryCorpus(path)
+    return TextCorpus(path)
+
+
+def audit(corpus, passwords, chunk=AUDIT_CHUNK):
+    """
+    Genera (contraseña, veces) para cada contraseña, en el orden de entrada
+
+    Se trabaja por lotes de `chunk`: los hashes del lote se calculan de una
+    vez y se buscan ordenados para que los accesos al archivo avancen
+    siempre hacia delante.
+    """
+    batch = []
+    for password in passwords:
+        batch.append(password)
+        if len(batch) >= chunk:
+            yield from _audit_batch(corpus, batch)
+            batch = []
+    if batch:
+        yield from _audit_batch(corpus, batch)
+
+
+def _audit_batch(corpus, batch):
+    digests = [sha1_digest(p) for p in batch]
+    results = {}
+    for digest in sorted(set(digests)):
+        results[digest] = corpus.lookup(digest)
+    for password, digest in zip(batch, digests):
+        yield password, results[digest]
+
+
+def is_breached(corpus, password):
+    """Veces que aparece la contraseña en el corpus (0 si no está)"""
+    return corpus.lookup(sha1_digest(password))
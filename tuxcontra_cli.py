@@ -0,0 +1,540 @@
+"""
+Modo consola de TuxContra
+
+Genera contraseñas por lotes y las escribe en stdout o en un archivo sin
+arrancar la interfaz. Este módulo nunca importa tkinter ni pyperclip.
+
+Ejemplos:
+    python tuxcontra.py --count 1000000 --length 32 --charset lower,upper,digits --out claves.txt
+    python tuxcontra.py --count 10000000 --workers 0 --unordered --out claves.txt
+    python tuxcontra.py --keyfile clave.bin --size 10G --stats
+    python tuxcontra.py --benchmark --length 32
+    python tuxcontra.py --count 100 --policy min-digits=2,min-symbols=1,no-ambiguous,start=letter
+    python tuxcontra.py --serve --port 8765
+    python tuxcontra.py --count 1000000 --fields password,entropy --out lote.csv.gz
+    python tuxcontra.py --import tuxcontra_history.jsonl --out historial.csv
+    python tuxcontra.py --count 1000000 --template Cvcc-dddd-ssss --out codigos.txt
+    python tuxcontra.py --seed-file semilla.bin --count 1000000 --workers 0 --out fixtures.txt
+    python tuxcontra.py --seed-file semilla.bin --start 734221 --count 1
+    python tuxcontra.py --breach pwned-passwords-sha1-ordered-by-hash.txt --audit lista.txt
+    python tuxcontra.py --breach pwned.txt --build-index pwned.idx
+"""
+
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+from tuxcontra_batch import benchmark_scaling, iter_line_blocks
+from tuxcontra_batch import iter_passwords as iter_batch_passwords
+from tuxcontra_breach import audit, build_index, open_corpus
+from tuxcontra_engine import CHARSETS, charset_from_names, compile_charset
+from tuxcontra_export import (FIELDS, FORMATS, batch_entries, detect_format,
+                              export_entries, import_entries, parse_fields, write_entries)
+from tuxcontra_keyfile import parse_size, write_checksum, write_keyfile
+from tuxcontra_policy import compile_policy, iter_passwords, parse_policy, policy_entropy
+from tuxcontra_seeded import MIN_SEED_BYTES, batch_context, derive_key, read_seed_file, self_test
+from tuxcontra_seeded import iter_line_blocks as iter_seeded_blocks
+from tuxcontra_seeded import iter_passwords as iter_seeded_passwords
+from tuxcontra_strength import theoretical_entropy
+from tuxcontra_template import compile_template
+from tuxcontra_template import iter_passwords as iter_template_passwords
+
+# Opciones que no activan el modo consola (las interpreta la interfaz)
+GUI_FLAGS = {"--startup-profile", "--metrics"}
+
+# Caracteres generados por bloque en la comparativa
+BLOCK_CHARS = 1 << 20
+WRITE_BUFFER = 1 << 20
+# Contraseñas con política por bloque de escritura
+POLICY_LINES = 4096
+
+
+def wants_cli(argv):
+    """Indica si los argumentos piden el modo consola"""
+    return any(arg not in GUI_FLAGS for arg in argv)
+
+
+def build_parser():
+    """Crea el analizador de argumentos"""
+    parser = argparse.ArgumentParser(
+        prog="tuxcontra.py",
+        description="TuxContra - generación de contraseñas por lotes sin interfaz",
+    )
+    parser.add_argument("-n", "--count", type=int, default=1,
+                        help="número de contraseñas a generar (por defecto 1)")
+    parser.add_argument("-l", "--length", type=int, default=16,
+                        help="longitud de cada contraseña (por defecto 16)")
+    parser.add_argument("-c", "--charset", default=",".join(CHARSETS),
+                        help="tipos de caracteres separados por comas: "
+                             + ", ".join(CHARSETS))
+    parser.add_argument("--chars", default=None,
+                        help="alfabeto personalizado (sustituye a --charset)")
+    parser.add_argument("--policy", default=None, metavar="REGLAS",
+                        help="reglas separadas por comas: min-lower/min-upper/min-digits/"
+                             "min-symbols=N, max-repeat=N, no-ambiguous, exclude=CARACTERES, "
+                             "start=letter|lower|upper|digits|symbols")
+    parser.add_argument("--template", default=None, metavar="PLANTILLA",
+                        help="formato fijo, p. ej. Cvcc-dddd-ssss o La{15}: l/u/L letras, d dígito, "
+                             "s símbolo, a alfanumérico, x cualquiera, v/c vocal/consonante, "
+                             "h hexadecimal, [abc] conjunto, {n} repetición, \\X literal "
+                             "(sustituye a --length y --charset)")
+    parser.add_argument("-o", "--out", default="-",
+                        help="archivo de salida ('-' para stdout)")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="formato de salida (por defecto según la extensión de --out: "
+                             ".jsonl, .csv, con .gz o .xz para comprimir; si no, texto)")
+    parser.add_argument("--fields", default=",".join(FIELDS),
+                        help="campos exportados en jsonl/csv, separados por comas: "
+                             + ", ".join(FIELDS))
+    parser.add_argument("--csv-protect-passwords", action="store_true",
+                        help="en csv, antepone un apóstrofo a las contraseñas que una hoja "
+                             "de cálculo leería como fórmula (= + - @); el archivo deja de "
+                             "tener las claves exactas e importarlo requiere esta opción")
+    parser.add_argument("--import", dest="import_path", default=None, metavar="RUTA",
+                        help="lee las entradas de una exportación o del diario del "
+                             "historial en lugar de generarlas ('-' para stdin)")
+    parser.add_argument("--seed", default=None, metavar="TEXTO",
+                        help="modo reproducible: la misma semilla y opciones dan el mismo lote "
+                             "(mejor --seed-file: la línea de órdenes es visible para otros)")
+    parser.add_argument("--seed-file", default=None, metavar="RUTA",
+                        help="lee la semilla del modo reproducible de un archivo")
+    parser.add_argument("--start", type=int, default=0,
+                        help="con semilla, índice de la primera contraseña (por defecto 0)")
+    parser.add_argument("--self-test", action="store_true",
+                        help="comprueba los valores conocidos del modo reproducible")
+    parser.add_argument("--breach", default=None, metavar="CORPUS",
+                        help="corpus local de filtraciones: texto HASH:veces ordenado por SHA-1 "
+                             "o índice creado con --build-index")
+    parser.add_argument("--audit", default=None, metavar="LISTA",
+                        help="con --breach, escribe en --out las contraseñas de LISTA que aparecen "
+                             "(veces<TAB>contraseña); una por línea, .jsonl/.csv o '-' para stdin")
+    parser.add_argument("--build-index", default=None, metavar="RUTA",
+                        help="con --breach, crea un índice binario del corpus de texto en RUTA")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="procesos de generación (0 = todos los núcleos, por defecto 1)")
+    parser.add_argument("--unordered", action="store_true",
+                        help="con varios procesos, escribe los bloques según terminan")
+    parser.add_argument("--keyfile", default=None, metavar="RUTA",
+                        help="genera un archivo de clave por bloques en RUTA")
+    parser.add_argument("--size", default="4K",
+                        help="tamaño del archivo de clave: 4096, 64K, 10M, 2G... (por defecto 4K)")
+    parser.add_argument("--text", action="store_true",
+                        help="archivo de clave de texto con el alfabeto elegido (por defecto, bytes crudos)")
+    parser.add_argument("--stats", action="store_true",
+                        help="muestra tiempo y velocidad en stderr al terminar")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="compara el motor con el método anterior carácter a carácter")
+    parser.add_argument("--bench-scaling", action="store_true",
+                        help="mide el escalado de 1 a --workers procesos (0 = todos)")
+    parser.add_argument("--serve", action="store_true",
+                        help="servicio local de generación por HTTP en 127.0.0.1 (o --unix)")
+    parser.add_argument("--port", type=int, default=8765,
+                        help="puerto del servicio en 127.0.0.1 (por defecto 8765)")
+    parser.add_argument("--unix", default=None, metavar="RUTA",
+                        help="atiende en un socket Unix en lugar de TCP")
+    parser.add_argument("--max-per-client", type=int, default=8,
+                        help="peticiones en curso por conexión (por defecto 8)")
+    return parser
+
+
+# ============================================================================
+# ESCRITURA POR BLOQUES
+# ============================================================================
+
+def iter_policy_blocks(count, length, charset, policy):
+    """Bloques de contraseñas con política, una por línea (en este proceso)"""
+    passwords = iter_passwords(count, policy, length, charset)
+    while count > 0:
+        n = min(POLICY_LINES, count)
+        lines = [next(passwords) for _ in range(n)]
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+        count -= n
+
+
+def iter_template_blocks(count, template):
+    """Bloques de códigos con plantilla, uno por línea (en este proceso)"""
+    plan = compile_template(template)
+    per_block = max(1, BLOCK_CHARS // (plan.length + 1))
+    while count > 0:
+        n = min(per_block, count)
+        yield plan.lines(n).encode("utf-8")
+        count -= n
+
+
+def write_passwords(stream, count, length, charset, workers=1, ordered=True, policy=None,
+                    seed_key=None, start=0, template=None):
+    """
+    Escribe count contraseñas en un flujo binario y retorna los bytes escritos
+    Con seed_key se escriben las contraseñas start.. del lote reproducible
+    """
+    written = 0
+    if seed_key is not None:
+        blocks = iter_seeded_blocks(seed_key, start, count, length, charset, policy, workers,
+                                    template)
+    elif template is not None:
+        blocks = iter_template_blocks(count, template)
+    elif policy is not None:
+        blocks = iter_policy_blocks(count, length, charset, policy)
+    else:
+        blocks = iter_line_blocks(count, length, charset, workers, ordered)
+    for block in blocks:
+        stream.write(block)
+        written += len(block)
+    stream.flush()
+    return written
+
+
+# ============================================================================
+# EXPORTACIÓN
+# ============================================================================
+
+def iter_entry_blocks(entries):
+    """Contraseñas de entries en bloques, una por línea (salida de texto)"""
+    lines = []
+    for entry in entries:
+        lines.append(str(entry.get("password", "")))
+        if len(lines) >= POLICY_LINES:
+            lines.append("")
+            yield "\n".join(lines).encode("utf-8")
+            lines.clear()
+    if lines:
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+def generated_entries(args, charset, policy, workers, ordered, seed_key=None, template=None):
+    """Entradas del lote pedido con --count (se generan según se escriben)"""
+    if seed_key is not None:
+        passwords = iter_seeded_passwords(seed_key, args.start, args.count, args.length,
+                                          charset, policy, workers, template)
+    elif template is not None:
+        passwords = iter_template_passwords(args.count, template)
+    elif policy is not None:
+        passwords = iter_passwords(args.count, policy, args.length, charset)
+    else:
+        passwords = iter_batch_passwords(args.count, args.length, charset, workers, ordered)
+    if template is not None:
+        entropy = compile_template(template).entropy()
+    elif policy is not None:
+        entropy = policy_entropy(policy, args.length, charset)
+    else:
+        entropy = theoretical_entropy(args.length, len(charset))
+    return batch_entries(passwords, entropy)
+
+
+def run_export(args, entries, fmt, fields):
+    """Escribe entries en --out como jsonl/csv (o texto si fmt es None)"""
+    if args.out != "-":
+        return export_entries(entries, args.out, fields, fmt, args.csv_protect_passwords)
+    if fmt is None:
+        count = 0
+        for block in iter_entry_blocks(entries):
+            sys.stdout.buffer.write(block)
+            count += block.count(b"\n")
+        sys.stdout.buffer.flush()
+        return count
+    return write_entries(sys.stdout.buffer, entries, fields, fmt, args.csv_protect_passwords)
+
+
+# ============================================================================
+# AUDITORÍA DE FILTRACIONES
+# ============================================================================
+
+def iter_audit_candidates(path, protect_passwords=False):
+    """Contraseñas a auditar: exportación jsonl/csv o una por línea ('-' para stdin)"""
+    if path != "-" and detect_format(path)[0] is not None:
+        for entry in import_entries(path, protect_passwords=protect_passwords):
+            if entry.get("password"):
+                yield str(entry["password"])
+        return
+    # surrogateescape: una línea que no es UTF-8 se audita con sus bytes tal cual
+    if path == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="surrogateescape")
+    else:
+        f = open(path, "r", encoding="utf-8", errors="surrogateescape")
+    with f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line:
+                yield line
+
+
+def run_audit(args, parser):
+    """Audita --audit contra el corpus --breach (o crea el índice con --build-index)"""
+    if not os.path.isfile(args.breach):
+        parser.error(f"No existe el corpus: {args.breach}")
+    if args.build_index:
+        start = time.perf_counter()
+        try:
+            total = build_index(args.breach, args.build_index)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error creando el índice: {e}", file=sys.stderr)
+            return 1
+        print(f"✓ Índice con {total:,} hashes en {args.build_index} "
+              f"({time.perf_counter() - start:.1f} s)", file=sys.stderr)
+        return 0
+    if args.audit != "-" and not os.path.isfile(args.audit):
+        parser.error(f"No existe el archivo: {args.audit}")
+
+    checked = hits = 0
+    start = time.perf_counter()
+    try:
+        with open_corpus(args.breach) as corpus:
+            out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb",
+                                                                 buffering=WRITE_BUFFER)
+            try:
+                lines = []
+                candidates = iter_audit_candidates(args.audit, args.csv_protect_passwords)
+                for password, count in audit(corpus, candidates):
+                    checked += 1
+                    if count:
+                        hits += 1
+                        lines.append(f"{count}\t{password}\n")
+                        if len(lines) >= POLICY_LINES:
+                            out.write("".join(lines).encode("utf-8", "surrogateescape"))
+                            lines.clear()
+                out.write("".join(lines).encode("utf-8", "surrogateescape"))
+                out.flush()
+            finally:
+                if out is not sys.stdout.buffer:
+                    out.close()
+    except BrokenPipeError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"❌ Error auditando: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{'⚠️' if hits else '✓'} {hits:,} de {checked:,} contraseñas aparecen "
+          f"en filtraciones", file=sys.stderr)
+    if args.stats:
+        rate = checked / elapsed if elapsed else float("inf")
+        print(f"✓ {checked:,} contraseñas en {elapsed:.2f} s - {rate:,.0f} contraseñas/s",
+              file=sys.stderr)
+    return 0
+
+
+# ============================================================================
+# COMPARATIVA
+# ============================================================================
+
+def legacy_generate(length, charset):
+    """Método anterior: random.choice carácter a carácter (solo para comparar)"""
+    return ''.join(random.choice(charset) for _ in range(length))
+
+
+def benchmark(length, charset, seconds=1.0, out=sys.stdout):
+    """Compara caracteres por segundo del motor frente al método anterior"""
+    alphabet = compile_charset(charset)
+
+    def measure(func):
+        count = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < seconds:
+            func()
+            count += 1
+            elapsed = time.perf_counter() - start
+        return count, elapsed
+
+    legacy_count, legacy_time = measure(lambda: legacy_generate(length, charset))
+    per_call = max(1, BLOCK_CHARS // max(1, length))
+    engine_count, engine_time = measure(lambda: alphabet.draw(per_call * length, os.urandom))
+    engine_count *= per_call
+
+    legacy_rate = legacy_count * length / legacy_time
+    engine_rate = engine_count * length / engine_time
+    print(f"Longitud {length}, alfabeto de {len(charset)} caracteres", file=out)
+    print(f"  random.choice:  {legacy_rate:>14,.0f} chars/s  "
+          f"{legacy_count / legacy_time:>12,.0f} contraseñas/s", file=out)
+    print(f"  motor CSPRNG:   {engine_rate:>14,.0f} chars/s  "
+          f"{engine_count / engine_time:>12,.0f} contraseñas/s", file=out)
+    print(f"  mejora: x{engine_rate / legacy_rate:,.1f}", file=out)
+    return {"legacy_chars_per_sec": legacy_rate, "engine_chars_per_sec": engine_rate}
+
+
+# ============================================================================
+# ARCHIVOS DE CLAVE
+# ============================================================================
+
+def run_keyfile(args, charset, parser):
+    """Genera el archivo de clave pedido con --keyfile"""
+    try:
+        size = parse_size(args.size)
+        written, hexdigest, elapsed = write_keyfile(args.keyfile, size, charset)
+        checksum_path = write_checksum(args.keyfile, hexdigest)
+    except ValueError as e:
+        parser.error(str(e))
+    except OSError as e:
+        print(f"❌ Error escribiendo el archivo de clave: {e}", file=sys.stderr)
+        return 1
+    print(f"{hexdigest}  {args.keyfile}")
+    if args.stats:
+        rate = written / elapsed / 2**20 if elapsed else float("inf")
+        print(f"✓ {written:,} bytes en {elapsed:.2f} s - {rate:,.1f} MB/s "
+              f"(suma en {checksum_path})", file=sys.stderr)
+    return 0
+
+
+# ============================================================================
+# FUNCIÓN PRINCIPAL
+# ============================================================================
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.count < 0:
+        parser.error("--count no puede ser negativo")
+    if args.length < 0:
+        parser.error("--length no puede ser negativa")
+
+    try:
+        # --chars sin repetidos: un carácter repetido saldría más a menudo
+        # que los demás y la entropía informada no sería la real
+        charset = ("".join(dict.fromkeys(args.chars)) if args.chars
+                   else charset_from_names(args.charset))
+    except ValueError as e:
+        parser.error(str(e))
+    if not charset:
+        parser.error("Selecciona al menos un tipo de carácter")
+
+    if "\n" in charset:
+        parser.error("El alfabeto no puede contener saltos de línea")
+    if args.workers < 0:
+        parser.error("--workers no puede ser negativo")
+    workers = args.workers or os.cpu_count() or 1
+
+    policy = None
+    if args.policy:
+        try:
+            policy = parse_policy(args.policy)
+            compile_policy(policy, charset, args.length)
+        except ValueError as e:
+            parser.error(str(e))
+
+    template = None
+    if args.template:
+        if policy is not None:
+            parser.error("Usa --policy o --template, no los dos")
+        try:
+            args.length = compile_template(args.template).length
+        except ValueError as e:
+            parser.error(str(e))
+        template = args.template
+
+    if args.self_test:
+        failures = self_test()
+        for failure in failures:
+            print(f"❌ {failure}", file=sys.stderr)
+        if failures:
+            return 1
+        print("✓ Modo reproducible: valores conocidos correctos")
+        return 0
+
+    seed_key = None
+    if args.seed is not None or args.seed_file:
+        if args.seed is not None and args.seed_file:
+            parser.error("Usa --seed o --seed-file, no los dos")
+        if args.serve or args.keyfile or args.import_path:
+            parser.error("--seed solo se usa al generar lotes de contraseñas")
+        if args.start < 0:
+            parser.error("--start no puede ser negativo")
+        try:
+            seed = args.seed.encode("utf-8") if args.seed is not None else read_seed_file(args.seed_file)
+            seed_key = derive_key(seed, batch_context(args.length, charset, policy, template))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if len(seed) < MIN_SEED_BYTES:
+            print(f"⚠️ La semilla tiene menos de {MIN_SEED_BYTES} bytes: "
+                  f"las contraseñas son tan fáciles de adivinar como ella", file=sys.stderr)
+    elif args.start:
+        parser.error("--start solo se usa con --seed o --seed-file")
+
+    if args.audit or args.build_index:
+        if not args.breach:
+            parser.error("--audit y --build-index necesitan --breach CORPUS")
+        return run_audit(args, parser)
+    if args.breach:
+        parser.error("--breach se usa con --audit o --build-index")
+
+    if args.serve:
+        if args.max_per_client < 1:
+            parser.error("--max-per-client debe ser al menos 1")
+        # Se importa aquí: asyncio solo hace falta en este modo
+        from tuxcontra_server import serve
+        return serve(args.port, args.unix, args.max_per_client)
+    if args.keyfile:
+        return run_keyfile(args, charset if args.text else None, parser)
+    if args.benchmark:
+        benchmark(args.length or 16, charset)
+        return 0
+    if args.bench_scaling:
+        count = args.count if args.count > 1 else 1_000_000
+        print(f"Escalado: {count:,} contraseñas de {args.length} caracteres")
+        benchmark_scaling(count, args.length, charset, workers, out=sys.stdout)
+        return 0
+
+    ordered = not args.unordered
+    try:
+        fields = parse_fields(args.fields)
+        fmt = args.format
+        if args.out != "-":
+            fmt = detect_format(args.out, fmt)[0]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.import_path or fmt is not None:
+        if args.import_path:
+            if args.import_path != "-" and not os.path.isfile(args.import_path):
+                parser.error(f"No existe el archivo: {args.import_path}")
+            entries = import_entries(args.import_path,
+                                     protect_passwords=args.csv_protect_passwords)
+        else:
+            entries = generated_entries(args, charset, policy, workers, ordered, seed_key,
+                                        template)
+        start = time.perf_counter()
+        try:
+            count = run_export(args, entries, fmt, fields)
+        except BrokenPipeError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"❌ Error exportando: {e}", file=sys.stderr)
+            return 1
+        elapsed = time.perf_counter() - start
+        if args.stats:
+            rate = count / elapsed if elapsed else float("inf")
+            print(f"✓ {count:,} entradas en {elapsed:.2f} s - {rate:,.0f} entradas/s",
+                  file=sys.stderr)
+        return 0
+
+    start = time.perf_counter()
+    try:
+        if args.out == "-":
+            written = write_passwords(sys.stdout.buffer, args.count, args.length,
+                                      charset, workers, ordered, policy, seed_key, args.start,
+                                      template)
+        else:
+            with open(args.out, "wb", buffering=WRITE_BUFFER) as f:
+                written = write_passwords(f, args.count, args.length, charset,
+                                          workers, ordered, policy, seed_key, args.start,
+                                          template)
+    except BrokenPipeError:
+        # La salida se cortó (por ejemplo con head); no es un error
+        return 0
+    except OSError as e:
+        print(f"❌ Error escribiendo la salida: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+
+    if args.stats:
+        rate = args.count / elapsed if elapsed else float("inf")
+        print(f"✓ {args.count:,} contraseñas ({written:,} bytes) en {elapsed:.2f} s "
+              f"- {rate:,.0f} contraseñas/s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Portapapeles de TuxContra
+
+Las copias no bloquean la interfaz y el portapapeles se borra solo pasado
+un tiempo, si todavía contiene lo que copió TuxContra.
+
+Hay dos tipos de backend:
+- TkClipboard usa clipboard_append de la propia ventana: no lanza ningún
+  proceso. El contenido se sustituye en una sola llamada (borrar y añadir
+  sin volver al bucle de Tk entre medias), así que otra aplicación que
+  pegue nunca ve una copia a medias; convertir el texto a Tcl cuesta unos
+  15 ms con 10M caracteres ASCII (unos 45 ms fuera de latin-1), una pausa
+  única y corta.
+- Los backends con `threaded = True` (PyperclipClipboard, que en Linux
+  lanza xclip/xsel por cada copia) se ejecutan en un hilo propio; solo
+  cuenta la última petición.
+
+El backend se inyecta, así que Clipboard se puede probar con uno falso
+sin pantalla.
+"""
+
+import hashlib
+import time
+
+from tuxcontra_jobs import GenerationScheduler
+from tuxcontra_metrics import metrics
+
+# Segundos hasta borrar el portapapeles (0 = no borrar)
+CLEAR_AFTER = 30
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest()
+
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class TkClipboard:
+    """Portapapeles de Tk (se usa desde el hilo de la interfaz)"""
+
+    threaded = False
+
+    def __init__(self, root):
+        self.root = root
+
+    def clear(self):
+        self.root.clipboard_clear()
+
+    def set(self, text):
+        """Sustituye el contenido de una vez (nadie puede pegar entre medias)"""
+        self.root.clipboard_clear()
+        self.root.clipboard_append(text)
+
+    def paste(self):
+        """Contenido actual o None si no hay texto"""
+        try:
+            return self.root.clipboard_get()
+        except Exception:
+            return None
+
+
+class PyperclipClipboard:
+    """Portapapeles de pyperclip (se usa desde un hilo propio)"""
+
+    threaded = True
+
+    def __init__(self, loader):
+        # loader() retorna el módulo pyperclip o None (se carga al usarlo)
+        self.loader = loader
+
+    def _module(self):
+        module = self.loader()
+        if module is None:
+            raise RuntimeError("pyperclip no está disponible")
+        return module
+
+    def copy(self, text):
+        self._module().copy(text)
+
+    def clear(self):
+        self._module().copy("")
+
+    def paste(self):
+        try:
+            return self._module().paste()
+        except Exception:
+            return None
+
+
+# ============================================================================
+# GESTOR
+# ============================================================================
+
+class Clipboard:
+    """
+    Copias sin bloquear y borrado automático
+
+    schedule(ms, func) / cancel(id) programan llamadas en el hilo de la
+    interfaz (root.after / root.after_cancel). post(func, *args) entrega
+    resultados desde el hilo del backend (UIChannel.post_call).
+    on_done(ok, error) se llama siempre en el hilo de la interfaz.
+    """
+
+    def __init__(self, backend, schedule, cancel, post, clear_after=CLEAR_AFTER):
+        self.backend = backend
+        self.schedule = schedule
+        self.cancel = cancel
+        self.post = post
+        self.clear_after = clear_after
+        self._clear_id = None
+        self._copy_id = 0
+        # Huella de lo último copiado (no se guarda el texto)
+        self._copied = None
+        self._worker = None
+        if backend.threaded:
+            self._worker = GenerationScheduler(self._run, debounce=0.0,
+                                               name="tuxcontra-portapapeles")
+
+    # ------------------------------------------------------------------------
+    # Copiar
+    # ------------------------------------------------------------------------
+
+    def copy(self, text, on_done=None):
+        """Copia text sin bloquear; la copia anterior pendiente se descarta"""
+        self._copy_id += 1
+        copy_id = self._copy_id
+        self._cancel_clear()
+        started = time.perf_counter()
+        if self._worker is not None:
+            self._worker.submit({"op": "copy", "text": text, "id": copy_id,
+                                 "on_done": on_done, "started": started})
+            return
+        error = None
+        try:
+            self.backend.set(text)
+        except Exception as e:
+            error = e
+        self._finished(copy_id, text, on_done, started, error)
+
+    def _run(self, job):
+        """Hilo del backend: ejecuta una petición"""
+        request = job.request
+        if request["op"] == "clear":
+            # Nadie espera el resultado de un borrado: si falla, se ignora
+            # (igual que con el backend de Tk)
+            try:
+                current = self.backend.paste()
+                if current is not None and _digest(current) == request["digest"]:
+                    self.backend.clear()
+            except Exception:
+                pass
+            return
+        error = None
+        try:
+            self.backend.copy(request["text"])
+        except Exception as e:
+            error = e
+        self.post(self._finished, request["id"], request["text"], request["on_done"],
+                  request["started"], error)
+
+    def _finished(self, copy_id, text, on_done, started, error):
+        """Fin de una copia (en el hilo de la interfaz)"""
+        if copy_id != self._copy_id:
+            return
+        metrics.observe("clipboard", time.perf_counter() - started)
+        if error is None:
+            self._copied = _digest(text)
+            if self.clear_after:
+                self._clear_id = self.schedule(int(self.clear_after * 1000), self.clear_if_ours)
+        if on_done is not None:
+            on_done(error is None, error)
+
+    # ------------------------------------------------------------------------
+    # Borrado automático
+    # ------------------------------------------------------------------------
+
+    def _cancel_clear(self):
+        if self._clear_id is not None:
+            self.cancel(self._clear_id)
+            self._clear_id = None
+
+    def clear_if_ours(self):
+        """Borra el portapapeles si todavía contiene lo que copiamos"""
+        self._clear_id = None
+        digest, self._copied = self._copied, None
+        if digest is None:
+            return
+        if self._worker is not None:
+            self._worker.submit({"op": "clear", "digest": digest})
+            return
+        current = self.backend.paste()
+        if current is not None and _digest(current) == digest:
+            try:
+                self.backend.clear()
+            except Exception:
+                pass
+
+    @property
+    def pending_clear(self):
+        """Hay un borrado programado"""
+        return self._clear_id is not None
+
+    def close(self, timeout=1.0):
+        """Al salir: borra ya lo copiado (si sigue ahí) y detiene el hilo"""
+        if self._clear_id is not None:
+            self._cancel_clear()
+            self.clear_if_ours()
+        if self._worker is not None:
+            # Se espera a que termine el borrado antes de cerrar el hilo
+            deadline = time.monotonic() + timeout
+            while self._worker.busy and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self._worker.close(max(0.0, deadline - time.monotonic()))
@@ -0,0 +1,201 @@
+"""
+Índice persistente de contraseñas ya generadas (filtro de Bloom en mmap)
+
+Sustituye al conjunto de hashes hexadecimales en memoria. El índice guarda
+solo bits en un archivo de tamaño fijo del directorio de datos, se abre
+con mmap (carga en tiempo constante, sin leer el archivo) y sobrevive
+entre sesiones. La tasa de falsos positivos se elige al crearlo: un falso
+positivo solo provoca que se descarte y regenere una contraseña nueva.
+
+Es un filtro "por bloques": todos los bits de un digest caen en el mismo
+bloque de 64 bytes, así que cada consulta lee un solo bloque y lo compara
+con una máscara en una única operación.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b"TUXBLOOM"
+VERSION = 1
+# magic, versión, bits, funciones hash, entradas añadidas
+HEADER = struct.Struct("<8sIQIQ")
+
+BLOCK_BYTES = 64
+BLOCK_BITS = BLOCK_BYTES * 8
+# Bits del digest disponibles para posiciones (256 - 64 del bloque) / 9 bits
+MAX_HASHES = 21
+
+
+def password_digest(password):
+    """Digest SHA-256 binario de una contraseña"""
+    return hashlib.sha256(password.encode("utf-8")).digest()
+
+
+def bloom_parameters(capacity, error_rate):
+    """Calcula (bits, funciones hash) óptimos para capacidad y tasa de error"""
+    if capacity <= 0 or not 0 < error_rate < 1:
+        raise ValueError("Capacidad o tasa de error no válidas")
+    bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+    # Margen para compensar el reparto por bloques
+    bits = math.ceil(bits * 1.5 / BLOCK_BITS) * BLOCK_BITS
+    hashes = min(MAX_HASHES, max(1, round(bits / capacity * math.log(2))))
+    return bits, hashes
+
+
+class DigestIndex:
+    """
+    Filtro de Bloom por bloques sobre un archivo mapeado en memoria
+
+    El bloque y las posiciones dentro de él se sacan del propio digest
+    SHA-256 (64 bits para el bloque y 9 bits por posición), así que no
+    hace falta volver a hashear.
+    """
+
+    def __init__(self, path, capacity=1_000_000, error_rate=1e-6):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            self._create(path, *bloom_parameters(capacity, error_rate))
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.bits, self.hashes, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Índice no válido: {path}")
+        self.blocks = self.bits // BLOCK_BITS
+        if len(self._mm) < HEADER.size + self.bits // 8:
+            self.close()
+            raise ValueError(f"Índice truncado: {path}")
+
+    @staticmethod
+    def _create(path, bits, hashes):
+        """Crea un índice vacío (archivo disperso con la cabecera)"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, bits, hashes, 0))
+            f.truncate(HEADER.size + bits // 8)
+        os.replace(tmp_path, path)
+
+    def _locate(self, digest):
+        """Retorna (desplazamiento del bloque, máscara) para un digest"""
+        block = int.from_bytes(digest[0:8], "little") % self.blocks
+        rest = int.from_bytes(digest[8:32], "little")
+        mask = 0
+        for _ in range(self.hashes):
+            mask |= 1 << (rest & (BLOCK_BITS - 1))
+            rest >>= 9
+        return HEADER.size + block * BLOCK_BYTES, mask
+
+    def __contains__(self, digest):
+        offset, mask = self._locate(digest)
+        block = int.from_bytes(self._mm[offset:offset + BLOCK_BYTES], "little")
+        return block & mask == mask
+
+    def add(self, digest):
+        """Añade un digest; retorna True si no estaba ya en el índice"""
+        offset, mask = self._locate(digest)
+        mm = self._mm
+        block = int.from_bytes(mm[offset:offset + BLOCK_BYTES], "little")
+        if block & mask == mask:
+            return False
+        mm[offset:offset + BLOCK_BYTES] = (block | mask).to_bytes(BLOCK_BYTES, "little")
+        self.count += 1
+        struct.pack_into("<Q", mm, HEADER.size - 8, self.count)
+        return True
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """Borra todas las entradas"""
+        size = self.bits // 8
+        block = bytes(min(size, 1 << 20))
+        offset = HEADER.size
+        end = HEADER.size + size
+        while offset < end:
+            n = min(len(block), end - offset)
+            self._mm[offset:offset + n] = block[:n]
+            offset += n
+        self.count = 0
+        struct.pack_into("<Q", self._mm, HEADER.size - 8, 0)
+
+    def flush(self):
+        """Vuelca los cambios al disco"""
+        self._mm.flush()
+
+    def close(self):
+        """Cierra el índice"""
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ============================================================================
+# COMPARATIVA
+# ============================================================================
+
+def benchmark(path, entries=10_000_000, error_rate=1e-6, lookups=100_000, out=None):
+    """
+    Mide tamaño, tiempo de apertura e inserción/consulta con `entries` entradas
+    Compara la memoria con el antiguo set de hashes hexadecimales
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    index = DigestIndex(path, capacity=entries, error_rate=error_rate)
+
+    start = time.perf_counter()
+    for i in range(entries):
+        index.add(hashlib.sha256(i.to_bytes(8, "little")).digest())
+    insert_time = time.perf_counter() - start
+    index.close()
+
+    start = time.perf_counter()
+    index = DigestIndex(path)
+    open_time = time.perf_counter() - start
+
+    probes = [hashlib.sha256(b"x" + i.to_bytes(8, "little")).digest() for i in range(lookups)]
+    start = time.perf_counter()
+    false_positives = sum(1 for d in probes if d in index)
+    lookup_time = time.perf_counter() - start
+    index.close()
+
+    # Un str hexadecimal de 64 caracteres ocupa 113 bytes más ~35 por hueco del set
+    legacy_bytes = entries * (113 + 35)
+    results = {
+        "entries": entries,
+        "index_bytes": os.path.getsize(path),
+        "legacy_set_bytes_estimate": legacy_bytes,
+        "open_ms": open_time * 1000,
+        "insert_us": insert_time / entries * 1e6,
+        "lookup_us": lookup_time / lookups * 1e6,
+        "false_positive_rate": false_positives / lookups,
+    }
+    if out is not None:
+        print(f"Índice de {entries:,} entradas (error {error_rate:g})", file=out)
+        print(f"  tamaño:        {results['index_bytes'] / 2**20:10.1f} MiB "
+              f"(set anterior ~{legacy_bytes / 2**20:,.0f} MiB)", file=out)
+        print(f"  apertura:      {results['open_ms']:10.3f} ms", file=out)
+        print(f"  inserción:     {results['insert_us']:10.2f} µs", file=out)
+        print(f"  consulta:      {results['lookup_us']:10.2f} µs", file=out)
+        print(f"  falsos pos.:   {results['false_positive_rate']:10.2e}", file=out)
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    benchmark(os.path.join(tempfile.gettempdir(), "tuxcontra_bench.bloom"), n, out=sys.stdout)
@@ -0,0 +1,183 @@
+"""
+Frases de contraseña (diceware) de TuxContra
+
+La lista de palabras (EFF, o cualquier lista propia de una palabra por
+línea) se compila una vez a un índice binario: una tabla de desplazamientos
+de 64 bits seguida de las palabras en UTF-8. El índice se abre con mmap,
+así que abrirlo no cuesta nada sea cual sea el tamaño de la lista, y cada
+palabra se obtiene en O(1) leyendo dos desplazamientos, sin analizar texto.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+from tuxcontra_entropy import randbytes as pool_randbytes
+
+MAGIC = b"TUXWORDS"
+VERSION = 1
+# magic, versión, número de palabras
+HEADER = struct.Struct("<8sIQ")
+OFFSET = struct.Struct("<Q")
+OFFSET_PAIR = struct.Struct("<QQ")
+
+
+# ============================================================================
+# COMPILACIÓN
+# ============================================================================
+
+def iter_source_words(path):
+    """
+    Lee las palabras de una lista de texto
+    Admite el formato EFF ("11111<TAB>abacus"): se toma el último campo
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[-1].startswith("#"):
+                yield fields[-1]
+
+
+def compile_wordlist(source_path, index_path):
+    """
+    Compila una lista de palabras a un índice binario
+    Las palabras repetidas se eliminan para que todas sean equiprobables
+    Retorna el número de palabras
+    """
+    seen = set()
+    tmp_path = index_path + ".tmp"
+    blob_path = index_path + ".blob"
+    count = 0
+    # Primero las palabras a un archivo aparte; los desplazamientos se
+    # escriben después, cuando ya se conoce el total
+    with open(blob_path, "wb") as blob, open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, 0))
+        position = 0
+        for word in iter_source_words(source_path):
+            if word in seen:
+                continue
+            seen.add(word)
+            data = word.encode("utf-8")
+            out.write(OFFSET.pack(position))
+            blob.write(data)
+            position += len(data)
+            count += 1
+        out.write(OFFSET.pack(position))
+    seen.clear()
+
+    with open(tmp_path, "r+b") as out, open(blob_path, "rb") as blob:
+        out.write(HEADER.pack(MAGIC, VERSION, count))
+        out.seek(0, os.SEEK_END)
+        while True:
+            chunk = blob.read(1 << 20)
+            if not chunk:
+                break
+            out.write(chunk)
+    os.remove(blob_path)
+    os.replace(tmp_path, index_path)
+    return count
+
+
+def index_path_for(source_path, cache_dir):
+    """Ruta del índice en caché para una lista (cambia si la lista cambia)"""
+    stat = os.stat(source_path)
+    key = f"{os.path.abspath(source_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(cache_dir, f"{name}-{digest}.idx")
+
+
+def is_index(path):
+    """Indica si un archivo ya es un índice compilado"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def load_wordlist(path, cache_dir):
+    """
+    Abre una lista de palabras, compilándola a cache_dir si hace falta
+    Acepta tanto una lista de texto como un índice ya compilado
+    """
+    if is_index(path):
+        return Wordlist(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    index_path = index_path_for(path, cache_dir)
+    if not os.path.exists(index_path):
+        compile_wordlist(path, index_path)
+    return Wordlist(index_path)
+
+
+# ============================================================================
+# LISTA COMPILADA
+# ============================================================================
+
+class Wordlist:
+    """Índice de palabras mapeado en memoria"""
+
+    def __init__(self, index_path):
+        self.path = index_path
+        self._file = open(index_path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Lista de palabras vacía: {index_path}")
+        magic, version, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Índice de palabras no válido: {index_path}")
+        self._offsets = HEADER.size
+        self._words = HEADER.size + (self.count + 1) * OFFSET.size
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        start, end = OFFSET_PAIR.unpack_from(self._mm, self._offsets + i * OFFSET.size)
+        return self._mm[self._words + start:self._words + end].decode("utf-8")
+
+    def bits_per_word(self):
+        """Entropía de cada palabra elegida uniformemente"""
+        return math.log2(self.count) if self.count > 1 else 0.0
+
+    def close(self):
+        """Cierra el índice"""
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ============================================================================
+# GENERACIÓN
+# ============================================================================
+
+def randbelow(n, randbytes=pool_randbytes):
+    """Entero uniforme en [0, n) por muestreo por rechazo sobre 64 bits"""
+    limit = (1 << 64) - ((1 << 64) % n)
+    while True:
+        value = int.from_bytes(randbytes(8), "little")
+        if value < limit:
+            return value % n
+
+
+def passphrase(wordlist, words=6, separator="-", randbytes=pool_randbytes):
+    """Frase de `words` palabras elegidas uniformemente"""
+    if len(wordlist) == 0:
+        raise ValueError("La lista de palabras está vacía")
+    n = len(wordlist)
+    return separator.join(wordlist[randbelow(n, randbytes)] for _ in range(words))
+
+
+def passphrase_entropy(wordlist, words):
+    """Bits de una frase de `words` palabras"""
+    return words * wordlist.bits_per_word()
@@ -0,0 +1,178 @@
+"""
+Motor de generación de TuxContra
+
+Genera contraseñas a partir de bytes CSPRNG de la reserva de entropía del
+proceso (bloques grandes de os.urandom), con muestreo por rechazo sin
+sesgo. No depende de tkinter, así que puede
+usarse desde la interfaz, la consola o cualquier proceso por lotes.
+"""
+
+import string
+import struct
+from functools import lru_cache
+
+from tuxcontra_entropy import randbytes as pool_randbytes
+
+# ============================================================================
+# CONJUNTOS DE CARACTERES
+# ============================================================================
+
+LOWER = string.ascii_lowercase
+UPPER = string.ascii_uppercase
+DIGITS = string.digits
+SYMBOLS = "!@#$%^&*()_+-=[]{}|;:,.<>?/~`"
+
+# Orden fijo: es el mismo en que generate_password_thread los concatena
+CHARSETS = {
+    "lower": LOWER,
+    "upper": UPPER,
+    "digits": DIGITS,
+    "symbols": SYMBOLS,
+}
+
+
+def build_charset(lower=True, upper=True, digits=True, symbols=True):
+    """Construye el alfabeto a partir de los cuatro tipos de caracteres"""
+    chars = ""
+    if lower:
+        chars += LOWER
+    if upper:
+        chars += UPPER
+    if digits:
+        chars += DIGITS
+    if symbols:
+        chars += SYMBOLS
+    return chars
+
+
+def charset_from_names(names):
+    """
+    Construye el alfabeto a partir de nombres ('lower', 'upper', ...)
+    Acepta una lista o una cadena separada por comas
+    """
+    if isinstance(names, str):
+        names = [n.strip() for n in names.split(",") if n.strip()]
+    unknown = [n for n in names if n not in CHARSETS]
+    if unknown:
+        raise ValueError(f"Tipo de carácter desconocido: {', '.join(unknown)}")
+    # Se respeta el orden canónico para que el alfabeto sea estable
+    return "".join(CHARSETS[n] for n in CHARSETS if n in names)
+
+
+# ============================================================================
+# ALFABETOS COMPILADOS
+# ============================================================================
+
+class _ByteAlphabet:
+    """
+    Alfabeto de hasta 256 caracteres de un byte
+
+    El rechazo y el mapeo se hacen en C con bytes.translate: los bytes
+    mayores o iguales al límite se eliminan y el resto se traduce a
+    charset[b % n]. El límite es el mayor múltiplo de n que cabe en un
+    byte, así que cada carácter sale con la misma probabilidad.
+    """
+
+    def __init__(self, charset):
+        n = len(charset)
+        self.size = n
+        self.limit = 256 - (256 % n)
+        encoded = charset.encode("latin-1")
+        self.table = bytes(encoded[b % n] if b < self.limit else 0 for b in range(256))
+        self.reject = bytes(range(self.limit, 256))
+
+    def draw(self, count, randbytes):
+        """Devuelve exactamente count caracteres aleatorios"""
+        parts = []
+        have = 0
+        while have < count:
+            need = count - have
+            # Se pide un poco más de lo esperado para evitar rondas extra
+            request = need * 256 // self.limit + need // 16 + 16
+            chunk = randbytes(request).translate(self.table, self.reject)
+            if len(chunk) > need:
+                chunk = chunk[:need]
+            parts.append(chunk)
+            have += len(chunk)
+        return b"".join(parts).decode("latin-1")
+
+
+class _WideAlphabet:
+    """
+    Alfabeto de más de 256 caracteres o con caracteres fuera de latin-1
+
+    Usa índices de 32 bits con el mismo muestreo por rechazo.
+    """
+
+    def __init__(self, charset):
+        n = len(charset)
+        self.size = n
+        self.chars = tuple(charset)
+        self.limit = (1 << 32) - ((1 << 32) % n)
+
+    def draw(self, count, randbytes):
+        """Devuelve exactamente count caracteres aleatorios"""
+        n = self.size
+        chars = self.chars
+        limit = self.limit
+        out = []
+        while len(out) < count:
+            need = count - len(out)
+            words = need + need // 16 + 4
+            # Little-endian explícito: el modo reproducible debe dar lo
+            # mismo en cualquier máquina
+            values = struct.unpack(f"<{words}I", randbytes(4 * words))
+            out.extend(chars[v % n] for v in values if v < limit)
+        return "".join(out[:count])
+
+
+@lru_cache(maxsize=64)
+def compile_charset(charset):
+    """Prepara (y guarda en caché) el alfabeto para muestrear rápido"""
+    if not charset:
+        raise ValueError("El alfabeto está vacío")
+    if len(charset) <= 256 and all(ord(c) < 256 for c in charset):
+        return _ByteAlphabet(charset)
+    return _WideAlphabet(charset)
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+def generate(length, charset, randbytes=pool_randbytes):
+    """Genera una contraseña de la longitud pedida"""
+    if length < 0:
+        raise ValueError("La longitud no puede ser negativa")
+    if length == 0:
+        return ""
+    return compile_charset(charset).draw(length, randbytes)
+
+
+def iter_many(n, length, charset, randbytes=pool_randbytes, batch_chars=1 << 20):
+    """
+    Genera n contraseñas una a una
+
+    Los caracteres se piden en lotes de unos batch_chars, así que la memoria
+    usada no depende de n.
+    """
+    if n <= 0:
+        return
+    if length <= 0:
+        for _ in range(n):
+            yield ""
+        return
+    alphabet = compile_charset(charset)
+    per_batch = max(1, batch_chars // length)
+    remaining = n
+    while remaining > 0:
+        count = min(per_batch, remaining)
+        block = alphabet.draw(count * length, randbytes)
+        for i in range(0, count * length, length):
+            yield block[i:i + length]
+        remaining -= count
+
+
+def generate_many(n, length, charset, randbytes=pool_randbytes):
+    """Genera una lista de n contraseñas"""
+    return list(iter_many(n, length, charset, randbytes))
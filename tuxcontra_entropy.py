@@ -0,0 +1,175 @@
+"""
+Reserva de entropía de TuxContra
+
+Las contraseñas cortas (8 a 64 caracteres) apenas necesitan bytes, pero
+cada llamada a os.urandom es una llamada al sistema. La reserva pide al
+sistema bloques grandes y entrega porciones a cualquier hilo; cuando queda
+poco (marca de agua baja) un hilo en segundo plano prepara el siguiente
+bloque, así que las peticiones pequeñas no esperan al sistema.
+
+Las porciones se copian desde un memoryview del bloque (sin copias
+intermedias) y la zona entregada se pone a cero al momento: la reserva
+nunca guarda bytes que ya se hayan usado. Las peticiones grandes van
+directamente a os.urandom.
+
+Tras un fork el proceso hijo descarta los bloques heredados: dos procesos
+nunca reparten los mismos bytes.
+"""
+
+import os
+import threading
+import weakref
+
+BLOCK_SIZE = 1 << 20
+# Se prepara el siguiente bloque cuando queda menos de esta fracción
+LOW_WATERMARK = 0.25
+
+
+class EntropyPool:
+    """
+    Reserva de bytes CSPRNG segura entre hilos
+    Las peticiones de más de max_request bytes (por defecto un cuarto del
+    bloque) no pasan por la reserva
+    """
+
+    def __init__(self, block_size=BLOCK_SIZE, low_watermark=LOW_WATERMARK,
+                 max_request=None, source=os.urandom, background=True):
+        self.block_size = block_size
+        self.low = int(block_size * low_watermark)
+        self.max_request = min(max_request or block_size // 4, block_size)
+        self.source = source
+        self.background = background
+        self._zeros = memoryview(bytes(self.max_request))
+        # Contadores (para diagnóstico y pruebas de rendimiento)
+        self.refills = 0
+        self.sync_refills = 0
+        self._reset()
+        _POOLS.add(self)
+
+    def _reset(self):
+        """Estado vacío (al crear la reserva y en el hijo tras un fork)"""
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._buffer = bytearray()
+        self._view = memoryview(self._buffer)
+        self._size = 0
+        self._pos = 0
+        # Posición a partir de la cual se pide el siguiente bloque
+        self._watermark = 0 if self.background else float("inf")
+        self._next = None
+        self._refilling = False
+        self._closed = False
+        self._thread = None
+
+    def _fill(self):
+        """Bloque nuevo del sistema"""
+        return bytearray(self.source(self.block_size))
+
+    # ------------------------------------------------------------------------
+    # Entrega
+    # ------------------------------------------------------------------------
+
+    def randbytes(self, n):
+        """Retorna n bytes aleatorios (misma firma que os.urandom)"""
+        if n > self.max_request:
+            return self.source(n)
+        with self._lock:
+            end = self._pos + n
+            if end > self._size:
+                self._swap_locked()
+                end = n
+            view = self._view
+            pos = self._pos
+            out = view[pos:end].tobytes()
+            view[pos:end] = self._zeros[:n]
+            self._pos = end
+            if end > self._watermark and self._next is None and not self._refilling:
+                self._request_refill_locked()
+        return out
+
+    __call__ = randbytes
+
+    def _swap_locked(self):
+        """Pasa al bloque siguiente (lo prepara aquí si aún no está listo)"""
+        self._view[self._pos:] = bytes(len(self._buffer) - self._pos)
+        self._view.release()
+        if self._next is not None:
+            self._buffer, self._next = self._next, None
+        else:
+            self._buffer = self._fill()
+            self.sync_refills += 1
+        self.refills += 1
+        self._view = memoryview(self._buffer)
+        self._size = len(self._buffer)
+        self._pos = 0
+        if self.background:
+            self._watermark = self._size - self.low
+
+    def _request_refill_locked(self):
+        """Despierta al hilo de recarga (lo crea la primera vez)"""
+        self._refilling = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refill_loop,
+                                            name="tuxcontra-entropia", daemon=True)
+            self._thread.start()
+        self._wake.notify()
+
+    def _refill_loop(self):
+        """Hilo de segundo plano: prepara el siguiente bloque"""
+        while True:
+            with self._lock:
+                while not self._refilling and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+            block = self._fill()
+            with self._lock:
+                if self._next is None:
+                    self._next = block
+                self._refilling = False
+
+    def _wipe(self):
+        """Pone a cero los bloques guardados"""
+        self._view[:] = bytes(len(self._buffer))
+        if self._next is not None:
+            self._next[:] = bytes(len(self._next))
+            self._next = None
+
+    def _forget_after_fork(self):
+        """
+        En el hijo de un fork: borra los bloques heredados y empieza de cero
+        (el lock pudo quedar tomado por otro hilo del padre, se crea uno nuevo)
+        """
+        self._wipe()
+        self._view.release()
+        self._reset()
+
+    def close(self):
+        """Detiene el hilo de recarga y borra los bloques"""
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+            self._wipe()
+
+
+# ============================================================================
+# RESERVA DEL PROCESO
+# ============================================================================
+
+# Reservas vivas, para vaciarlas en el hijo tras un fork
+_POOLS = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for pool in list(_POOLS):
+        pool._forget_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+default_pool = EntropyPool()
+
+# n bytes aleatorios de la reserva del proceso (sustituto de os.urandom)
+randbytes = default_pool.randbytes
+
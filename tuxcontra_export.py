@@ -0,0 +1,277 @@
+"""
+Exportación e importación de TuxContra
+
+Escribe entradas (del historial o de un lote recién generado) en JSON Lines
+o CSV, opcionalmente comprimidas con gzip (.gz) o lzma (.xz). Todo funciona
+como flujo: las entradas se consumen de un generador y se escriben en
+trozos de CHUNK_ENTRIES, así que la memoria usada no depende de cuántas
+haya. La importación lee los mismos formatos entrada a entrada.
+
+El formato se deduce de la extensión (claves.csv, historial.jsonl.gz...)
+salvo que se indique. El diario del historial (tuxcontra_history.jsonl) es
+JSON Lines, así que se puede importar directamente; las contraseñas que no
+se guardaron por ser demasiado largas siguen sustituidas por el aviso.
+
+En CSV, una celda que empieza por = + - @, tabulador o retorno de carro
+sería una fórmula al abrir el archivo con una hoja de cálculo, así que las
+columnas de texto que no son secretas se escriben con un apóstrofo delante
+('=abc). También se añade a las que ya empiezan por apóstrofos seguidos de
+uno de esos caracteres, de modo que import_entries puede quitar siempre uno
+y recuperar el valor exacto. La contraseña se exporta byte a byte tal cual
+(= + - @ están en SYMBOLS y otro programa leería una clave distinta); solo
+se protege si se pide con protect_passwords, y entonces hay que importarla
+con la misma opción.
+"""
+
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import sys
+from datetime import datetime
+
+# Campos que se pueden exportar, en su orden habitual
+FIELDS = ("password", "length", "entropy", "date")
+FORMATS = ("jsonl", "csv")
+# Extensión de compresión -> módulo que la abre
+COMPRESSIONS = {".gz": gzip, ".xz": lzma, ".lzma": lzma}
+# Opciones de escritura de cada compresor (gzip -6 comprime casi igual que -9
+# y bastante más rápido; lzma -6 usa unos 90 MB fijos sea cual sea el tamaño)
+COMPRESS_OPTIONS = {gzip: {"compresslevel": 6}, lzma: {"preset": 6}}
+# Entradas por trozo escrito
+CHUNK_ENTRIES = 4096
+# Campos de texto (los únicos que pueden parecer una fórmula en CSV)
+TEXT_FIELDS = ("password", "date")
+# Campos de texto que no se alteran salvo con protect_passwords
+SECRET_FIELDS = ("password",)
+# Primeros caracteres con los que una hoja de cálculo interpreta una celda
+FORMULA_START = "=+-@\t\r"
+_FORMULA = re.compile(f"'*[{re.escape(FORMULA_START)}]")
+WRITE_BUFFER = 1 << 20
+
+
+def detect_format(path, fmt=None):
+    """
+    Retorna (formato, módulo de compresión o None) según la extensión
+
+    fmt fuerza el formato; la compresión siempre sale de la extensión.
+    Retorna formato None si la extensión no es de exportación (.txt...).
+    """
+    root, ext = os.path.splitext(path.lower())
+    compression = COMPRESSIONS.get(ext)
+    if compression is not None:
+        ext = os.path.splitext(root)[1]
+    if fmt is None:
+        fmt = ext.lstrip(".") if ext.lstrip(".") in FORMATS else None
+    elif fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt} (usa {', '.join(FORMATS)})")
+    return fmt, compression
+
+
+def parse_fields(text):
+    """Convierte "password,length" en una tupla de campos válidos"""
+    fields = tuple(name.strip().lower() for name in text.split(",") if name.strip())
+    if not fields:
+        raise ValueError("Indica al menos un campo")
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise ValueError(f"Campo desconocido: {', '.join(unknown)} "
+                         f"(disponibles: {', '.join(FIELDS)})")
+    return fields
+
+
+def batch_entries(passwords, entropy, date=None):
+    """Entradas de un lote generado (todas comparten entropía y fecha)"""
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    entropy = round(entropy, 2)
+    for password in passwords:
+        yield {"password": password, "length": len(password),
+               "entropy": entropy, "date": date}
+
+
+# ============================================================================
+# EXPORTACIÓN
+# ============================================================================
+
+def _row(entry, fields):
+    """Valores de entry en el orden de fields (la longitud se deduce si falta)"""
+    values = [entry.get(name) for name in fields]
+    if "length" in fields and entry.get("length") is None and "password" in entry:
+        values[fields.index("length")] = len(entry["password"])
+    return values
+
+
+def _protected_fields(protect_passwords):
+    """Campos CSV que reciben el apóstrofo contra fórmulas"""
+    if protect_passwords:
+        return TEXT_FIELDS
+    return tuple(name for name in TEXT_FIELDS if name not in SECRET_FIELDS)
+
+
+def iter_chunks(entries, fields=FIELDS, fmt="jsonl", chunk_entries=CHUNK_ENTRIES,
+                protect_passwords=False):
+    """
+    Serializa entries en trozos de bytes UTF-8 de como mucho chunk_entries
+    entradas cada uno (el CSV empieza con la fila de cabecera)
+
+    protect_passwords añade también el apóstrofo contra fórmulas a la
+    columna de contraseñas en CSV (por defecto se escriben exactas).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt} (usa {', '.join(FORMATS)})")
+    if fmt == "csv":
+        buffer = io.StringIO(newline="")
+        # Fin de línea de RFC 4180: así csv también entrecomilla las celdas
+        # con un \r suelto (con "\n" solo entrecomilla las que tienen \n)
+        writer = csv.writer(buffer, lineterminator="\r\n")
+        writer.writerow(fields)
+        protected = _protected_fields(protect_passwords)
+        text = [i for i, name in enumerate(fields) if name in protected]
+        risky = FORMULA_START + "'"
+        pending = 0
+        for entry in entries:
+            row = _row(entry, fields)
+            for i in text:
+                value = row[i]
+                # Apóstrofo delante de lo que sería una fórmula
+                if (isinstance(value, str) and value and value[0] in risky
+                        and _FORMULA.match(value)):
+                    row[i] = "'" + value
+            writer.writerow(row)
+            pending += 1
+            if pending >= chunk_entries:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+        return
+
+    dumps = json.JSONEncoder(ensure_ascii=False).encode
+    lines = []
+    for entry in entries:
+        lines.append(dumps(dict(zip(fields, _row(entry, fields)))))
+        if len(lines) >= chunk_entries:
+            lines.append("")
+            yield "\n".join(lines).encode("utf-8")
+            lines.clear()
+    if lines:
+        lines.append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+def write_entries(stream, entries, fields=FIELDS, fmt="jsonl", protect_passwords=False):
+    """Escribe entries en un flujo binario y retorna cuántas se escribieron"""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for entry in entries:
+            count += 1
+            yield entry
+
+    for chunk in iter_chunks(counted(), fields, fmt, protect_passwords=protect_passwords):
+        stream.write(chunk)
+    stream.flush()
+    return count
+
+
+def _open_binary(path, mode, compression):
+    if compression is not None:
+        return compression.open(path, mode, **COMPRESS_OPTIONS[compression])
+    return open(path, mode, buffering=WRITE_BUFFER)
+
+
+def export_entries(entries, path, fields=FIELDS, fmt=None, protect_passwords=False):
+    """
+    Exporta entries a path y retorna cuántas se escribieron
+
+    Se escribe en un archivo temporal que sustituye al destino al terminar,
+    así que un error a medias no deja un archivo truncado.
+    """
+    fmt, compression = detect_format(path, fmt)
+    if fmt is None:
+        raise ValueError(f"No se reconoce el formato de {os.path.basename(path)} "
+                         f"(usa .jsonl o .csv, opcionalmente .gz o .xz)")
+    tmp_path = path + ".tmp"
+    try:
+        with _open_binary(tmp_path, "wb", compression) as f:
+            count = write_entries(f, entries, fields, fmt, protect_passwords)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+# ============================================================================
+# IMPORTACIÓN
+# ============================================================================
+
+def _convert(entry, protected=_protected_fields(False)):
+    """Tipos de una fila CSV (todo llega como texto; las celdas vacías se quitan)"""
+    for name, value in entry.items():
+        # Deshace el apóstrofo que iter_chunks añade a las posibles fórmulas
+        if (name in protected and value and value[0] == "'"
+                and _FORMULA.match(value, 1)):
+            entry[name] = value[1:]
+    for name in [name for name, value in entry.items()
+                 if name != "password" and value in ("", None)]:
+        del entry[name]
+    for name, kind in (("length", int), ("entropy", float)):
+        value = entry.get(name)
+        if value is None:
+            continue
+        try:
+            entry[name] = kind(value)
+        except ValueError:
+            entry.pop(name, None)
+    return entry
+
+
+def import_entries(path, fmt=None, protect_passwords=False):
+    """
+    Lee las entradas de path una a una ('-' para stdin)
+
+    protect_passwords quita también el apóstrofo de la columna de
+    contraseñas de un CSV exportado con esa misma opción.
+
+    Las líneas JSON que no se pueden leer (por ejemplo la última de un
+    diario cortado) se ignoran.
+    """
+    compression = None
+    if path != "-":
+        fmt, compression = detect_format(path, fmt)
+    fmt = fmt or "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt} (usa {', '.join(FORMATS)})")
+    if path == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    elif compression is not None:
+        f = compression.open(path, "rt", encoding="utf-8", newline="")
+    else:
+        f = open(path, "r", encoding="utf-8", newline="")
+    with f:
+        if fmt == "csv":
+            protected = _protected_fields(protect_passwords)
+            for row in csv.DictReader(f):
+                row.pop(None, None)
+                yield _convert(row, protected)
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                yield entry
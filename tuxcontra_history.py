@@ -0,0 +1,505 @@
+"""
+Historial de TuxContra en un diario de solo-anexado (JSON Lines)
+
+Cada contraseña generada añade una línea al final del archivo: el coste de
+guardar una entrada no depende del tamaño del historial y un cierre
+inesperado como mucho deja una última línea incompleta, que se ignora al
+cargar. El límite de entradas se aplica al leer; el archivo se compacta
+de vez en cuando reescribiéndolo de forma atómica.
+
+En memoria cada entrada es un HistoryEntry (con __slots__: contraseña,
+entropía y un único instante en segundos desde la época); el texto
+abreviado, la fecha y la hora se calculan al pedirlos. HistoryStore guarda
+muchas entradas en columnas (array) con índices ordenados para consultar
+por fechas, longitud, entropía o prefijo del digest en tiempo logarítmico;
+es también lo que recorre la lista del historial de la interfaz, a través
+de la vista NewestFirst.
+"""
+
+import json
+import os
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date, datetime
+from operator import itemgetter
+
+from tuxcontra_dedup import password_digest
+
+# Contraseñas más largas no se guardan en disco
+MAX_STORED_PASSWORD = 500
+PLACEHOLDER = "[CONTRASEÑA DEMASIADO LARGA]"
+# Contraseñas más largas se muestran abreviadas
+DISPLAY_CHARS = 100
+
+
+# ============================================================================
+# ENTRADAS
+# ============================================================================
+
+class HistoryEntry:
+    """Entrada del historial: contraseña, entropía e instante (epoch)"""
+
+    __slots__ = ("password", "entropy", "created")
+
+    def __init__(self, password, entropy=0.0, created=None):
+        self.password = password
+        self.entropy = entropy
+        self.created = time.time() if created is None else created
+
+    @property
+    def length(self):
+        return len(self.password)
+
+    @property
+    def display(self):
+        """Texto para la lista (las muy largas, abreviadas)"""
+        password = self.password
+        if len(password) > DISPLAY_CHARS:
+            half = DISPLAY_CHARS // 2
+            return f"{password[:half]}...{password[-half:]}"
+        return password
+
+    @property
+    def date(self):
+        return time.strftime("%Y-%m-%d", time.localtime(self.created))
+
+    @property
+    def timestamp(self):
+        return time.strftime("%H:%M:%S", time.localtime(self.created))
+
+    @property
+    def info(self):
+        """Longitud y entropía, como se muestran en la lista"""
+        return f"{self.length:,} chars\n{self.entropy:.0f} bits"
+
+    def same(self, other):
+        """Es la misma entrada del historial (aunque sea otro objeto)"""
+        return (other is self or other is not None and other.created == self.created
+                and other.password == self.password)
+
+    def get(self, name, default=None):
+        """Acceso por nombre, como un diccionario (exportación)"""
+        return getattr(self, name, default)
+
+    def to_dict(self):
+        """Línea del diario (con fecha y hora en texto para lectores antiguos)"""
+        return {"password": self.password, "length": self.length,
+                "timestamp": self.timestamp, "date": self.date,
+                "entropy": self.entropy, "created": round(self.created, 3)}
+
+    @classmethod
+    def from_dict(cls, entry):
+        """Entrada desde una línea del diario (también del formato antiguo)"""
+        created = entry.get("created")
+        if created is None:
+            try:
+                created = datetime.strptime(
+                    f"{entry['date']} {entry.get('timestamp', '00:00:00')}",
+                    "%Y-%m-%d %H:%M:%S").timestamp()
+            except (KeyError, TypeError, ValueError):
+                created = 0.0
+        return cls(entry.get("password", ""), entry.get("entropy") or 0, created)
+
+    def __repr__(self):
+        return f"HistoryEntry({self.display!r}, {self.entropy:.0f} bits, {self.date} {self.timestamp})"
+
+
+class HistoryJournal:
+    """Diario de historial en formato JSON Lines"""
+
+    def __init__(self, path, limit=20, compact_every=None, legacy_path=None):
+        self.path = path
+        self.limit = limit
+        # Se compacta cuando el archivo tiene muchas más líneas que el límite
+        self.compact_every = compact_every or max(100, limit * 10)
+        self.legacy_path = legacy_path
+        self.lines = 0
+        # La última línea quedó sin terminar (cierre a mitad de escritura)
+        self.torn_tail = False
+
+    # ------------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------------
+
+    def iter_entries(self):
+        """Lee las entradas en orden de escritura (de la más antigua a la más nueva)"""
+        self.lines = 0
+        self.torn_tail = False
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                self.lines += 1
+                self.torn_tail = not line.endswith("\n")
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Línea incompleta por un cierre inesperado
+                    continue
+                if isinstance(entry, dict):
+                    yield entry
+
+    def load(self):
+        """Retorna las últimas `limit` entradas (HistoryEntry), la más reciente primero"""
+        if not os.path.exists(self.path):
+            self._migrate_legacy()
+        recent = deque(self.iter_entries(), maxlen=self.limit)
+        return [HistoryEntry.from_dict(entry) for entry in reversed(recent)]
+
+    def _migrate_legacy(self):
+        """Importa el antiguo tuxcontra_history.json (lista, más reciente primero)"""
+        if not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                legacy = json.load(f)
+            self._rewrite(reversed(legacy[:self.limit]))
+            print(f"✓ Historial migrado a {os.path.basename(self.path)}")
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error migrando historial: {e}")
+
+    # ------------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------------
+
+    @staticmethod
+    def _serialize(entry):
+        """Convierte una entrada (HistoryEntry o diccionario) en una línea JSON"""
+        if isinstance(entry, HistoryEntry):
+            entry = entry.to_dict()
+        if len(entry.get('password', '')) > MAX_STORED_PASSWORD:
+            entry = dict(entry, password=PLACEHOLDER)
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+    def append(self, entry):
+        """Añade una entrada al final del diario"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            if self.torn_tail:
+                # Se cierra la línea rota para no mezclarla con la nueva
+                f.write("\n")
+                self.torn_tail = False
+            f.write(self._serialize(entry))
+        self.lines += 1
+        if self.lines >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Reescribe el diario dejando solo las últimas `limit` entradas"""
+        recent = deque(self.iter_entries(), maxlen=self.limit)
+        self._rewrite(recent)
+
+    def clear(self):
+        """Vacía el historial"""
+        self._rewrite([])
+
+    def _rewrite(self, entries):
+        """Sustituye el diario de forma atómica (archivo temporal + os.replace)"""
+        tmp_path = self.path + ".tmp"
+        count = 0
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(self._serialize(entry))
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.lines = count
+        self.torn_tail = False
+
+
+# ============================================================================
+# CONSULTAS
+# ============================================================================
+
+class _SortedIndex:
+    """
+    Claves ordenadas y la fila de cada una (dos arrays paralelos)
+
+    Añadir no desplaza los arrays: una clave que no es menor que la última
+    se anexa al final (el caso habitual del instante) y las demás esperan
+    en una lista aparte que se ordena y se intercala de una vez la
+    siguiente vez que se consulta el índice (copiando tramos enteros de los
+    arrays, no elemento a elemento).
+    """
+
+    __slots__ = ("typecode", "keys", "rows", "pending")
+
+    def __init__(self, typecode, values):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self.typecode = typecode
+        self.keys = array(typecode, [values[i] for i in order])
+        self.rows = array("I", order)
+        self.pending = []
+
+    def add(self, key, row):
+        if not self.pending and (not self.keys or key >= self.keys[-1]):
+            self.keys.append(key)
+            self.rows.append(row)
+        else:
+            self.pending.append((key, row))
+
+    def _merge(self):
+        """Mezcla las claves pendientes con las ordenadas"""
+        # Cada pendiente va detrás de las claves iguales, así que a igual
+        # clave las filas siguen en orden; los tramos se copian enteros
+        self.pending.sort(key=itemgetter(0))
+        keys, rows = self.keys, self.rows
+        new_keys, new_rows = array(self.typecode), array("I")
+        start = 0
+        for key, row in self.pending:
+            i = bisect_right(keys, key, start)
+            new_keys += keys[start:i]
+            new_rows += rows[start:i]
+            new_keys.append(key)
+            new_rows.append(row)
+            start = i
+        new_keys += keys[start:]
+        new_rows += rows[start:]
+        self.keys, self.rows = new_keys, new_rows
+        self.pending = []
+
+    def bounds(self, low=None, high=None):
+        """Posiciones [i, j) de las claves en [low, high] (búsqueda binaria)"""
+        if self.pending:
+            self._merge()
+        i = 0 if low is None else bisect_left(self.keys, low)
+        j = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return i, max(i, j)
+
+    def nbytes(self):
+        """Memoria aproximada en bytes (sin contar las claves pendientes)"""
+        return self.keys.itemsize * len(self.keys) + self.rows.itemsize * len(self.rows)
+
+
+def _epoch(value):
+    """Segundos desde la época de un número, date o datetime"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day).timestamp()
+    raise TypeError(f"Fecha no válida: {value!r}")
+
+
+def _digest_key(digest):
+    """Primeros 8 bytes del digest como entero (clave del índice)"""
+    return int.from_bytes(digest[:8], "big")
+
+
+class HistoryStore:
+    """
+    Historial grande en columnas con índices ordenados
+
+    Las contraseñas van en una lista; instante y entropía, en arrays de
+    doubles. Los índices (instante, longitud, entropía, digest) se crean la
+    primera vez que se consultan y después se mantienen al añadir (en tiempo
+    constante; el orden se completa en la siguiente consulta). Cada criterio
+    con índice se resuelve con dos búsquedas binarias; se recorre
+    solo el rango más pequeño y el resto de criterios (y la búsqueda de
+    texto, que no tiene índice) se comprueban sobre esas filas.
+    """
+
+    INDEXES = ("created", "length", "entropy", "digest")
+
+    def __init__(self, entries=()):
+        self._passwords = []
+        self._created = array("d")
+        self._entropy = array("d")
+        self._indexes = {}
+        for entry in entries:
+            self.add(entry)
+
+    @classmethod
+    def from_journal(cls, journal, limit=None):
+        """Carga las entradas del diario (todas, o solo las últimas `limit`)"""
+        if not os.path.exists(journal.path):
+            journal._migrate_legacy()
+        entries = journal.iter_entries()
+        if limit is not None:
+            entries = deque(entries, maxlen=limit)
+        store = cls()
+        for entry in entries:
+            store.add(HistoryEntry.from_dict(entry))
+        return store
+
+    def __len__(self):
+        return len(self._passwords)
+
+    def __getitem__(self, row):
+        return HistoryEntry(self._passwords[row], self._entropy[row], self._created[row])
+
+    def newest_first(self, limit=None):
+        """
+        Vista de solo lectura con la entrada más reciente en la posición 0
+        (solo las `limit` más recientes, si se indica)
+        """
+        return NewestFirst(self, limit)
+
+    def last(self, limit):
+        """Nuevo HistoryStore con solo las últimas `limit` entradas"""
+        total = len(self._passwords)
+        return HistoryStore(self[row] for row in range(max(0, total - limit), total))
+
+    def nbytes(self):
+        """Memoria aproximada en bytes: (columnas, índices)"""
+        columns = (sys.getsizeof(self._passwords)
+                   + sum(map(sys.getsizeof, self._passwords))
+                   + sum(a.itemsize * len(a) for a in (self._created, self._entropy)))
+        indexes = sum(index.nbytes() for index in self._indexes.values())
+        return columns, indexes
+
+    def add(self, entry):
+        """Añade una entrada (HistoryEntry o diccionario del diario)"""
+        if not isinstance(entry, HistoryEntry):
+            entry = HistoryEntry.from_dict(entry)
+        row = len(self._passwords)
+        self._passwords.append(entry.password)
+        self._created.append(entry.created)
+        self._entropy.append(entry.entropy)
+        for name, index in self._indexes.items():
+            index.add(self._key(name, row), row)
+
+    def _key(self, name, row):
+        if name == "created":
+            return self._created[row]
+        if name == "entropy":
+            return self._entropy[row]
+        if name == "length":
+            return len(self._passwords[row])
+        return _digest_key(password_digest(self._passwords[row]))
+
+    def index(self, name):
+        """Índice ordenado por name (se construye la primera vez)"""
+        index = self._indexes.get(name)
+        if index is None:
+            if name == "created":
+                index = _SortedIndex("d", self._created)
+            elif name == "entropy":
+                index = _SortedIndex("d", self._entropy)
+            elif name == "length":
+                index = _SortedIndex("I", array("I", map(len, self._passwords)))
+            elif name == "digest":
+                index = _SortedIndex("Q", array("Q", (_digest_key(password_digest(p))
+                                                      for p in self._passwords)))
+            else:
+                raise ValueError(f"Índice desconocido: {name}")
+            self._indexes[name] = index
+        return index
+
+    def query(self, since=None, until=None, min_length=None, max_length=None,
+              min_entropy=None, max_entropy=None, digest_prefix=None, contains=None,
+              limit=None):
+        """
+        Entradas que cumplen todos los criterios, la más reciente primero
+
+        since/until: instante (epoch, date o datetime), ambos incluidos
+        digest_prefix: prefijo hexadecimal del SHA-256 de la contraseña
+        contains: texto que debe aparecer en la contraseña
+        """
+        since, until = _epoch(since), _epoch(until)
+        ranges = []
+        if since is not None or until is not None:
+            ranges.append(("created", since, until))
+        if min_length is not None or max_length is not None:
+            ranges.append(("length", min_length, max_length))
+        if min_entropy is not None or max_entropy is not None:
+            ranges.append(("entropy", min_entropy, max_entropy))
+        prefix = None
+        if digest_prefix:
+            prefix = digest_prefix.lower()
+            try:
+                int(prefix, 16)
+            except ValueError:
+                raise ValueError(f"Prefijo de digest no válido: {digest_prefix}") from None
+            head = prefix[:16]
+            ranges.append(("digest", int(head.ljust(16, "0"), 16), int(head.ljust(16, "f"), 16)))
+
+        if ranges:
+            # Se recorre solo el rango con menos filas
+            best = None
+            for name, low, high in ranges:
+                index = self.index(name)
+                i, j = index.bounds(low, high)
+                if best is None or j - i < best[2] - best[1]:
+                    best = (index, i, j)
+            index, i, j = best
+            in_row_order = (index is self._indexes.get("created")
+                            or (j > i and index.keys[i] == index.keys[j - 1]))
+            if in_row_order:
+                # Ya están en orden de fila (por tiempo, o una sola clave): se
+                # recorren al revés y se corta en limit
+                rows = reversed(index.rows[i:j])
+            else:
+                rows = sorted(index.rows[i:j], reverse=True)
+        else:
+            rows = range(len(self._passwords) - 1, -1, -1)
+
+        passwords, created, entropy = self._passwords, self._created, self._entropy
+        results = []
+        for row in rows:
+            password = passwords[row]
+            if since is not None and created[row] < since:
+                continue
+            if until is not None and created[row] > until:
+                continue
+            if min_length is not None and len(password) < min_length:
+                continue
+            if max_length is not None and len(password) > max_length:
+                continue
+            if min_entropy is not None and entropy[row] < min_entropy:
+                continue
+            if max_entropy is not None and entropy[row] > max_entropy:
+                continue
+            if contains is not None and contains not in password:
+                continue
+            if prefix is not None and not password_digest(password).hex().startswith(prefix):
+                continue
+            results.append(HistoryEntry(password, entropy[row], created[row]))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+class NewestFirst:
+    """
+    HistoryStore visto de la entrada más reciente a la más antigua
+
+    Cada posición crea su HistoryEntry al pedirla, así que la lista del
+    historial puede recorrer cientos de miles de entradas sin copiarlas.
+    Con limit solo se ven las `limit` más recientes.
+    """
+
+    __slots__ = ("store", "limit")
+
+    def __init__(self, store, limit=None):
+        self.store = store
+        self.limit = limit
+
+    def __len__(self):
+        total = len(self.store)
+        return total if self.limit is None else min(total, self.limit)
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.store[len(self.store) - 1 - index]
+
+
+def visible_window(entries, top, visible, slots=None):
+    """
+    Ajusta top para que quepan `visible` filas y retorna (top, entradas)
+    con las entradas de las `slots` filas desde top (None pasado el final)
+    """
+    total = len(entries)
+    top = max(0, min(top, total - visible + 1))
+    slots = visible if slots is None else slots
+    return top, [entries[i] if i < total else None for i in range(top, top + slots)]
@@ -0,0 +1,197 @@
+"""
+Comunicación entre los hilos de generación y la interfaz de TuxContra
+
+Los hilos de trabajo nunca tocan tkinter: publican progreso y resultados en
+un canal que el bucle principal vacía a ritmo fijo (un "frame"). Las
+peticiones de generación las ejecuta un único hilo de larga duración.
+"""
+
+import threading
+import time
+from collections import deque
+
+# ============================================================================
+# CANAL DE PROGRESO Y RESULTADOS
+# ============================================================================
+
+
+class UIChannel:
+    """
+    Canal seguro entre hilos para progreso y resultados
+
+    El progreso se fusiona: solo se guarda el último valor, así que por cada
+    frame llega como mucho una actualización. Los resultados se encolan y se
+    entregan todos en el siguiente vaciado, sin esperas artificiales.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._progress = None
+        self._calls = deque()
+
+    def post_progress(self, value):
+        """Publica el progreso actual (sustituye al pendiente, si lo hay)"""
+        with self._lock:
+            self._progress = value
+
+    def post_call(self, func, *args):
+        """Encola una llamada para ejecutarla en el hilo de la interfaz"""
+        self._calls.append((func, args))
+
+    def drain(self):
+        """
+        Vacía el canal desde el hilo de la interfaz
+        Retorna (último progreso o None, lista de llamadas pendientes)
+        """
+        with self._lock:
+            progress = self._progress
+            self._progress = None
+        calls = []
+        while True:
+            try:
+                calls.append(self._calls.popleft())
+            except IndexError:
+                break
+        return progress, calls
+
+
+# ============================================================================
+# TRABAJOS Y CANCELACIÓN
+# ============================================================================
+
+
+class CancelToken:
+    """Señal de cancelación de un trabajo; se consulta entre bloques"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Marca el trabajo como cancelado"""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Job:
+    """Petición de generación con su identificador y su token de cancelación"""
+
+    def __init__(self, job_id, request):
+        self.id = job_id
+        self.request = request
+        self.token = CancelToken()
+
+    def __repr__(self):
+        return f"Job({self.id}, cancelled={self.token.cancelled})"
+
+
+# ============================================================================
+# PLANIFICADOR DE GENERACIÓN
+# ============================================================================
+
+
+class GenerationScheduler:
+    """
+    Un único hilo de generación alimentado por peticiones con antirrebote
+
+    Cada petición se convierte en un Job con un identificador creciente.
+    Solo se guarda la más reciente: al llegar una nueva se cancela la
+    pendiente y la que está en marcha (que se detiene en el siguiente
+    bloque). Las peticiones con antirrebote esperan `debounce` segundos sin
+    cambios antes de ejecutarse, así que arrastrar el slider genera una sola
+    vez al pararse, con un hilo fijo. Los resultados de cualquier trabajo
+    que no sea el último se descartan con is_current().
+
+    Si run lanza una excepción se llama a on_error(job, excepción) desde el
+    hilo de generación, para que la interfaz pueda restaurar sus controles.
+    """
+
+    def __init__(self, run, debounce=0.15, name="tuxcontra-generador", on_error=None):
+        self._run = run
+        self._on_error = on_error
+        self.debounce = debounce
+        self._cond = threading.Condition()
+        self._pending = None
+        self._running = None
+        self._due = 0.0
+        self._closed = False
+        self._next_id = 1
+        self.latest_id = 0
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, request, debounce=False):
+        """Programa una petición (sustituye a las anteriores) y retorna su Job"""
+        with self._cond:
+            self._cancel_locked()
+            job = Job(self._next_id, request)
+            self._next_id += 1
+            self.latest_id = job.id
+            self._pending = job
+            self._due = time.monotonic() + (self.debounce if debounce else 0.0)
+            self._cond.notify()
+        return job
+
+    def cancel(self):
+        """Cancela el trabajo pendiente y el que esté en marcha"""
+        with self._cond:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        if self._pending is not None:
+            self._pending.token.cancel()
+            self._pending = None
+        if self._running is not None:
+            self._running.token.cancel()
+
+    @property
+    def busy(self):
+        """Hay una petición pendiente o en marcha"""
+        with self._cond:
+            return self._pending is not None or self._running is not None
+
+    def is_current(self, job):
+        """Indica si el resultado de un trabajo todavía debe mostrarse"""
+        return job.id == self.latest_id and not job.token.cancelled
+
+    def _loop(self):
+        """Bucle del hilo de generación"""
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._pending is None:
+                        self._cond.wait()
+                        continue
+                    delay = self._due - time.monotonic()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                if self._closed:
+                    return
+                job = self._pending
+                self._pending = None
+                self._running = job
+            try:
+                if not job.token.cancelled:
+                    self._run(job)
+            except Exception as e:
+                print(f"Error en la generación: {e}")
+                if self._on_error is not None:
+                    try:
+                        self._on_error(job, e)
+                    except Exception as report_error:
+                        print(f"Error notificando el fallo: {report_error}")
+            finally:
+                with self._cond:
+                    self._running = None
+
+    def close(self, timeout=None):
+        """Cancela todo y detiene el hilo; espera como mucho `timeout` segundos"""
+        with self._cond:
+            self._cancel_locked()
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
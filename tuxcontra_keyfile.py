@@ -0,0 +1,95 @@
+"""
+Archivos de clave de TuxContra escritos por bloques
+
+El generador entrega bloques de tamaño fijo que van directamente al archivo
+con os.write; el SHA-256 se calcula sobre los mismos bloques mientras se
+escriben. La memoria usada es la misma para 1 KB que para 10 GB.
+"""
+
+import hashlib
+import os
+import re
+import time
+
+from tuxcontra_engine import compile_charset
+
+BLOCK_SIZE = 1 << 20
+
+_SIZE_RE = re.compile(r"^\s*(\d+)\s*([kmgt]?)(i?b)?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(text):
+    """Convierte '4096', '64K', '10M', '2G'... en bytes"""
+    match = _SIZE_RE.match(str(text))
+    if not match:
+        raise ValueError(f"Tamaño no válido: {text}")
+    return int(match.group(1)) * _UNITS[match.group(2).lower()]
+
+
+def iter_blocks(size, charset=None, block_size=BLOCK_SIZE, randbytes=os.urandom):
+    """
+    Genera `size` bytes aleatorios en bloques de block_size
+
+    Sin charset son bytes crudos (material de libreta de un solo uso); con
+    charset, texto ASCII/latin-1 del alfabeto indicado.
+    """
+    alphabet = compile_charset(charset) if charset else None
+    if alphabet is not None and not all(ord(c) < 128 for c in charset):
+        raise ValueError("El alfabeto del archivo de clave debe ser ASCII")
+    remaining = size
+    while remaining > 0:
+        n = min(block_size, remaining)
+        if alphabet is None:
+            yield randbytes(n)
+        else:
+            yield alphabet.draw(n, randbytes).encode("ascii")
+        remaining -= n
+
+
+def write_keyfile(path, size, charset=None, block_size=BLOCK_SIZE,
+                  progress=None, cancel=None, randbytes=os.urandom):
+    """
+    Escribe un archivo de clave y retorna (bytes escritos, sha256 hex, segundos)
+
+    progress(bytes_escritos) se llama tras cada bloque; si cancel() devuelve
+    True se interrumpe y se borra el archivo parcial. Se escribe primero en
+    un temporal y se renombra al terminar.
+    """
+    tmp_path = path + ".part"
+    digest = hashlib.sha256()
+    written = 0
+    start = time.perf_counter()
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o600)
+    try:
+        for block in iter_blocks(size, charset, block_size, randbytes):
+            if cancel is not None and cancel():
+                raise InterruptedError("Generación cancelada")
+            view = memoryview(block)
+            while view:
+                n = os.write(fd, view)
+                view = view[n:]
+            digest.update(block)
+            written += len(block)
+            if progress is not None:
+                progress(written)
+        os.fsync(fd)
+    except BaseException:
+        os.close(fd)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.close(fd)
+    os.replace(tmp_path, path)
+    return written, digest.hexdigest(), time.perf_counter() - start
+
+
+def write_checksum(path, hexdigest):
+    """Guarda el SHA-256 junto al archivo, en formato de sha256sum"""
+    checksum_path = path + ".sha256"
+    with open(checksum_path, "w", encoding="utf-8") as f:
+        f.write(f"{hexdigest}  {os.path.basename(path)}\n")
+    return checksum_path
@@ -0,0 +1,233 @@
+"""
+Métricas internas de TuxContra
+
+Histogramas de latencia y contadores para las etapas principales
+(generación, entrega al hilo de la interfaz, dibujado, E/S del historial y
+portapapeles). Los histogramas usan cubetas fijas, así que registrar una
+medida es una búsqueda binaria y una suma. Desactivadas, cada punto de
+medida se reduce a comprobar un booleano.
+
+Se exportan en el formato de texto de Prometheus (para el "textfile
+collector" de node_exporter) o como JSON Lines, una instantánea por línea.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Límites superiores de las cubetas, en segundos
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+           0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "tuxcontra"
+
+# Etapas medidas por la interfaz y su descripción
+STAGES = {
+    "generation": "Tiempo de generación por trabajo",
+    "delivery": "Tiempo desde el hilo de trabajo hasta la interfaz",
+    "render": "Tiempo de finish_password_generation",
+    "history_io": "Tiempo de E/S del historial",
+    "clipboard": "Tiempo de copia al portapapeles",
+}
+
+
+class Histogram:
+    """Histograma de latencias con cubetas fijas"""
+
+    def __init__(self, help_text=""):
+        self.help = help_text
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(BUCKETS) + 1)
+            self.total = 0.0
+            self.count = 0
+            self.max = 0.0
+
+    def observe(self, seconds):
+        """Registra una medida"""
+        i = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.total += seconds
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Estimación del cuantil q interpolando dentro de la cubeta"""
+        with self._lock:
+            counts = list(self.counts)
+            count, top = self.count, self.max
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else top
+                return min(top, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return top
+
+    def snapshot(self):
+        with self._lock:
+            return {"count": self.count, "sum": self.total, "max": self.max,
+                    "buckets": list(self.counts)}
+
+
+class _Timer:
+    """Mide el bloque with y lo registra en un histograma"""
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    """Temporizador vacío para cuando las métricas están desactivadas"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Registro de histogramas y contadores"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.started = time.time()
+
+    def histogram(self, name):
+        """Histograma por nombre (se crea al primer uso)"""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(STAGES.get(name, "")))
+        return histogram
+
+    def time(self, name):
+        """Contexto que mide su bloque: with metrics.time("render"): ..."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def observe(self, name, seconds):
+        """Registra una duración ya medida"""
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def inc(self, name, amount=1):
+        """Suma a un contador"""
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        """Pone a cero todas las medidas"""
+        with self._lock:
+            self.counters.clear()
+            self.started = time.time()
+        for histogram in list(self.histograms.values()):
+            histogram.reset()
+
+    # ------------------------------------------------------------------------
+    # Exportación
+    # ------------------------------------------------------------------------
+
+    def snapshot(self):
+        """Estado actual como diccionario serializable"""
+        with self._lock:
+            counters = dict(self.counters)
+        return {
+            "time": time.time(),
+            "since": self.started,
+            "buckets": list(BUCKETS),
+            "histograms": {name: h.snapshot() for name, h in list(self.histograms.items())},
+            "counters": counters,
+        }
+
+    def to_prometheus(self):
+        """Texto en el formato de exposición de Prometheus"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, data in sorted(snapshot["histograms"].items()):
+            metric = f"{PREFIX}_{name}_seconds"
+            lines.append(f"# HELP {metric} {STAGES.get(name, name)}")
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, n in zip(BUCKETS, data["buckets"]):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {data["count"]}')
+            lines.append(f"{metric}_sum {data['sum']:.9f}")
+            lines.append(f"{metric}_count {data['count']}")
+        for name, value in sorted(snapshot["counters"].items()):
+            metric = f"{PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """
+        Exporta a un archivo local: .jsonl añade una instantánea por línea;
+        cualquier otra extensión (.prom) se reescribe de forma atómica en
+        formato Prometheus
+        """
+        if path.endswith(".jsonl"):
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(self.snapshot()) + "\n")
+            return
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def report(self):
+        """Tabla de texto para el panel de diagnóstico"""
+        lines = [f"{'Etapa':<12}{'n':>8}{'media':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'máx':>10}"]
+        for name in list(STAGES) + sorted(set(self.histograms) - set(STAGES)):
+            histogram = self.histograms.get(name)
+            if histogram is None or not histogram.count:
+                lines.append(f"{name:<12}{0:>8}")
+                continue
+            mean = histogram.total / histogram.count
+            values = [mean, histogram.quantile(0.5), histogram.quantile(0.95),
+                      histogram.quantile(0.99), histogram.max]
+            lines.append(f"{name:<12}{histogram.count:>8}"
+                         + "".join(f"{v * 1000:>8.2f}ms" for v in values))
+        with self._lock:
+            counters = sorted(self.counters.items())
+        if counters:
+            lines.append("")
+            lines.extend(f"{name:<30}{value:>12,}" for name, value in counters)
+        return "\n".join(lines)
+
+
+# Registro global de la aplicación (TUXCONTRA_METRICS=1 lo activa al arrancar)
+metrics = Metrics(enabled=os.environ.get("TUXCONTRA_METRICS") == "1")
@@ -0,0 +1,628 @@
+"""
+Políticas de contraseña de TuxContra
+
+Reglas como "al menos 2 dígitos y 1 símbolo", "sin caracteres ambiguos",
+"como mucho 2 caracteres iguales seguidos" o "empieza por letra" no se
+resuelven generando y descartando: con reglas estrictas eso se vuelve muy
+lento. En su lugar se cuentan las contraseñas válidas con programación
+dinámica (por posición, lo que falta de cada tipo obligatorio y la racha
+del último carácter) y se "desenrolla" un único entero aleatorio en
+[0, total): cada entero corresponde a exactamente una contraseña válida,
+así que el resultado es uniforme sobre el conjunto válido y la entropía es
+exactamente log2(total).
+
+Las tablas se calculan una vez por (política, alfabeto, longitud) y quedan
+en caché; después cada contraseña cuesta unas pocas operaciones por
+carácter. Pensado para contraseñas de sitios web (hasta MAX_LENGTH).
+
+Desenrollar carácter a carácter cuesta bastante más que el motor sin
+reglas, así que los lotes (generate_many) usan el camino más rápido de
+tres exactos:
+- Si una contraseña al azar del alfabeto cumple la política con
+  probabilidad suficiente (se conoce exacta: total / alfabeto^longitud),
+  se sortean candidatas con el motor y un solo regex se queda con las
+  válidas.
+- Si no, se sortea el tipo de cada posición por bloques de varias
+  posiciones (_Layouts: unos pocos pasos por contraseña en lugar de uno
+  por carácter), los caracteres de cada tipo se sortean con el motor para
+  todo el lote y max-repeat se comprueba después, descartando.
+- Sin tablas de bloques (alfabetos fuera de latin-1, políticas enormes)
+  se desenrollan enteros sorteados de una vez.
+Una contraseña sola (generate, y el modo reproducible) siempre se
+desenrolla.
+
+Aun así queda distancia con el motor sin reglas. Medido con 16
+caracteres del alfabeto completo (tuxcontra_bench, policy.*): sin reglas
+unos 3,8M/s; "web" (min-digits=2, min-symbols=1, no-ambiguous,
+max-repeat=2, start=letter) unos 395K/s, 10 veces menos (antes 360K/s);
+"strict" (3 de cada tipo y max-repeat=1) unos 330K/s, 11 veces menos
+(antes 110K/s). El coste que queda está en los pasos por bloque y en
+sortear una posición por tipo.
+"""
+
+import math
+import re
+from bisect import bisect_right
+from collections import namedtuple
+from functools import lru_cache
+from itertools import product
+
+from tuxcontra_engine import CHARSETS, compile_charset
+from tuxcontra_entropy import randbytes as pool_randbytes
+
+# Caracteres que se confunden al leerlos o copiarlos a mano
+AMBIGUOUS = "0O1lI|"
+
+# Límites de las tablas de conteo (enteros de hasta MAX_LENGTH·log2(alfabeto) bits)
+MAX_LENGTH = 256
+MAX_TABLE = 200_000
+
+# Probabilidad de cumplir la política a partir de la cual sale más barato
+# generar lotes por descarte que por bloques (medido: el cruce está entre
+# 0,25 y 0,3 con 16, 32 y 64 caracteres)
+LAYOUT_ACCEPTANCE = 0.3
+# Sin bloques, probabilidad mínima para generar por descarte (por debajo
+# sale más barato desenrollar); también la mínima de no incumplir
+# max-repeat para usar los bloques
+MIN_ACCEPTANCE = 0.15
+# Caracteres sorteados por lote de candidatas
+BATCH_CHARS = 1 << 20
+# Enteros sorteados de una vez al desenrollar un lote
+BATCH_RANKS = 4096
+# Ordenaciones de tipos por bloque (tipos ** posiciones del bloque)
+MAX_ARRANGEMENTS = 1 << 16
+# Pasos guardados como mucho en las tablas de bloques
+MAX_LAYOUT_STEPS = 1 << 20
+
+# Alias admitidos en start=
+START_ALIASES = {"letter": ("lower", "upper")}
+
+# minimums: tupla de (tipo, mínimo); start: tupla de tipos permitidos al inicio
+Policy = namedtuple("Policy", "minimums exclude max_repeat start",
+                    defaults=((), "", None, ()))
+
+
+def make_policy(min_lower=0, min_upper=0, min_digits=0, min_symbols=0,
+                exclude="", no_ambiguous=False, max_repeat=None, start=()):
+    """Construye una política a partir de argumentos con nombre"""
+    counts = {"lower": min_lower, "upper": min_upper,
+              "digits": min_digits, "symbols": min_symbols}
+    if any(c < 0 for c in counts.values()):
+        raise ValueError("Los mínimos no pueden ser negativos")
+    if max_repeat is not None and max_repeat < 1:
+        raise ValueError("max-repeat debe ser al menos 1")
+    if isinstance(start, str):
+        start = START_ALIASES.get(start, (start,))
+    unknown = [name for name in start if name not in CHARSETS]
+    if unknown:
+        raise ValueError(f"Tipo de carácter desconocido: {', '.join(unknown)}")
+    if no_ambiguous:
+        exclude += AMBIGUOUS
+    return Policy(
+        minimums=tuple((name, counts[name]) for name in CHARSETS if counts[name]),
+        exclude="".join(sorted(set(exclude))),
+        max_repeat=max_repeat,
+        start=tuple(name for name in CHARSETS if name in start),
+    )
+
+
+_ITEM_RE = re.compile(r"^([a-z-]+)(?:=(.*))?$")
+
+
+def parse_policy(text):
+    """
+    Convierte una descripción en texto en una Policy, por ejemplo:
+    "min-digits=2,min-symbols=1,no-ambiguous,max-repeat=2,start=letter"
+    exclude=... admite cualquier carácter salvo la coma
+    """
+    kwargs = {"exclude": ""}
+    for item in (part.strip() for part in text.split(",")):
+        if not item:
+            continue
+        match = _ITEM_RE.match(item)
+        if not match:
+            raise ValueError(f"Regla no válida: {item}")
+        key, value = match.groups()
+        try:
+            if key.startswith("min-") and key[4:] in CHARSETS and value:
+                kwargs[f"min_{key[4:]}"] = int(value)
+            elif key == "max-repeat" and value:
+                kwargs["max_repeat"] = int(value)
+            elif key == "no-ambiguous" and value is None:
+                kwargs["no_ambiguous"] = True
+            elif key == "exclude" and value:
+                kwargs["exclude"] += value
+            elif key == "start" and value:
+                names = []
+                for name in value.split("+"):
+                    names.extend(START_ALIASES.get(name, (name,)))
+                kwargs["start"] = tuple(names)
+            else:
+                raise ValueError(f"Regla no válida: {item}")
+        except ValueError as e:
+            if "Regla" in str(e):
+                raise
+            raise ValueError(f"Regla no válida: {item}") from None
+    return make_policy(**kwargs)
+
+
+def format_policy(policy):
+    """Descripción en texto de una política (inversa de parse_policy)"""
+    items = [f"min-{name}={count}" for name, count in policy.minimums]
+    if policy.max_repeat is not None:
+        items.append(f"max-repeat={policy.max_repeat}")
+    if policy.start:
+        items.append("start=" + "+".join(policy.start))
+    if policy.exclude:
+        items.append(f"exclude={policy.exclude}")
+    return ",".join(items)
+
+
+# ============================================================================
+# TABLA DE CONTEO
+# ============================================================================
+
+def _split_classes(charset, exclude):
+    """Reparte el alfabeto en tipos disjuntos; lo que no encaja va a 'other'"""
+    seen = set(exclude)
+    classes = {}
+    for name, members in list(CHARSETS.items()) + [("other", None)]:
+        chars = []
+        for ch in charset:
+            if ch not in seen and (members is None or ch in members):
+                seen.add(ch)
+                chars.append(ch)
+        if chars:
+            classes[name] = "".join(chars)
+    return classes
+
+
+def _randbelow(n, randbytes):
+    """Entero uniforme en [0, n) para n arbitrariamente grande"""
+    bits = n.bit_length()
+    nbytes = (bits + 7) // 8
+    mask = (1 << bits) - 1
+    while True:
+        value = int.from_bytes(randbytes(nbytes), "little") & mask
+        if value < n:
+            return value
+
+
+@lru_cache(maxsize=64)
+def _arrangements(kinds, size):
+    """
+    Todas las secuencias de `size` tipos (bytes 0..kinds-1) agrupadas por
+    cuántas hay de cada tipo
+    """
+    if not size:
+        return {(0,) * kinds: [b""]}
+    groups = {}
+    for counts, orders in _arrangements(kinds, size - 1).items():
+        for k in range(kinds):
+            tail = bytes((k,))
+            after = counts[:k] + (counts[k] + 1,) + counts[k + 1:]
+            groups.setdefault(after, []).extend(order + tail for order in orders)
+    return groups
+
+
+class _Layouts:
+    """
+    Sorteo por lotes del tipo de cada posición (mínimos e inicio; sin max-repeat)
+
+    Se cuentan las contraseñas que cumplen los mínimos por (posición, lo
+    que falta) y se desenrolla un bloque de posiciones de cada vez: primero
+    cuántos caracteres de cada tipo lleva el bloque y después en qué orden,
+    de una tabla con todas las ordenaciones. Cada contraseña cuesta unos
+    pocos pasos en lugar de uno por carácter; los caracteres de cada tipo
+    se sortean después con el motor para todo el lote. La regla de inicio
+    solo deja en el primer bloque las ordenaciones que empiezan bien.
+    """
+
+    def __init__(self, sizes, required, minimums, start, length):
+        kinds = len(sizes)
+        self.length = length
+        block = 1
+        while block < length and kinds ** (block + 1) <= MAX_ARRANGEMENTS:
+            block += 1
+        self.spans = [(pos, min(block, length - pos)) for pos in range(0, length, block)]
+        self.sizes = sizes
+        self.required = required
+        self.start = start
+
+        # Los estados (lo que falta de cada tipo obligatorio) van por índice
+        self.needs = list(product(*(range(count + 1) for count in minimums)))
+        self.index = {need: i for i, need in enumerate(self.needs)}
+        # counts[i][estado]: formas de completar las posiciones i..length
+        counts = [None] * (length + 1)
+        counts[length] = [0 if any(need) else 1 for need in self.needs]
+        for i in range(length - 1, -1, -1):
+            following = counts[i + 1]
+            counts[i] = [sum(size * following[self._place(need, (k,))]
+                             for k, size in enumerate(sizes))
+                         for need in self.needs]
+        self.counts = counts
+        vectors = max(len(_arrangements(kinds, size)) for _, size in self.spans)
+        self.fits = len(self.needs) * len(self.spans) * vectors <= MAX_LAYOUT_STEPS
+        self._tables = [[None] * len(self.needs) for _ in self.spans]
+        self.full_need = self.index[tuple(minimums)]
+        self.total = self._table(0, self.full_need)[0][-1] if length else 1
+
+    def _place(self, need, kinds):
+        """Estado después de poner un carácter de cada tipo de kinds"""
+        need = list(need)
+        for k in kinds:
+            if k in self.required:
+                j = self.required.index(k)
+                if need[j]:
+                    need[j] -= 1
+        return self.index[tuple(need)]
+
+    def _table(self, span, state):
+        """Límites acumulados y pasos (desplazamiento, bloque, resto, órdenes, estado)"""
+        pos, size = self.spans[span]
+        following = self.counts[pos + size]
+        need = self.needs[state]
+        bounds, steps = [], []
+        offset = 0
+        for counts, orders in _arrangements(len(self.sizes), size).items():
+            if pos == 0 and self.start:
+                orders = [order for order in orders if order[0] in self.start]
+                if not orders:
+                    continue
+            after = self._place(need, [k for k, c in enumerate(counts) for _ in range(c)])
+            rest = following[after]
+            if not rest:
+                continue
+            chars = math.prod(self.sizes[k] ** c for k, c in enumerate(counts))
+            steps.append((offset, chars * rest, rest, orders, after))
+            offset += len(orders) * chars * rest
+            bounds.append(offset)
+        table = self._tables[span][state] = (bounds, steps)
+        return table
+
+    def labels(self, rank):
+        """Tipos (un byte por posición) de la secuencia número rank"""
+        state = self.full_need
+        parts = []
+        for tables in self._tables:
+            table = tables[state]
+            if table is None:
+                table = self._table(len(parts), state)
+            bounds, steps = table
+            offset, block, rest, orders, state = steps[bisect_right(bounds, rank)]
+            index, rank = divmod(rank - offset, block)
+            # Del resto solo importa la parte de las posiciones siguientes
+            rank %= rest
+            parts.append(orders[index])
+        return b"".join(parts)
+
+
+class _Plan:
+    """
+    Tabla de conteo compilada para (política, alfabeto, longitud)
+
+    Cada estado es (lo que falta de cada tipo obligatorio, racha del último
+    carácter, tipo del último carácter). counts[i][s] es el número de
+    formas de completar las posiciones i..length desde el estado s.
+    """
+
+    SAME = -1  # transición "repetir el carácter anterior"
+
+    def __init__(self, policy, charset, length):
+        if length > MAX_LENGTH:
+            raise ValueError(f"Las políticas admiten como mucho {MAX_LENGTH} caracteres")
+        classes = _split_classes(charset, policy.exclude)
+        if not classes:
+            raise ValueError("La política excluye todos los caracteres del alfabeto")
+        self.names = list(classes)
+        self.chars = [classes[name] for name in self.names]
+        self.positions = [{ch: i for i, ch in enumerate(chars)} for chars in self.chars]
+        self.length = length
+
+        for name, _ in policy.minimums:
+            if name not in classes:
+                raise ValueError(f"La política exige '{name}' pero el alfabeto no lo incluye")
+        required = [self.names.index(name) for name, _ in policy.minimums]
+        self.required = required
+        start = [self.names.index(name) for name in policy.start if name in classes]
+        if policy.start and not start:
+            raise ValueError("Ningún tipo permitido al inicio está en el alfabeto")
+
+        # Una racha más larga que la contraseña no restringe nada
+        repeat = policy.max_repeat
+        self.max_repeat = repeat if repeat is not None and repeat < length else None
+
+        needs = list(product(*(range(count + 1) for _, count in policy.minimums)))
+        if self.max_repeat is None:
+            tails = [(0, -1)]
+        else:
+            tails = [(run, cls) for run in range(1, self.max_repeat + 1)
+                     for cls in range(len(self.names))]
+        states = [(need, run, cls) for need in needs for run, cls in tails]
+        if len(states) * (length + 1) > MAX_TABLE:
+            raise ValueError("La política es demasiado compleja para esta longitud")
+        index = {state: i for i, state in enumerate(states)}
+        self.start_state = len(states)
+        full_need = tuple(count for _, count in policy.minimums)
+
+        def place(need, cls):
+            if cls in required:
+                k = required.index(cls)
+                if need[k]:
+                    return need[:k] + (need[k] - 1,) + need[k + 1:]
+            return need
+
+        def transitions(need, run, last, allowed):
+            result = []
+            if self.max_repeat is not None and last >= 0 and run < self.max_repeat:
+                result.append((self.SAME, 1, index[(place(need, last), run + 1, last)]))
+            for cls in allowed:
+                size = len(self.chars[cls])
+                if self.max_repeat is None:
+                    result.append((cls, size, index[(place(need, cls), 0, -1)]))
+                else:
+                    if cls == last:
+                        size -= 1
+                    if size:
+                        result.append((cls, size, index[(place(need, cls), 1, cls)]))
+            return result
+
+        every = range(len(self.names))
+        self.transitions = [transitions(need, run, cls, every) for need, run, cls in states]
+        self.transitions.append(transitions(full_need, 0, -1, start or every))
+
+        # Conteo hacia atrás: al final solo valen los estados sin pendientes
+        done = [1 if not any(need) else 0 for need, _, _ in states] + [0]
+        self.counts = [None] * (length + 1)
+        self.counts[length] = done
+        for i in range(length - 1, -1, -1):
+            following = self.counts[i + 1]
+            self.counts[i] = [sum(mult * following[nxt] for _, mult, nxt in trans)
+                              for trans in self.transitions]
+        if length == 0:
+            self.counts[0][self.start_state] = 1 if not any(full_need) else 0
+        self.total = self.counts[0][self.start_state]
+        if not self.total:
+            raise ValueError("Ninguna contraseña de esa longitud cumple la política")
+
+        # Lotes por descarte: alfabeto completo y regex de las reglas
+        self._minimums = [count for _, count in policy.minimums]
+        self._start = start
+        self._layouts = None
+        alphabet = "".join(self.chars)
+        self.acceptance = self.total / len(alphabet) ** length if length else 1.0
+        self._alphabet = compile_charset(alphabet)
+        self._valid = None
+        if length and "\n" not in alphabet:
+            self._valid = self._compile_filter(policy, start)
+
+    def _compile_filter(self, policy, start):
+        """
+        Regex (multilínea) que encaja con las líneas que cumplen la política;
+        el inicio va primero porque es lo que más descarta y lo más barato
+        """
+        def members(chars):
+            return "".join(re.escape(ch) for ch in chars)
+
+        parts = ["^"]
+        if start:
+            parts.append(f"(?=[{members(''.join(self.chars[cls] for cls in start))}])")
+        for cls, (_, count) in zip(self.required, policy.minimums):
+            chars = members(self.chars[cls])
+            parts.append(f"(?=(?:[^\\n{chars}]*[{chars}]){{{count}}})")
+        if self.max_repeat is not None:
+            parts.append(f"(?![^\\n]*?([^\\n])\\1{{{self.max_repeat}}})")
+        parts.append("[^\\n]+")
+        return re.compile("".join(parts), re.MULTILINE)
+
+    def entropy(self):
+        """Bits de una contraseña uniforme entre las válidas"""
+        return math.log2(self.total) if self.total > 1 else 0.0
+
+    def unrank(self, rank):
+        """Contraseña válida número `rank` (0 <= rank < total)"""
+        state = self.start_state
+        out = []
+        prev = prev_cls = None
+        for i in range(self.length):
+            following = self.counts[i + 1]
+            for cls, mult, nxt in self.transitions[state]:
+                block = following[nxt]
+                weight = mult * block
+                if rank < weight:
+                    break
+                rank -= weight
+            choice, rank = divmod(rank, block)
+            if cls == self.SAME:
+                ch = prev
+            else:
+                # Con max-repeat, "otro carácter del mismo tipo" salta el anterior
+                if self.max_repeat is not None and cls == prev_cls:
+                    choice += choice >= self.positions[cls][prev]
+                ch = self.chars[cls][choice]
+                prev_cls = cls
+            out.append(ch)
+            prev = ch
+            state = nxt
+        return "".join(out)
+
+    def generate(self, randbytes=pool_randbytes):
+        """Contraseña uniforme entre las que cumplen la política"""
+        return self.unrank(_randbelow(self.total, randbytes))
+
+    def generate_many(self, n, randbytes=pool_randbytes):
+        """
+        Lista de n contraseñas uniformes entre las válidas
+
+        Por descarte, una candidata uniforme del alfabeto que cumple la
+        política es uniforme entre las válidas, así que las tres formas
+        dan la misma distribución.
+        """
+        if n <= 0:
+            return []
+        if not self.length:
+            return [""] * n
+        filtered = self._valid is not None
+        if filtered and self.acceptance >= LAYOUT_ACCEPTANCE:
+            return self._filter_many(n, randbytes)
+        if self._layouts is None:
+            self._layouts = self._compile_layouts()
+        if self._layouts:
+            return self._layout_many(n, randbytes)
+        if filtered and self.acceptance >= MIN_ACCEPTANCE:
+            return self._filter_many(n, randbytes)
+        return self._unrank_many(n, randbytes)
+
+    def _compile_layouts(self):
+        """
+        Sorteo por bloques de tipos, o False si no conviene: caracteres
+        fuera de latin-1, tablas demasiado grandes o max-repeat que
+        descarta demasiadas
+        """
+        if any(ord(ch) > 255 for chars in self.chars for ch in chars):
+            return False
+        sizes = [len(chars) for chars in self.chars]
+        layouts = _Layouts(sizes, self.required, self._minimums, self._start, self.length)
+        if not layouts.fits or self.total / layouts.total < MIN_ACCEPTANCE:
+            return False
+        self._kinds = [(compile_charset(chars), bytes(255 if b == k else 0 for b in range(256)))
+                       for k, chars in enumerate(self.chars)]
+        return layouts
+
+    def _layout_many(self, n, randbytes):
+        """
+        Tipos por bloques y caracteres de cada tipo sorteados para todo el
+        lote; con max-repeat se descartan las que lo incumplen (una
+        contraseña uniforme sin esa regla que la cumple es uniforme entre
+        las válidas)
+        """
+        layouts = self._layouts
+        length = self.length
+        bits = layouts.total.bit_length()
+        nbytes = (bits + 7) // 8
+        mask = (1 << bits) - 1
+        total = layouts.total
+        out = []
+        while len(out) < n:
+            wanted = int((n - len(out)) * layouts.total / self.total * 1.05) + 8
+            k = max(1, min(wanted, BATCH_CHARS // length))
+            raw = randbytes(nbytes * k * 2)
+            labels = []
+            for i in range(0, len(raw), nbytes):
+                rank = int.from_bytes(raw[i:i + nbytes], "little") & mask
+                if rank < total:
+                    labels.append(layouts.labels(rank))
+                    if len(labels) == k:
+                        break
+            labels = b"".join(labels)
+            # Cada posición toma el carácter de su tipo: máscara por tipo
+            size = len(labels)
+            merged = 0
+            for alphabet, select in self._kinds:
+                chars = alphabet.draw(size, randbytes).encode("latin-1")
+                merged |= (int.from_bytes(chars, "little") &
+                           int.from_bytes(labels.translate(select), "little"))
+            text = merged.to_bytes(size, "little").decode("latin-1")
+            if self.max_repeat is None:
+                out.extend(text[i:i + length] for i in range(0, size, length))
+                continue
+            # Descarta las contraseñas con una racha demasiado larga: el
+            # byte i de same es 0 si los caracteres i e i+1 son iguales, así
+            # que una racha de max_repeat + 1 son max_repeat ceros seguidos
+            # (los que cruzan de una contraseña a otra no cuentan)
+            same = (merged ^ (merged >> 8)).to_bytes(size, "little")
+            run = bytes(self.max_repeat)
+            bad = set()
+            pos = same.find(run)
+            while pos != -1:
+                line = pos // length
+                if line == (pos + self.max_repeat) // length:
+                    bad.add(line)
+                pos = same.find(run, (line + 1) * length)
+            out.extend(text[i * length:(i + 1) * length] for i in range(size // length)
+                       if i not in bad)
+        del out[n:]
+        return out
+
+    def _filter_many(self, n, randbytes):
+        """Sortea candidatas por lotes y se queda con las que cumplen la política"""
+        length = self.length
+        out = []
+        while len(out) < n:
+            wanted = int((n - len(out)) / self.acceptance * 1.1) + 16
+            k = max(1, min(wanted, BATCH_CHARS // length))
+            block = self._alphabet.draw(k * length, randbytes)
+            text = "\n".join([block[i:i + length] for i in range(0, k * length, length)])
+            out.extend(match.group() for match in self._valid.finditer(text))
+        del out[n:]
+        return out
+
+    def _unrank_many(self, n, randbytes):
+        """Desenrolla enteros sorteados por lotes (mismo rechazo que _randbelow)"""
+        bits = self.total.bit_length()
+        nbytes = (bits + 7) // 8
+        mask = (1 << bits) - 1
+        total = self.total
+        out = []
+        while len(out) < n:
+            k = min(n - len(out) + 8, BATCH_RANKS)
+            raw = randbytes(nbytes * k)
+            for i in range(0, nbytes * k, nbytes):
+                rank = int.from_bytes(raw[i:i + nbytes], "little") & mask
+                if rank < total:
+                    out.append(self.unrank(rank))
+        del out[n:]
+        return out
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+@lru_cache(maxsize=16)
+def compile_policy(policy, charset, length):
+    """Compila (y guarda en caché) la tabla de una política"""
+    return _Plan(policy, charset, length)
+
+
+def generate(policy, length, charset, randbytes=pool_randbytes):
+    """Genera una contraseña que cumple la política"""
+    return compile_policy(policy, charset, length).generate(randbytes)
+
+
+def iter_passwords(count, policy, length, charset, randbytes=pool_randbytes):
+    """Genera count contraseñas que cumplen la política (por lotes)"""
+    plan = compile_policy(policy, charset, length)
+    per_batch = max(1, BATCH_CHARS // max(1, length))
+    while count > 0:
+        n = min(per_batch, count)
+        yield from plan.generate_many(n, randbytes)
+        count -= n
+
+
+def policy_entropy(policy, length, charset):
+    """Bits de una contraseña de la política (log2 de las válidas)"""
+    return compile_policy(policy, charset, length).entropy()
+
+
+def violations(password, policy, charset=None):
+    """Lista de reglas que incumple una contraseña (vacía si las cumple)"""
+    problems = []
+    for name, count in policy.minimums:
+        found = sum(1 for ch in password if ch in CHARSETS[name])
+        if found < count:
+            problems.append(f"min-{name}={count}")
+    bad = set(policy.exclude)
+    if charset is not None:
+        allowed = set(charset)
+        if any(ch not in allowed for ch in password):
+            problems.append("charset")
+    if any(ch in bad for ch in password):
+        problems.append("exclude")
+    if policy.max_repeat is not None:
+        if re.search("(.)" + r"\1" * policy.max_repeat, password, re.DOTALL):
+            problems.append(f"max-repeat={policy.max_repeat}")
+    if policy.start and password:
+        if not any(password[0] in CHARSETS[name] for name in policy.start):
+            problems.append("start=" + "+".join(policy.start))
+    return problems
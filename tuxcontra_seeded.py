@@ -0,0 +1,228 @@
+"""
+Generación reproducible de TuxContra a partir de una semilla
+
+Para datos de prueba y simulacros de recuperación: la misma semilla da
+exactamente el mismo lote, byte a byte, en cualquier ejecución y máquina.
+
+Es un generador por contador: la contraseña número i sale de su propio
+flujo de bytes, BLAKE2b con clave en modo contador
+
+    bloque j = BLAKE2b-512(clave, persona="tuxcontra-ctr", i || j)
+
+con i y j enteros de 64 bits little-endian. La clave se deriva de la
+semilla y del contexto del lote (longitud, alfabeto y política), así que
+dos lotes con parámetros distintos no comparten bytes (con plantilla, el
+contexto es la plantilla). Como cada
+contraseña depende solo de (clave, i), se puede pedir la número 734.221
+sin generar las anteriores y repartir el lote entre procesos sin
+coordinarlos.
+
+El flujo se inyecta como `randbytes` en los mismos generadores que el modo
+normal (motor, políticas y plantillas), con el mismo muestreo por rechazo. Los valores
+conocidos de KNOWN_ANSWERS fijan el resultado: si un cambio en el motor
+los altera, self_test() lo detecta.
+
+La seguridad de las contraseñas es la de la semilla: quien la conozca
+puede regenerar el lote.
+"""
+
+import hashlib
+
+from tuxcontra_batch import SHARD_CHARS, run_shards
+from tuxcontra_engine import DIGITS, LOWER, SYMBOLS, UPPER
+from tuxcontra_engine import generate as engine_generate
+from tuxcontra_policy import format_policy, parse_policy
+from tuxcontra_policy import generate as policy_generate
+from tuxcontra_template import compile_template
+
+PERSON_KEY = b"tuxcontra-seed"
+PERSON_BLOCK = b"tuxcontra-ctr"
+# Bytes por bloque del flujo
+BLOCK_BYTES = 64
+MAX_INDEX = (1 << 64) - 1
+# Semillas más cortas se aceptan, pero se avisa
+MIN_SEED_BYTES = 16
+
+
+def batch_context(length, charset, policy=None, template=None):
+    """Texto que identifica los parámetros de un lote"""
+    if template is not None:
+        return f"v1|template|{template}"
+    rules = format_policy(policy) if policy is not None else ""
+    return f"v1|{length}|{rules}|{charset}"
+
+
+def derive_key(seed, context=""):
+    """Clave de 32 bytes para (semilla, contexto); seed es bytes o texto"""
+    if isinstance(seed, str):
+        seed = seed.encode("utf-8")
+    if not seed:
+        raise ValueError("La semilla está vacía")
+    h = hashlib.blake2b(digest_size=32, person=PERSON_KEY)
+    h.update(len(seed).to_bytes(8, "little"))
+    h.update(seed)
+    h.update(context.encode("utf-8"))
+    return h.digest()
+
+
+def read_seed_file(path):
+    """Semilla desde un archivo (bytes tal cual, sin el salto de línea final)"""
+    with open(path, "rb") as f:
+        seed = f.read()
+    return seed.rstrip(b"\r\n")
+
+
+class CounterStream:
+    """
+    Flujo de bytes de la contraseña `index` (misma firma que os.urandom)
+
+    Cada llamada continúa donde terminó la anterior.
+    """
+
+    __slots__ = ("_base", "_prefix", "_block", "_buffer")
+
+    def __init__(self, key, index, _base=None):
+        if not 0 <= index <= MAX_INDEX:
+            raise ValueError(f"Índice fuera de rango: {index}")
+        # Copiar el estado con la clave ya cargada es más barato que recrearlo
+        self._base = _base or hashlib.blake2b(key=key, digest_size=BLOCK_BYTES,
+                                              person=PERSON_BLOCK)
+        self._prefix = index.to_bytes(8, "little")
+        self._block = 0
+        self._buffer = b""
+
+    def __call__(self, n):
+        out = self._buffer
+        if len(out) < n:
+            parts = [out]
+            have = len(out)
+            while have < n:
+                h = self._base.copy()
+                h.update(self._prefix + self._block.to_bytes(8, "little"))
+                parts.append(h.digest())
+                self._block += 1
+                have += BLOCK_BYTES
+            out = b"".join(parts)
+        self._buffer = out[n:]
+        return out[:n]
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+def _generator(key, length, charset, policy, template=None):
+    """Función index -> contraseña para unos parámetros"""
+    base = hashlib.blake2b(key=key, digest_size=BLOCK_BYTES, person=PERSON_BLOCK)
+    if template is not None:
+        plan = compile_template(template)
+        return lambda i: plan.generate(CounterStream(key, i, base))
+    if policy is not None:
+        return lambda i: policy_generate(policy, length, charset, CounterStream(key, i, base))
+    return lambda i: engine_generate(length, charset, CounterStream(key, i, base))
+
+
+def password_at(key, index, length, charset, policy=None, template=None):
+    """Contraseña número index del lote (acceso directo)"""
+    return _generator(key, length, charset, policy, template)(index)
+
+
+def line_block(key, start, count, length, charset, policy=None, template=None):
+    """Contraseñas start..start+count-1 como bytes UTF-8, una por línea"""
+    if count <= 0:
+        return b""
+    if start + count - 1 > MAX_INDEX:
+        raise ValueError(f"Índice fuera de rango: {start + count - 1}")
+    make = _generator(key, length, charset, policy, template)
+    lines = [make(i) for i in range(start, start + count)]
+    lines.append("")
+    return "\n".join(lines).encode("utf-8")
+
+
+def iter_line_blocks(key, start, count, length, charset, policy=None, workers=1,
+                     template=None):
+    """
+    Lote reproducible en bloques de bytes, siempre en orden de índice
+
+    Con varios procesos cada uno calcula su rango de índices por separado;
+    la salida es idéntica a la de un solo proceso.
+    """
+    if "\n" in charset:
+        raise ValueError("El alfabeto no puede contener saltos de línea")
+    shard_size = max(1, SHARD_CHARS // max(1, length))
+    shards = ((key, first, min(shard_size, start + count - first), length, charset, policy,
+               template)
+              for first in range(start, start + count, shard_size))
+    if workers == 1:
+        for args in shards:
+            yield line_block(*args)
+        return
+    yield from run_shards(line_block, shards, workers, ordered=True)
+
+
+def iter_passwords(key, start, count, length, charset, policy=None, workers=1,
+                   template=None):
+    """Contraseñas start..start+count-1 una a una"""
+    for block in iter_line_blocks(key, start, count, length, charset, policy, workers,
+                                  template):
+        lines = block.decode("utf-8").split("\n")
+        lines.pop()
+        yield from lines
+
+
+# ============================================================================
+# VALORES CONOCIDOS
+# ============================================================================
+
+_ALL = LOWER + UPPER + DIGITS + SYMBOLS
+
+# Flujo: (semilla, contexto, índice, primeros 80 bytes en hexadecimal)
+STREAM_ANSWERS = (
+    (b"tuxcontra-kat", "", 0,
+     "78d75deddfbd9fe363eba0c59cdfbefe84d318c0af38c20d0021a64c5039eb3a"
+     "affd6dbe1444076b4019408541ca3f01cc3458f588e7d82f8b0292dd7b38d332"
+     "ce7d6cf65029023f2a8c7a4a7763924b"),
+    (b"tuxcontra-kat", "v1|16||abc", 734221,
+     "a550352d4df566ca5dc7b2d0860fa67217f7bf448126d85720ac802ea9de5c7d"
+     "7281babca37f98b8005670c2141d235388f3d623f4afe63adc2cc9d83e2b943a"
+     "f1977a6c7a7399f1cc593499623e8ade"),
+)
+
+# Contraseñas: (semilla, longitud, alfabeto, política, índice, esperada)
+KNOWN_ANSWERS = (
+    ("tuxcontra-kat", 16, _ALL, "", 0, "H({n{-?ww>SrMa(@"),
+    ("tuxcontra-kat", 16, _ALL, "", 734221, "Eo}=(ZOe:Nl_[iC|"),
+    ("tuxcontra-kat", 32, "0123456789abcdef", "", 1, "df6769a032212e42bfbab088b369fb7f"),
+    ("tuxcontra-kat", 20, _ALL, "min-digits=2,min-symbols=2,no-ambiguous,start=letter", 42,
+     "wWP?$MZ3R4Gcj*n!or_U"),
+    ("tuxcontra-kat", 8, "αβγδεζηθ", "", 7, "θδθηζθηα"),
+)
+
+# Plantillas: (semilla, plantilla, índice, esperada)
+TEMPLATE_ANSWERS = (
+    ("tuxcontra-kat", "Cvcc-dddd-ssss", 99, "Qumb-8708--~/$"),
+)
+
+
+def self_test():
+    """
+    Comprueba STREAM_ANSWERS, KNOWN_ANSWERS y TEMPLATE_ANSWERS y retorna
+    la lista de fallos (vacía si todo va bien)
+    """
+    failures = []
+    for seed, context, index, expected in STREAM_ANSWERS:
+        got = CounterStream(derive_key(seed, context), index)(len(expected) // 2).hex()
+        if got != expected:
+            failures.append(f"flujo {seed!r} #{index}: {got[:16]}... != {expected[:16]}...")
+    for seed, length, charset, rules, index, expected in KNOWN_ANSWERS:
+        policy = parse_policy(rules) if rules else None
+        key = derive_key(seed, batch_context(length, charset, policy))
+        got = password_at(key, index, length, charset, policy)
+        if got != expected:
+            failures.append(f"{seed!r} #{index}: {got!r} != {expected!r}")
+    for seed, template, index, expected in TEMPLATE_ANSWERS:
+        key = derive_key(seed, batch_context(0, "", template=template))
+        got = password_at(key, index, 0, "", template=template)
+        if got != expected:
+            failures.append(f"{seed!r} {template} #{index}: {got!r} != {expected!r}")
+    return failures
@@ -0,0 +1,535 @@
+"""
+Servicio local de generación de TuxContra (asyncio)
+
+Atiende peticiones HTTP/1.1 en 127.0.0.1 o en un socket Unix, sin tkinter,
+para que los scripts pidan contraseñas a un proceso ya arrancado:
+
+    curl 'http://127.0.0.1:8765/generate?length=24&charset=lower,digits&count=5'
+    curl --unix-socket /tmp/tuxcontra.sock 'http://x/generate?format=json'
+
+Parámetros (en la consulta, o como objeto JSON en el cuerpo de un POST):
+length, charset (mismos nombres que la consola), chars, count, policy,
+template (sustituye a length y charset) y format (text o json). Se usan las mismas reglas de alfabeto que la
+interfaz y el modo consola.
+
+Cada conexión admite keep-alive y peticiones encadenadas (pipelining): se
+leen por orden, se atienden con como mucho `max_per_client` en curso y las
+respuestas salen en el mismo orden. Cuando una conexión llega a su límite,
+o el cliente no lee sus respuestas, se deja de leer de ella y el propio
+TCP frena al cliente. Las peticiones grandes, y las que usan una política
+o una plantilla (compilan su tabla y generan más despacio), se atienden
+en un hilo para no bloquear el bucle.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import stat
+import sys
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from tuxcontra_engine import CHARSETS, charset_from_names, generate_many
+from tuxcontra_metrics import metrics
+from tuxcontra_policy import compile_policy, parse_policy
+from tuxcontra_strength import theoretical_entropy
+from tuxcontra_template import compile_template
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Límites por petición
+MAX_LINE = 8 * 1024
+MAX_HEADERS = 64
+MAX_BODY = 64 * 1024
+MAX_CHARS = 16 << 20
+# A partir de aquí la generación se hace en un hilo
+THREAD_CHARS = 256 * 1024
+
+# Límites de concurrencia
+MAX_PER_CLIENT = 8
+MAX_INFLIGHT = 256
+BACKLOG = 2048
+IDLE_TIMEOUT = 30.0
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 411: "Length Required", 413: "Payload Too Large",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error",
+           501: "Not Implemented"}
+
+
+class HTTPError(Exception):
+    """Error que se responde al cliente con su código"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ============================================================================
+# PETICIONES
+# ============================================================================
+
+# Parámetros de texto (en un cuerpo JSON podrían llegar con otro tipo)
+TEXT_PARAMS = ("charset", "chars", "policy", "template", "format")
+
+
+def _int_param(params, name, default):
+    """Entero de la consulta (texto) o del cuerpo JSON (número entero)"""
+    value = params.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise HTTPError(400, "count y length deben ser enteros")
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, "count y length deben ser enteros") from None
+
+
+def parse_params(params):
+    """
+    Valida los parámetros de generación
+    Retorna (count, length, charset, policy o None, format, template o None)
+    """
+    for name in TEXT_PARAMS:
+        if name in params and not isinstance(params[name], str):
+            raise HTTPError(400, f"{name} debe ser texto")
+    count = _int_param(params, "count", 1)
+    length = _int_param(params, "length", 16)
+    if count < 0 or length < 0:
+        raise HTTPError(400, "count y length no pueden ser negativos")
+
+    template = None
+    if params.get("template"):
+        template = params["template"]
+        if params.get("policy"):
+            raise HTTPError(400, "Usa policy o template, no los dos")
+        # La longitud sale de la plantilla al compilarla (en el hilo)
+        _check_size(count, 1)
+    else:
+        _check_size(count, length)
+
+    try:
+        if params.get("chars"):
+            # Sin repetidos: un carácter repetido saldría más a menudo y la
+            # entropía informada (por len(charset)) sería mayor que la real
+            charset = "".join(dict.fromkeys(params["chars"]))
+        else:
+            charset = charset_from_names(params.get("charset", ",".join(CHARSETS)))
+    except ValueError as e:
+        raise HTTPError(400, str(e)) from None
+    if not charset:
+        raise HTTPError(400, "Selecciona al menos un tipo de carácter")
+    if "\n" in charset:
+        raise HTTPError(400, "El alfabeto no puede contener saltos de línea")
+
+    policy = None
+    if params.get("policy"):
+        try:
+            policy = parse_policy(params["policy"])
+        except ValueError as e:
+            raise HTTPError(400, str(e)) from None
+
+    fmt = params.get("format", "text")
+    if fmt not in ("text", "json"):
+        raise HTTPError(400, "format debe ser text o json")
+    return count, length, charset, policy, fmt, template
+
+
+def _check_size(count, length):
+    if count * max(1, length) > MAX_CHARS:
+        raise HTTPError(413, f"Como mucho {MAX_CHARS:,} caracteres por petición")
+
+
+def _compile(compile_plan, *args):
+    """Compila una política o plantilla; sus errores se responden con 400"""
+    try:
+        return compile_plan(*args)
+    except ValueError as e:
+        raise HTTPError(400, str(e)) from None
+
+
+def build_response_body(count, length, charset, policy, fmt, template=None):
+    """
+    Genera las contraseñas y el cuerpo de la respuesta (bytes, tipo)
+    Compila antes la política o la plantilla (puede lanzar HTTPError)
+    """
+    if template is not None:
+        plan = _compile(compile_template, template)
+        length = plan.length
+        _check_size(count, length)
+        if fmt == "text":
+            return plan.lines(count).encode("utf-8"), "text/plain; charset=utf-8"
+        passwords = plan.generate_many(count)
+        entropy = plan.entropy()
+    elif policy is not None:
+        plan = _compile(compile_policy, policy, charset, length)
+        passwords = plan.generate_many(count)
+        entropy = plan.entropy()
+    else:
+        passwords = generate_many(count, length, charset)
+        entropy = theoretical_entropy(length, len(charset))
+    if fmt == "json":
+        body = json.dumps({"passwords": passwords, "length": length,
+                           "entropy": entropy}, ensure_ascii=False)
+        return body.encode("utf-8"), "application/json"
+    lines = passwords + [""] if passwords else []
+    return "\n".join(lines).encode("utf-8"), "text/plain; charset=utf-8"
+
+
+def encode_response(status, body, content_type="text/plain; charset=utf-8", keep_alive=True):
+    """Respuesta HTTP/1.1 completa en bytes"""
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Cache-Control: no-store\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("ascii") + body
+
+
+async def read_request(reader):
+    """
+    Lee una petición HTTP/1.1 del flujo
+    Retorna (método, ruta, parámetros, keep_alive) o None al cerrar el cliente
+    """
+    try:
+        line = await reader.readline()
+    except (asyncio.LimitOverrunError, ValueError):
+        raise HTTPError(431, "Línea de petición demasiado larga") from None
+    if not line:
+        return None
+    parts = line.decode("latin-1").split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+        raise HTTPError(400, "Petición no válida")
+    method, target, version = parts
+
+    headers = {}
+    while True:
+        try:
+            line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(431, "Cabecera demasiado larga") from None
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431, "Demasiadas cabeceras")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+    url = urlsplit(target)
+    params = dict(parse_qsl(url.query))
+    if "transfer-encoding" in headers:
+        raise HTTPError(501, "Transfer-Encoding no soportado")
+    length = headers.get("content-length")
+    if method == "POST":
+        if length is None:
+            raise HTTPError(411, "Falta Content-Length")
+        try:
+            length = int(length)
+        except ValueError:
+            raise HTTPError(400, "Content-Length no válido") from None
+        if length > MAX_BODY:
+            raise HTTPError(413, "Cuerpo demasiado grande")
+        body = await reader.readexactly(length)
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise HTTPError(400, "El cuerpo debe ser un objeto JSON") from None
+            if not isinstance(data, dict):
+                raise HTTPError(400, "El cuerpo debe ser un objeto JSON")
+            params.update(data)
+    elif length not in (None, "0"):
+        raise HTTPError(400, "Cuerpo inesperado")
+    return method, url.path, params, keep_alive
+
+
+# ============================================================================
+# SERVIDOR
+# ============================================================================
+
+class GenerationServer:
+    """Servidor HTTP mínimo de generación de contraseñas"""
+
+    def __init__(self, max_per_client=MAX_PER_CLIENT, max_inflight=MAX_INFLIGHT,
+                 idle_timeout=IDLE_TIMEOUT):
+        self.max_per_client = max_per_client
+        self.idle_timeout = idle_timeout
+        self._inflight = asyncio.Semaphore(max_inflight)
+        self.connections = 0
+        self.requests = 0
+
+    def dispatch(self, request):
+        """
+        Atiende una petición ya leída
+        Las pequeñas se responden en el acto (bytes); las grandes y las que
+        compilan una política o plantilla retornan una tarea que las genera
+        en un hilo
+        """
+        method, path, params, keep_alive = request
+        started = time.perf_counter()
+        self.requests += 1
+        try:
+            if path == "/health":
+                return encode_response(200, b"ok\n", keep_alive=keep_alive)
+            if path != "/generate":
+                raise HTTPError(404, "Ruta desconocida (usa /generate)")
+            if method not in ("GET", "POST"):
+                raise HTTPError(405, "Usa GET o POST")
+            args = parse_params(params)
+            count, length, _, policy, _, template = args
+            # Las políticas y plantillas compilan su tabla: siempre en un hilo
+            if policy is not None or template is not None or count * length >= THREAD_CHARS:
+                return asyncio.ensure_future(self._respond_in_thread(args, keep_alive, started))
+            body, content_type = build_response_body(*args)
+            metrics.observe("server_request", time.perf_counter() - started)
+            return encode_response(200, body, content_type, keep_alive)
+        except HTTPError as e:
+            return encode_response(e.status, f"{e}\n".encode("utf-8"), keep_alive=keep_alive)
+        except Exception as e:
+            print(f"Error atendiendo petición: {e}", file=sys.stderr)
+            return encode_response(500, b"Error interno\n", keep_alive=keep_alive)
+
+    async def _respond_in_thread(self, args, keep_alive, started):
+        """Genera una petición grande o con tabla sin bloquear el bucle"""
+        try:
+            async with self._inflight:
+                loop = asyncio.get_running_loop()
+                body, content_type = await loop.run_in_executor(None, build_response_body, *args)
+            return encode_response(200, body, content_type, keep_alive)
+        except HTTPError as e:
+            return encode_response(e.status, f"{e}\n".encode("utf-8"), keep_alive=keep_alive)
+        except Exception as e:
+            print(f"Error atendiendo petición: {e}", file=sys.stderr)
+            return encode_response(500, b"Error interno\n", keep_alive=keep_alive)
+        finally:
+            metrics.observe("server_request", time.perf_counter() - started)
+
+    async def handle(self, reader, writer):
+        """Atiende una conexión: lee peticiones y responde en el mismo orden"""
+        self.connections += 1
+        pending = asyncio.Queue(maxsize=self.max_per_client)
+        sender = asyncio.create_task(self._send(pending, writer, asyncio.current_task()))
+        try:
+            while not sender.done():
+                try:
+                    request = await asyncio.wait_for(read_request(reader), self.idle_timeout)
+                except HTTPError as e:
+                    # Error de protocolo: se responde y se cierra la conexión
+                    body = f"{e}\n".encode("utf-8")
+                    await pending.put((encode_response(e.status, body, keep_alive=False), False))
+                    break
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+                # Con la cola llena (max_per_client en curso) se deja de leer
+                keep_alive = request[3]
+                await pending.put((self.dispatch(request), keep_alive))
+                if not keep_alive:
+                    break
+            await pending.put(None)
+            await sender
+        except (ConnectionError, asyncio.CancelledError):
+            sender.cancel()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    @staticmethod
+    async def _send(pending, writer, reader_task):
+        """Escribe las respuestas por orden, esperando a que el cliente las lea"""
+        try:
+            while True:
+                item = await pending.get()
+                if item is None:
+                    return
+                response, keep_alive = item
+                if not isinstance(response, bytes):
+                    response = await response
+                writer.write(response)
+                # Control de flujo: si el cliente no lee, aquí se espera
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            # El cliente se fue: se deja de leer de la conexión
+            reader_task.cancel()
+
+    async def start(self, port=PORT, unix_path=None):
+        """Abre el socket (TCP en 127.0.0.1 o Unix) y retorna el asyncio.Server"""
+        if unix_path:
+            if os.path.exists(unix_path) and stat.S_ISSOCK(os.stat(unix_path).st_mode):
+                os.remove(unix_path)
+            server = await asyncio.start_unix_server(self.handle, unix_path,
+                                                     limit=MAX_LINE, backlog=BACKLOG)
+            os.chmod(unix_path, 0o600)
+        else:
+            server = await asyncio.start_server(self.handle, HOST, port, limit=MAX_LINE,
+                                                backlog=BACKLOG, reuse_address=True)
+        return server
+
+
+def serve(port=PORT, unix_path=None, max_per_client=MAX_PER_CLIENT, out=sys.stderr):
+    """Arranca el servicio y atiende hasta Ctrl+C"""
+    async def main():
+        server = await GenerationServer(max_per_client).start(port, unix_path)
+        where = unix_path or "http://{}:{}".format(*server.sockets[0].getsockname()[:2])
+        print(f"✅ TuxContra sirviendo en {where} (Ctrl+C para salir)", file=out, flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if unix_path and os.path.exists(unix_path):
+            os.remove(unix_path)
+    return 0
+
+
+# ============================================================================
+# PRUEBA DE CARGA
+# ============================================================================
+
+async def _read_response(reader):
+    """Lee una respuesta completa; retorna el código de estado"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Conexión cerrada")
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def load_test(connect, connections=1000, requests=20, pipeline=1,
+                    target="/generate?length=16&count=1"):
+    """
+    Abre `connections` conexiones simultáneas y lanza `requests` peticiones
+    por conexión, de `pipeline` en `pipeline` sin esperar respuesta
+    Retorna un diccionario con peticiones/s y latencias
+    """
+    request = f"GET {target} HTTP/1.1\r\nHost: tuxcontra\r\n\r\n".encode("ascii")
+    latencies = []
+    errors = 0
+    opened = asyncio.Event()
+    ready = 0
+
+    async def client():
+        nonlocal errors, ready
+        try:
+            reader, writer = await connect()
+        except OSError:
+            errors += requests
+            ready += 1
+            if ready == connections:
+                opened.set()
+            return
+        ready += 1
+        if ready == connections:
+            opened.set()
+        await opened.wait()
+        try:
+            done = 0
+            while done < requests:
+                batch = min(pipeline, requests - done)
+                sent = time.perf_counter()
+                writer.write(request * batch)
+                await writer.drain()
+                for _ in range(batch):
+                    if await _read_response(reader) != 200:
+                        errors += 1
+                    latencies.append(time.perf_counter() - sent)
+                done += batch
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            errors += requests - done
+        finally:
+            writer.close()
+
+    tasks = [asyncio.create_task(client()) for _ in range(connections)]
+    await opened.wait()
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(0.50) * 1000,
+        "p99_ms": percentile(0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def run_load_test(connections=1000, requests=20, pipeline=1, unix=False, out=sys.stdout):
+    """Arranca el servicio en otro proceso y lo somete a la prueba de carga"""
+    import subprocess
+    import tempfile
+
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = min(hard, max(soft, connections * 2 + 256))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, os.path.join(here, "tuxcontra.py"), "--serve"]
+    if unix:
+        unix_path = os.path.join(tempfile.mkdtemp(prefix="tuxcontra_"), "tuxcontra.sock")
+        command += ["--unix", unix_path]
+        connect = lambda: asyncio.open_unix_connection(unix_path, limit=MAX_LINE)
+    else:
+        with socket.socket() as probe:
+            probe.bind((HOST, 0))
+            port = probe.getsockname()[1]
+        command += ["--port", str(port)]
+        connect = lambda: asyncio.open_connection(HOST, port, limit=MAX_LINE)
+
+    server = subprocess.Popen(command, stderr=subprocess.PIPE)
+    try:
+        server.stderr.readline()  # línea "sirviendo en ..."
+        results = asyncio.run(load_test(connect, connections, requests, pipeline))
+    finally:
+        server.terminate()
+        server.wait()
+
+    transport = "socket Unix" if unix else "HTTP 127.0.0.1"
+    print(f"Prueba de carga ({transport}): {connections:,} conexiones × {requests} "
+          f"peticiones, pipelining {pipeline}", file=out)
+    print(f"  {results['requests_per_s']:>12,.0f} peticiones/s", file=out)
+    print(f"  p50 {results['p50_ms']:.2f} ms · p99 {results['p99_ms']:.2f} ms · "
+          f"máx {results['max_ms']:.2f} ms · errores {results['errors']}", file=out)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de TuxContra")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--pipeline", type=int, default=1)
+    parser.add_argument("--unix", action="store_true")
+    args = parser.parse_args()
+    run_load_test(args.connections, args.requests, args.pipeline, args.unix)
@@ -0,0 +1,221 @@
+"""
+Análisis de fortaleza de contraseñas de TuxContra
+
+La entropía teórica se calcula en forma cerrada (longitud · log2(alfabeto)),
+sin construir enteros enormes. La estimación "real" recorre la contraseña
+buscando repeticiones, secuencias, recorridos de teclado y fragmentos de
+diccionario en tiempo lineal, y descuenta los bits de los tramos
+predecibles.
+
+Para no recorrer la cadena carácter a carácter en Python, las diferencias
+entre posiciones se calculan de una vez con aritmética de enteros grandes
+sobre los bytes (cada byte lleva el bit alto activado para que la resta no
+se propague al vecino) y los tramos se buscan con regex de prefijo literal.
+"""
+
+import math
+import re
+import string
+from collections import namedtuple
+from functools import lru_cache
+
+from tuxcontra_engine import SYMBOLS
+
+# ============================================================================
+# PATRONES
+# ============================================================================
+
+# Secuencias (abc, 123) y filas de teclado (qwerty, asdf...), en ambos
+# sentidos. Cada grupo se busca en una pasada; un carácter no puede estar en
+# dos secuencias del mismo grupo.
+SEQUENCE_GROUPS = [
+    [string.ascii_lowercase, string.digits],
+    ["qwertyuiop", "asdfghjkl", "zxcvbnm", "1234567890", "!@#$%^&*()"],
+]
+
+# Periodos de repetición buscados ("aaa" es periodo 1, "abab" periodo 2)
+REPEAT_PERIODS = (1, 2, 3, 4)
+
+# Palabras frecuentes en contraseñas filtradas
+COMMON_WORDS = [
+    "password", "passw0rd", "contraseña", "contrasena", "clave", "secreto",
+    "admin", "root", "login", "welcome", "bienvenido", "letmein", "master",
+    "dragon", "monkey", "shadow", "sunshine", "princess", "football", "futbol",
+    "baseball", "superman", "batman", "iloveyou", "teamo", "love", "amor",
+    "hello", "hola", "qwerty", "azerty", "abc123", "trustno1", "starwars",
+    "pokemon", "google", "mustang", "michael", "charlie", "jordan", "hunter",
+    "ranger", "access", "secret", "test", "user", "guest", "tux", "linux",
+]
+
+Finding = namedtuple("Finding", "kind start end")
+Strength = namedtuple("Strength", "theoretical_bits estimated_bits label color findings")
+
+
+def _sequence_table(sequences):
+    """
+    Tabla de bytes.translate que numera los caracteres de cada secuencia
+    de forma consecutiva; entre secuencias queda un hueco y los caracteres
+    ajenos valen 0, así que solo los vecinos reales difieren en ±1
+    """
+    table = bytearray(256)
+    code = 2
+    for seq in sequences:
+        for ch in seq:
+            for variant in {ch, ch.upper()}:
+                table[ord(variant)] = code
+            code += 1
+        code += 2
+    return bytes(table)
+
+
+_SEQUENCE_TABLES = [_sequence_table(group) for group in SEQUENCE_GROUPS]
+_ASCENDING_RE = re.compile(rb"\x81\x81+")
+_DESCENDING_RE = re.compile(rb"\x7f\x7f+")
+# "aaa": dos diferencias nulas seguidas; "abab": tantas como el periodo
+_REPEAT_RES = [(p, re.compile(b"\x80" * max(2, p) + b"+")) for p in REPEAT_PERIODS]
+
+
+class _Codes:
+    """Bytes de la contraseña vistos como un único entero (big-endian)"""
+
+    def __init__(self, codes):
+        self.size = len(codes)
+        self.value = int.from_bytes(codes, "big")
+        self.high = int.from_bytes(b"\x80" * self.size, "big")
+
+    def lag_differences(self, lag):
+        """
+        Bytes con 0x80 + (codes[i + lag] - codes[i]) para cada i
+        Requiere que todos los códigos sean menores que 128
+        """
+        n = self.size - lag
+        if n <= 0:
+            return b""
+        shift = 8 * lag
+        ahead = self.value & ((1 << (8 * n)) - 1)
+        behind = self.value >> shift
+        return ((ahead | (self.high >> shift)) - behind).to_bytes(n, "big")
+
+
+def _runs(diffs, regex, lag):
+    """Tramos de caracteres [inicio, fin) cubiertos por las coincidencias"""
+    return [(m.start(), m.end() + lag) for m in regex.finditer(diffs)]
+
+
+@lru_cache(maxsize=8)
+def _word_patterns(words):
+    """Regex literales (búsqueda rápida) para cada palabra del diccionario"""
+    return tuple(re.compile(re.escape(w)) for w in sorted(set(w.lower() for w in words)))
+
+
+# ============================================================================
+# ENTROPÍA
+# ============================================================================
+
+def theoretical_entropy(length, charset_size):
+    """Bits de una contraseña aleatoria uniforme (forma cerrada)"""
+    if charset_size <= 1 or length <= 0:
+        return 0.0
+    return length * math.log2(charset_size)
+
+
+def infer_charset_size(password):
+    """Tamaño del alfabeto deducido de los tipos de caracteres presentes"""
+    size = 0
+    if re.search(r"[a-z]", password):
+        size += 26
+    if re.search(r"[A-Z]", password):
+        size += 26
+    if re.search(r"[0-9]", password):
+        size += 10
+    if re.search(f"[{re.escape(SYMBOLS)}]", password):
+        size += len(SYMBOLS)
+    if re.search(rf"[^a-zA-Z0-9{re.escape(SYMBOLS)}]", password):
+        size += 32
+    return size
+
+
+def strength_label(bits):
+    """Retorna (color, texto) para una cantidad de bits"""
+    if bits >= 256:
+        return "#27ae60", "Extremadamente Fuerte"
+    if bits >= 128:
+        return "#27ae60", "Muy Fuerte"
+    if bits >= 64:
+        return "#f39c12", "Fuerte"
+    if bits >= 32:
+        return "#e67e22", "Moderada"
+    return "#e74c3c", "Débil"
+
+
+# ============================================================================
+# ANÁLISIS
+# ============================================================================
+
+def find_patterns(password, words=tuple(COMMON_WORDS)):
+    """Busca tramos predecibles; retorna una lista de Finding sin solapes"""
+    found = []
+
+    # Diccionario (sin distinguir mayúsculas)
+    lowered = password.lower()
+    for regex in _word_patterns(words):
+        found.extend(Finding("dictionary", m.start(), m.end()) for m in regex.finditer(lowered))
+
+    # Los caracteres no ASCII se tratan como '?': puede sobrestimar
+    # repeticiones, nunca las oculta
+    raw = password.encode("ascii", "replace")
+
+    # Secuencias y recorridos de teclado
+    for table in _SEQUENCE_TABLES:
+        diffs = _Codes(raw.translate(table)).lag_differences(1)
+        for regex in (_ASCENDING_RE, _DESCENDING_RE):
+            found.extend(Finding("sequence", a, b) for a, b in _runs(diffs, regex, 1))
+
+    # Repeticiones: al menos tres caracteres iguales o dos periodos completos
+    raw_codes = _Codes(raw)
+    for period, regex in _REPEAT_RES:
+        diffs = raw_codes.lag_differences(period)
+        found.extend(Finding("repeat", a, b) for a, b in _runs(diffs, regex, period))
+
+    # Se quedan los tramos más largos sin solaparse
+    found.sort(key=lambda f: (f.start, -(f.end - f.start)))
+    result = []
+    covered_until = 0
+    for finding in found:
+        if finding.start >= covered_until:
+            result.append(finding)
+            covered_until = finding.end
+    return result
+
+
+def _finding_cost(finding, charset_size, dictionary_size):
+    """Bits que aporta un tramo predecible"""
+    length = finding.end - finding.start
+    if finding.kind == "dictionary":
+        # Elegir la palabra y su combinación de mayúsculas (aprox. 1 bit)
+        return math.log2(dictionary_size) + 1
+    # Primer carácter, longitud del tramo y sentido/periodo
+    return math.log2(charset_size) + math.log2(length) + 1
+
+
+def analyze(password, charset_size=None, words=tuple(COMMON_WORDS)):
+    """
+    Analiza una contraseña (sin caché: no se guarda ninguna contraseña; en
+    la interfaz se llama desde el hilo de generación)
+    """
+    if charset_size is None:
+        charset_size = infer_charset_size(password)
+    theoretical = theoretical_entropy(len(password), charset_size)
+    if charset_size <= 1 or not password:
+        color, label = strength_label(0)
+        return Strength(theoretical, 0.0, label, color, ())
+
+    findings = find_patterns(password, words)
+    covered = sum(f.end - f.start for f in findings)
+    estimated = theoretical_entropy(len(password) - covered, charset_size)
+    dictionary_size = max(2, len(words))
+    estimated += sum(_finding_cost(f, charset_size, dictionary_size) for f in findings)
+    estimated = min(estimated, theoretical)
+
+    color, label = strength_label(estimated)
+    return Strength(theoretical, estimated, label, color, tuple(findings))
@@ -0,0 +1,269 @@
+"""
+Plantillas de TuxContra
+
+Formatos fijos (claves tipo licencia, frases Wi-Fi con separadores,
+"empieza por letra y sigue alfanumérico"...) se describen con una
+plantilla en la que cada carácter es un tipo o un literal:
+
+    l  minúscula        u  mayúscula        L  letra
+    d  dígito           s  símbolo          a  letra o dígito
+    x  cualquiera       v/V  vocal          c/C  consonante
+    h/H  hexadecimal    [abc] [a-f0-9]  conjunto propio
+    {n}  repite n veces el elemento anterior (n >= 1)
+    \\X  el carácter X tal cual
+
+Cualquier otro carácter que no sea una letra (-, _, :, espacio, dígitos...)
+es un literal; una letra sin significado es un error, para que una errata
+no pase desapercibida. Ejemplos: "Cvcc-dddd-ssss", "La{15}",
+"hhhh-hhhh-hhhh-hhhh", "[A-Z]{3}-d{4}".
+
+La plantilla se analiza una vez y se compila (con caché) en un plan de
+tramos: posiciones seguidas del mismo tipo se juntan en un tramo y los
+literales seguidos en otro. Para generar muchos códigos cada tramo se
+sortea de golpe para todo el lote y los códigos se montan uniendo
+columnas, sin analizar nada ni decidir nada por carácter.
+"""
+
+import math
+import re
+from functools import lru_cache
+
+from tuxcontra_engine import DIGITS, LOWER, SYMBOLS, UPPER, _ByteAlphabet, compile_charset
+from tuxcontra_entropy import randbytes as pool_randbytes
+
+# Longitud máxima de un código
+MAX_LENGTH = 65536
+# Caracteres por lote al generar muchos códigos
+BATCH_CHARS = 1 << 20
+
+_VOWELS = "aeiou"
+_CONSONANTS = "".join(c for c in LOWER if c not in _VOWELS)
+
+# Código de la plantilla -> alfabeto
+CLASSES = {
+    "l": LOWER,
+    "u": UPPER,
+    "L": LOWER + UPPER,
+    "d": DIGITS,
+    "s": SYMBOLS,
+    "a": LOWER + UPPER + DIGITS,
+    "x": LOWER + UPPER + DIGITS + SYMBOLS,
+    "v": _VOWELS,
+    "V": _VOWELS.upper(),
+    "c": _CONSONANTS,
+    "C": _CONSONANTS.upper(),
+    "h": DIGITS + "abcdef",
+    "H": DIGITS + "ABCDEF",
+}
+
+_REPEAT = re.compile(r"\{(\d+)\}")
+
+
+def _parse_set(template, pos):
+    """Lee un conjunto [...] que empieza en pos; retorna (alfabeto, fin)"""
+    chars = []
+    i = pos + 1
+    while i < len(template) and template[i] != "]":
+        c = template[i]
+        if c == "\\" and i + 1 < len(template):
+            chars.append(template[i + 1])
+            i += 2
+            continue
+        if i + 2 < len(template) and template[i + 1] == "-" and template[i + 2] != "]":
+            end = template[i + 2]
+            if ord(end) < ord(c):
+                raise ValueError(f"Rango no válido: {c}-{end}")
+            chars.extend(chr(o) for o in range(ord(c), ord(end) + 1))
+            i += 3
+            continue
+        chars.append(c)
+        i += 1
+    if i >= len(template):
+        raise ValueError("Falta ']' en la plantilla")
+    # Sin repetidos y en orden de aparición (cada carácter, misma probabilidad)
+    alphabet = "".join(dict.fromkeys(chars))
+    if not alphabet:
+        raise ValueError("Conjunto vacío en la plantilla: []")
+    return alphabet, i + 1
+
+
+def parse_template(template):
+    """
+    Convierte la plantilla en una lista de elementos (alfabeto o None, texto)
+    donde texto es el alfabeto de una posición o un literal
+    """
+    if not template:
+        raise ValueError("La plantilla está vacía")
+    if "\n" in template or "\r" in template:
+        raise ValueError("La plantilla no puede contener saltos de línea")
+    items = []
+    # Posiciones de la última repetición leída (para rechazar d{2}{3})
+    repeat_start = repeat_end = -1
+    i = 0
+    while i < len(template):
+        c = template[i]
+        if c == "{":
+            match = _REPEAT.match(template, i)
+            if match is None:
+                raise ValueError("Repetición no válida: usa {n}, por ejemplo d{4}")
+            if not items:
+                raise ValueError("{n} debe ir detrás de un elemento")
+            if i == repeat_end:
+                raise ValueError(f"Repetición doble: {template[repeat_start:match.end()]} "
+                                 f"(usa una sola, por ejemplo d{{6}})")
+            n = int(match.group(1))
+            if n == 0:
+                raise ValueError(f"{match.group(0)} no es una repetición válida: "
+                                 f"n debe ser al menos 1")
+            if len(items) + n - 1 > MAX_LENGTH:
+                raise ValueError(f"La plantilla pasa de {MAX_LENGTH:,} caracteres")
+            items.extend([items[-1]] * (n - 1))
+            repeat_start, repeat_end = i, match.end()
+            i = match.end()
+            continue
+        if c == "[":
+            alphabet, i = _parse_set(template, i)
+            items.append((True, alphabet))
+            continue
+        if c == "\\":
+            if i + 1 >= len(template):
+                raise ValueError("'\\' al final de la plantilla")
+            items.append((False, template[i + 1]))
+            i += 2
+            continue
+        if c in CLASSES:
+            items.append((True, CLASSES[c]))
+        elif c.isalpha():
+            raise ValueError(f"Código desconocido en la plantilla: {c} "
+                             f"(usa {' '.join(CLASSES)}, o \\{c} para el literal)")
+        else:
+            items.append((False, c))
+        i += 1
+    if not items:
+        raise ValueError("La plantilla no genera ningún carácter")
+    if len(items) > MAX_LENGTH:
+        raise ValueError(f"La plantilla pasa de {MAX_LENGTH:,} caracteres")
+    return items
+
+
+class _Plan:
+    """Plantilla compilada: tramos de (alfabeto compilado, n) o (None, literal)"""
+
+    def __init__(self, template):
+        self.template = template
+        runs = []
+        for is_class, text in parse_template(template):
+            if runs and is_class and runs[-1][0] and runs[-1][1] == text:
+                runs[-1][2] += 1
+            elif runs and not is_class and not runs[-1][0]:
+                runs[-1][1] += text
+            else:
+                runs.append([is_class, text, 1])
+        self.parts = tuple((compile_charset(text), n) if is_class else (None, text)
+                           for is_class, text, n in runs)
+        # Todos los caracteres que pueden salir (para el análisis de fortaleza)
+        self.charset = "".join(dict.fromkeys("".join(text for _, text, _ in runs)))
+        self.length = sum(n if alphabet is not None else len(n)
+                          for alphabet, n in self.parts)
+        self._bits = sum(n * math.log2(alphabet.size) for alphabet, n in self.parts
+                         if alphabet is not None and alphabet.size > 1)
+        # Todo cabe en un byte por carácter: el lote se monta en un bytearray
+        self.narrow = all(isinstance(alphabet, _ByteAlphabet) if alphabet is not None
+                          else all(ord(c) < 256 for c in value)
+                          for alphabet, value in self.parts)
+
+    def entropy(self):
+        """Bits exactos de un código (suma de log2 del alfabeto por posición)"""
+        return self._bits
+
+    def generate(self, randbytes=pool_randbytes):
+        """Genera un código"""
+        return "".join(text if alphabet is None else alphabet.draw(text, randbytes)
+                       for alphabet, text in self.parts)
+
+    def lines(self, n, randbytes=pool_randbytes):
+        """
+        n códigos, uno por línea, como un solo texto
+
+        Cada tramo se sortea de una vez para todo el lote y cada posición
+        se copia a su columna con una asignación por saltos
+        (out[pos::ancho] = ...), así que el coste por código no depende
+        del número de tramos.
+        """
+        if n <= 0:
+            return ""
+        if not self.narrow:
+            return "".join(code + "\n" for code in self._zip_many(n, randbytes))
+        stride = self.length + 1
+        out = bytearray(b"\n") * (n * stride)
+        pos = 0
+        for alphabet, value in self.parts:
+            if alphabet is None:
+                for c in value.encode("latin-1"):
+                    out[pos::stride] = bytes((c,)) * n
+                    pos += 1
+                continue
+            block = alphabet.draw(n * value, randbytes).encode("latin-1")
+            if value == 1:
+                out[pos::stride] = block
+            else:
+                for j in range(value):
+                    out[pos + j::stride] = block[j::value]
+            pos += value
+        return out.decode("latin-1")
+
+    def generate_many(self, n, randbytes=pool_randbytes):
+        """Genera una lista de n códigos sorteando cada tramo para todo el lote"""
+        if n <= 0:
+            return []
+        if not self.narrow:
+            return self._zip_many(n, randbytes)
+        codes = self.lines(n, randbytes).split("\n")
+        codes.pop()
+        return codes
+
+    def _zip_many(self, n, randbytes):
+        """generate_many uniendo columnas (alfabetos fuera de latin-1)"""
+        columns = []
+        for alphabet, value in self.parts:
+            if alphabet is None:
+                columns.append([value] * n)
+            elif value == 1:
+                # Un str se recorre carácter a carácter: ya es la columna
+                columns.append(alphabet.draw(n, randbytes))
+            else:
+                block = alphabet.draw(n * value, randbytes)
+                columns.append([block[i:i + value] for i in range(0, n * value, value)])
+        if len(columns) == 1:
+            return list(columns[0])
+        return list(map("".join, zip(*columns)))
+
+
+# ============================================================================
+# API PÚBLICA
+# ============================================================================
+
+@lru_cache(maxsize=32)
+def compile_template(template):
+    """Compila (y guarda en caché) una plantilla"""
+    return _Plan(template)
+
+
+def generate(template, randbytes=pool_randbytes):
+    """Genera un código con la plantilla"""
+    return compile_template(template).generate(randbytes)
+
+
+def iter_passwords(count, template, randbytes=pool_randbytes):
+    """Genera count códigos uno a uno (por lotes de unos BATCH_CHARS caracteres)"""
+    plan = compile_template(template)
+    per_batch = max(1, BATCH_CHARS // max(1, plan.length))
+    while count > 0:
+        n = min(per_batch, count)
+        yield from plan.generate_many(n, randbytes)
+        count -= n
+
+
+def template_entropy(template):
+    """Bits de un código de la plantilla"""
+    return compile_template(template).entropy()